@@ -0,0 +1,353 @@
+"""
+In-process analytics over the Parquet snapshots written by snapshot.py.
+
+Each of the 15 insights in queries.sql_queries has a vectorised pyarrow
+equivalent here (group_by / join / compute kernels over columnar memory), so
+the insights page can be served without re-aggregating the OLTP tables.
+Results are Arrow tables that reach pandas in one to_pandas() call instead
+of one dict per row.
+
+The SQL semantics that matter are reproduced: COUNT(col) skips NULLs, string
+equality and GROUP BY on strings are case-insensitive like MySQL's default
+collation (a group is labelled with the first spelling seen, as MySQL
+does), and ROUND(x / y, 2) rounds the 4-decimal quotient half-up before
+rounding again. Trailing-space padding and accent folding of the collation
+are not reproduced.
+
+Usage:
+    python analytics.py verify [--refresh]   # compare every insight with MySQL
+    python analytics.py bench [--repeat 5]   # time MySQL vs the snapshot engine
+"""
+import argparse
+import datetime
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import db
+import profiler
+import snapshot
+from queries import sql_queries
+
+# MySQL's div_precision_increment: scale added to the result of "/" and AVG().
+DIV_PRECISION = 4
+
+
+class SnapshotMissing(FileNotFoundError):
+    """There is no snapshot to answer from yet."""
+
+
+class SnapshotEngine:
+    """Loads snapshot tables on demand and keeps them in memory per generation."""
+
+    def __init__(self, root=snapshot.SNAPSHOT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._generation = None
+        self._tables = {}
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def table(self, name):
+        manifest = snapshot.load_manifest(self.root)
+        if not manifest or name not in manifest.get("tables", {}):
+            raise SnapshotMissing(f"no snapshot of {name} in {self.root}/ (run `python snapshot.py export`)")
+        generation = manifest["generation"]
+        with self._lock:
+            if generation != self._generation:
+                self._generation, self._tables = generation, {}
+            cached = self._tables.get(name)
+        if cached is not None:
+            return cached
+        files = [os.path.join(self.root, part["file"]) for part in manifest["tables"][name]["partitions"].values()]
+        table = ds.dataset(files, schema=snapshot.SCHEMAS[name], format="parquet").to_table()
+        with self._lock:
+            if generation == self._generation:
+                self._tables[name] = table
+        return table
+
+    def run(self, title):
+        return INSIGHTS[title](self)
+
+
+# -----------------------------
+# SQL BUILDING BLOCKS
+# -----------------------------
+def _group_by(table, key, aggregations):
+    """
+    GROUP BY ``key`` under a case-insensitive collation: string keys are
+    grouped on their lower-cased form and labelled with the first spelling
+    seen. Returns ``(key column, grouped table)``.
+    """
+    if not pa.types.is_string(table.schema.field(key).type):
+        grouped = table.group_by(key).aggregate(aggregations)
+        return grouped[key], grouped
+    folded = table.append_column("__group_key", pc.utf8_lower(table[key]))
+    grouped = folded.group_by("__group_key", use_threads=False).aggregate(aggregations + [(key, "first")])
+    return grouped[f"{key}_first"], grouped
+
+
+def _count_by(table, key, name, counted=None):
+    """SELECT key, COUNT(*) (or COUNT(counted)) AS name ... GROUP BY key."""
+    if counted is None:
+        keys, grouped = _group_by(table, key, [([], "count_all")])
+        result = "count_all"
+    else:
+        keys, grouped = _group_by(table, key, [(counted, "count")])
+        result = f"{counted}_count"
+    return pa.table({key: keys, name: grouped[result]})
+
+
+def _sum_by(table, key, column, name):
+    keys, grouped = _group_by(table, key, [(column, "sum")])
+    return pa.table({key: keys, name: grouped[f"{column}_sum"]})
+
+
+def _desc(table, column):
+    return table.sort_by([(column, "descending")])
+
+
+def _equals(column, value):
+    return pc.equal(pc.utf8_lower(column), value.lower())
+
+
+def _mysql_ratio(numerator, denominator, digits=2):
+    """ROUND(numerator / denominator, digits) on integers, as MySQL computes it."""
+    if not denominator:
+        return None
+    quotient = (Decimal(numerator) / Decimal(denominator)).quantize(Decimal(1).scaleb(-DIV_PRECISION), ROUND_HALF_UP)
+    return quotient.quantize(Decimal(1).scaleb(-digits), ROUND_HALF_UP)
+
+
+def _decimal_column(values, digits=2):
+    return pa.array(values, type=pa.decimal128(38, digits))
+
+
+# -----------------------------
+# THE 15 INSIGHTS
+# -----------------------------
+def provider_density(engine):
+    return _count_by(engine.table("providers").select(["City"]), "City", "Total")
+
+
+def receiver_density(engine):
+    return _count_by(engine.table("receivers").select(["City"]), "City", "Total")
+
+
+def provider_types(engine):
+    return _desc(_count_by(engine.table("providers").select(["Type"]), "Type", "Total"), "Total")
+
+
+def delhi_providers(engine):
+    providers = engine.table("providers")
+    return providers.filter(_equals(providers["City"], "Delhi")).select(["Name", "Contact", "City"])
+
+
+def top_beneficiaries(engine):
+    joined = engine.table("receivers").select(["Receiver_ID", "Name"]).join(
+        engine.table("claims").select(["Receiver_ID", "Claim_ID"]), "Receiver_ID", join_type="inner")
+    return _desc(_count_by(joined, "Name", "Claims", counted="Claim_ID"), "Claims")
+
+
+def inventory_volume(engine):
+    total = pc.sum(engine.table("food_listings")["Quantity"], min_count=1).cast(pa.int64())
+    return pa.table({"Total_Servings": pa.array([total.as_py()], type=pa.int64())})
+
+
+def supply_leaders(engine):
+    return _desc(_count_by(engine.table("food_listings").select(["Location"]), "Location", "Count"), "Count")
+
+
+def food_type_trends(engine):
+    return _desc(_count_by(engine.table("food_listings").select(["Food_Type"]), "Food_Type", "Count"), "Count")
+
+
+def engagement_per_listing(engine):
+    joined = engine.table("food_listings").select(["Food_ID", "Food_Name"]).join(
+        engine.table("claims").select(["Food_ID", "Claim_ID"]), "Food_ID", join_type="left outer")
+    return _count_by(joined, "Food_Name", "Claims", counted="Claim_ID")
+
+
+def provider_success(engine):
+    claims = engine.table("claims")
+    completed = claims.filter(_equals(claims["Status"], "Completed")).select(["Food_ID", "Claim_ID"])
+    listings = engine.table("food_listings").select(["Food_ID", "Provider_ID"]).join(completed, "Food_ID", join_type="inner")
+    joined = engine.table("providers").select(["Provider_ID", "Name"]).join(listings, "Provider_ID", join_type="inner")
+    return _desc(_count_by(joined, "Name", "Success", counted="Claim_ID"), "Success")
+
+
+def fulfillment_ratio(engine):
+    claims = engine.table("claims").select(["Status"])
+    counts = _count_by(claims, "Status", "n")
+    percents = [_mysql_ratio(n * 100, claims.num_rows) for n in counts["n"].to_pylist()]
+    return pa.table({"Status": counts["Status"], "Percent": _decimal_column(percents)})
+
+
+def allocation_per_receiver(engine):
+    claims = engine.table("claims").select(["Receiver_ID", "Food_ID"]).join(
+        engine.table("food_listings").select(["Food_ID", "Quantity"]), "Food_ID", join_type="inner")
+    joined = engine.table("receivers").select(["Receiver_ID", "Name"]).join(claims, "Receiver_ID", join_type="inner")
+    names, grouped = _group_by(joined, "Name", [("Quantity", "sum"), ("Quantity", "count")])
+    averages = [_mysql_ratio(total, n) for total, n in
+                zip(grouped["Quantity_sum"].to_pylist(), grouped["Quantity_count"].to_pylist())]
+    return pa.table({"Name": names, "Avg": _decimal_column(averages)})
+
+
+def peak_service_hours(engine):
+    joined = engine.table("food_listings").select(["Food_ID", "Meal_Type"]).join(
+        engine.table("claims").select(["Food_ID", "Claim_ID"]), "Food_ID", join_type="inner")
+    return _desc(_count_by(joined, "Meal_Type", "Claims", counted="Claim_ID"), "Claims")
+
+
+def contribution_leaderboard(engine):
+    joined = engine.table("providers").select(["Provider_ID", "Name"]).join(
+        engine.table("food_listings").select(["Provider_ID", "Quantity"]), "Provider_ID", join_type="inner")
+    return _desc(_sum_by(joined, "Name", "Quantity", "Donated"), "Donated")
+
+
+def perishability_audit(engine):
+    # CURDATE() is the server's date; this uses the app host's.
+    expiry = engine.table("food_listings")["Expiry_Date"]
+    expired = pc.sum(pc.less(expiry, pa.scalar(datetime.date.today(), pa.date32()))).as_py() or 0
+    return pa.table({"Expired": pa.array([expired], type=pa.int64())})
+
+
+INSIGHTS = {
+    "1️⃣ Provider Density per City": provider_density,
+    "2️⃣ Receiver Density per City": receiver_density,
+    "3️⃣ Dominant Provider Classifications": provider_types,
+    "4️⃣ Delhi Provider Registry": delhi_providers,
+    "5️⃣ Top Beneficiary Organizations": top_beneficiaries,
+    "6️⃣ Global Inventory Volume": inventory_volume,
+    "7️⃣ Regional Supply Leaders": supply_leaders,
+    "8️⃣ Culinary Preference Trends": food_type_trends,
+    "9️⃣ Engagement per Listing": engagement_per_listing,
+    "🔟 Provider Success Metrics": provider_success,
+    "1️⃣1️⃣ Distribution Fulfillment Ratio": fulfillment_ratio,
+    "1️⃣2️⃣ Average Allocation per Receiver": allocation_per_receiver,
+    "1️⃣3️⃣ Peak Demand Service Hours": peak_service_hours,
+    "1️⃣4️⃣ Provider Contribution Leaderboard": contribution_leaderboard,
+    "1️⃣5️⃣ Perishability Audit (Expired)": perishability_audit,
+}
+
+engine = SnapshotEngine()
+
+
+def run_many(titles, engine=engine):
+    """
+    Answer ``titles`` from the snapshot and return ``{title: DataFrame}``;
+    like executor.run_parallel, a failed insight maps to its exception.
+    """
+    results = {}
+    for title in titles:
+        start = time.perf_counter()
+        try:
+            table = engine.run(title)
+            results[title] = table.to_pandas()
+        except Exception as err:
+            results[title] = err
+            continue
+        profiler.profiler.record("arrow", title, time.perf_counter() - start, rows=table.num_rows,
+                                 size=table.nbytes)
+    return results
+
+
+# -----------------------------
+# VERIFICATION & BENCHMARK
+# -----------------------------
+def _normalise(value):
+    if isinstance(value, (Decimal, float)):
+        return int(value) if value == int(value) else round(float(value), 6)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        # Which spelling labels a case-insensitive group is not guaranteed.
+        return value.casefold()
+    return value
+
+
+def _canonical(rows):
+    return sorted((tuple(_normalise(v) for v in row.values()) for row in rows), key=repr)
+
+
+def verify(conn, engine=engine):
+    """Run every insight on MySQL and on the snapshot; return one report row each."""
+    report = []
+    cursor = conn.cursor()
+    try:
+        for title, sql in sql_queries.items():
+            cursor.execute(sql)
+            expected = list(cursor.fetchall())
+            columns = [column[0] for column in cursor.description]
+            result = engine.run(title)
+            want, got = _canonical(expected), _canonical(result.to_pylist())
+            diff = next((f"mysql {w!r} vs snapshot {g!r}" for w, g in zip(want, got) if w != g), "")
+            if not diff and len(want) != len(got):
+                diff = f"{len(want)} vs {len(got)} rows"
+            columns_match = columns == result.column_names
+            report.append({
+                "title": title,
+                "rows": len(want),
+                "match": columns_match and want == got,
+                "detail": diff if columns_match else "column names differ",
+            })
+    finally:
+        cursor.close()
+    return report
+
+
+def benchmark(conn, engine=engine, repeat=5):
+    """Median seconds per insight: MySQL via DictCursor + DataFrame vs the snapshot engine."""
+    results = []
+    cursor = conn.cursor()
+    try:
+        for title, sql in sql_queries.items():
+            mysql_times, arrow_times = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cursor.execute(sql)
+                pd.DataFrame(cursor.fetchall())
+                mysql_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                engine.run(title).to_pandas()
+                arrow_times.append(time.perf_counter() - start)
+            mysql_s, arrow_s = sorted(mysql_times)[repeat // 2], sorted(arrow_times)[repeat // 2]
+            results.append({"title": title, "mysql_ms": round(mysql_s * 1000, 2), "snapshot_ms": round(arrow_s * 1000, 2),
+                            "speedup": round(mysql_s / arrow_s, 1) if arrow_s else None})
+    finally:
+        cursor.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer the 15 insights from the Parquet snapshot.")
+    parser.add_argument("command", choices=["verify", "bench"])
+    parser.add_argument("--dir", default=snapshot.SNAPSHOT_DIR)
+    parser.add_argument("--refresh", action="store_true", help="export a fresh snapshot first")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = db.connect()
+    try:
+        if args.refresh:
+            print(snapshot.export(conn, args.dir))
+        local = SnapshotEngine(args.dir)
+        if args.command == "verify":
+            report = verify(conn, local)
+            for row in report:
+                print(f"{'ok  ' if row['match'] else 'DIFF'} {row['rows']:>6} rows  {row['title']}  {row['detail']}")
+            if not all(row["match"] for row in report):
+                raise SystemExit(1)
+        else:
+            for row in benchmark(conn, local, args.repeat):
+                print(f"{row['mysql_ms']:>10} ms  {row['snapshot_ms']:>10} ms  x{row['speedup']}  {row['title']}")
+    finally:
+        conn.close()
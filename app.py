@@ -1,28 +1,147 @@
 import streamlit as st
 import pandas as pd
-from decouple import config
 import MySQLdb
-from MySQLdb.cursors import DictCursor
+import db
+import query_cache
+import summary
+import paging
+import search
+import facets
+import executor
+import matching
+import profiler
+import terminal
+import snapshot
+import analytics
+import io
+import tempfile
+from queries import sql_queries, INSIGHT_TTLS, SUMMARY_QUERIES, listing_filters
 
 # -----------------------------
 # DATABASE CONNECTION
 # -----------------------------
+# Connections come from a process-wide pool (see db.py) so reruns and
+# concurrent sessions reuse warm sockets instead of reconnecting every time.
 def get_connection():
     try:
-        conn = MySQLdb.connect(
-            host=config('db_host'),
-            user=config('db_user'),
-            passwd=config('db_password'),
-            port=int(config('db_port')),
-            database='food_wastage_management_system',
-            cursorclass=DictCursor
-        )
-        conn.autocommit(True)
-        return conn
+        return db.get_pool().acquire()
     except MySQLdb.Error as err:
         st.error(f"Database Connection Error: {err}")
         return None
 
+def release_connection(conn, discard=False):
+    db.get_pool().release(conn, discard=discard)
+
+# Runs one CRUD write together with its summary_counters deltas. ``key`` is an
+# (id column, id) pair used to lock and read the row being updated or deleted;
+# ``changes`` holds the updated columns. Inserts pass the new row as ``new``
+# and name their key column in ``allocate``: the next free ID is put in front
+# of ``params`` and returned.
+def commit_write(conn, table, statement, params, key=None, changes=None, new=None, allocate=None):
+    with db.transaction(conn) as tx:
+        old = None
+        if allocate is not None:
+            key_value = db.next_id(tx, table, allocate)
+            params = (key_value, *params)
+        elif key is not None:
+            tx.execute(f"SELECT * FROM {table} WHERE {key[0]}=%s FOR UPDATE", (key[1],))
+            old = tx.fetchone()
+            if old is not None and changes is not None:
+                new = {**old, **changes}
+        tx.execute(statement, params)
+        summary.record_change(tx, table, old=old, new=new)
+    query_cache.invalidate(table, summary.TABLE)
+    if table == "food_listings":
+        facets.index.record_change(old=old, new=new)
+    return key_value if allocate is not None else None
+
+# -----------------------------
+# PAGINATED TABLES & EXPORTS
+# -----------------------------
+PAGE_SIZES = [25, 50, 100, 250]
+
+# The start key of every page visited so far lives in session_state under
+# ``key`` and is reset whenever the filter or page size changes.
+def pager_state(key, where="1=1", params=()):
+    size = st.session_state.get(f"{key}::size", PAGE_SIZES[1])
+    signature = (where, tuple(str(p) for p in params), size)
+    pager = st.session_state.setdefault(key, {"signature": signature, "starts": [None]})
+    if pager["signature"] != signature:
+        pager.update(signature=signature, starts=[None])
+    pager["size"] = size
+    return pager
+
+def fetch_pager(cursor, pager, table, order_by, columns="*", where="1=1", params=()):
+    return paging.fetch_page(cursor, table, order_by, columns, where, params,
+                             after=pager["starts"][-1], page_size=pager["size"])
+
+# Draws a page fetched by paging.fetch_page() plus its navigation controls.
+def render_page(key, pager, page, empty_message="No records found."):
+    starts = pager["starts"]
+    if page["rows"]:
+        st.dataframe(profiler.frame(page["rows"]), use_container_width=True)
+    else:
+        st.warning(empty_message)
+
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 2])
+    nav1.button("◀ Previous", key=f"{key}::prev", disabled=len(starts) == 1, on_click=starts.pop)
+    nav2.button("Next ▶", key=f"{key}::next", disabled=page["next_after"] is None, on_click=starts.append, args=(page["next_after"],))
+    nav3.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(pager["size"]), key=f"{key}::size", label_visibility="collapsed")
+    nav4.caption(f"Page {len(starts)} · {'' if page['exact'] else '~'}{page['total']:,} matching records")
+
+def render_paged(cursor, key, table, order_by, columns="*", where="1=1", params=(), empty_message="No records found."):
+    pager = pager_state(key, where, params)
+    render_page(key, pager, fetch_pager(cursor, pager, table, order_by, columns, where, params), empty_message)
+
+# Builds a CSV export only when asked, streaming rows off an unbuffered cursor
+# into a temporary file, capped at paging.EXPORT_ROW_CAP rows. The download
+# button keeps one copy of the capped payload; anything bigger goes through
+# `python paging.py export` rather than the browser.
+def render_export(conn, key, sql, params=(), file_name="export.csv"):
+    if st.button("⬇️ Prepare CSV Export", key=f"{key}::export"):
+        stats = {}
+        with tempfile.TemporaryFile() as spool:
+            text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+            paging.export_csv(conn, sql, params, text, max_rows=paging.EXPORT_ROW_CAP, stats=stats)
+            text.flush()
+            text.detach()
+            spool.seek(0)
+            data = spool.read()
+        if stats["truncated"]:
+            st.warning(f"Only the first {paging.EXPORT_ROW_CAP:,} rows are included. "
+                       "Export the full table with `python paging.py export <table> <file>`.")
+        st.download_button("Download CSV", data, file_name=file_name, mime="text/csv", key=f"{key}::download")
+
+# -----------------------------
+# SQL TERMINAL
+# -----------------------------
+# A terminal query runs in the background (terminal.py); this polls it so the
+# Cancel button stays live. Clicking Cancel reruns the script, which stops this
+# loop, and its callback KILLs the query before the rerun draws the outcome.
+# An unfinished job is polled from a fragment that reruns on its own, so the
+# page script -- and the pooled connection it holds -- finishes straight away
+# instead of sleeping until the query is done.
+TERMINAL_POLL_SECONDS = 0.5
+
+def poll_terminal_job(job):
+    if job.done:
+        st.rerun()  # one full rerun draws the result and drops this poller
+    st.info(f"{job.status.title()}… {job.elapsed:.1f}s")
+    st.button("⛔ Cancel Query", key="terminal::cancel", on_click=job.cancel)
+
+def render_terminal_job(job):
+    if not job.done:
+        st.fragment(poll_terminal_job, run_every=TERMINAL_POLL_SECONDS)(job)
+        return
+    if job.error is not None:
+        st.error(f"Command {job.status.title()}: {job.error}")
+        return
+    cost = "" if job.cost is None else f" · est. cost {job.cost:,.0f}"
+    st.caption(f"{len(job.rows):,} row(s) in {job.elapsed:.2f}s{cost}")
+    if job.truncated:
+        st.warning(f"Showing the first {terminal.ROW_CAP:,} rows. Add filters or a LIMIT to see the rest.")
+    st.dataframe(profiler.frame(job.rows, columns=job.columns or None), use_container_width=True)
+
 # -----------------------------
 # PAGE CONFIG
 # -----------------------------
@@ -105,267 +224,401 @@ st.markdown('<div class="main-title">The Epicurean Reserve</div>', unsafe_allow_
 st.markdown('<div class="cultural-sub">अन्नं ब्रह्म – Food is Divine</div>', unsafe_allow_html=True)
 st.markdown('<div class="global-sub">A Global Standard in Dignified Resource Redistribution</div>', unsafe_allow_html=True)
 
-menu = ["Exhibition Dashboard", "Inventory Management (CRUD)", "Concierge SQL Insights", "Direct SQL Access", "The Portfolio"]
+menu = ["Exhibition Dashboard", "Inventory Management (CRUD)", "Concierge SQL Insights", "Direct SQL Access", "Performance Console", "The Portfolio"]
 choice = st.sidebar.selectbox("📂 Select Department", menu)
 
+# Every query issued below is tagged with this page (and a section) in profiler.py.
+profiler.tag(page=choice, section="")
+profiler.start_exporter()
+
+with st.sidebar.expander("⚙️ Platform Telemetry"):
+    st.caption("Connection pools")
+    st.json(db.pool_metrics())
+    st.caption("Query cache")
+    st.json(query_cache.cache.stats())
+
 conn = get_connection()
 if conn:
-    cursor = conn.cursor()
-
-    # -------- EXHIBITION DASHBOARD --------
-    if choice == "Exhibition Dashboard":
-        # --- QUICK METRICS ---
-        cm1, cm2, cm3 = st.columns(3)
-        cursor.execute("SELECT COUNT(*) AS total FROM providers;")
-        p_count = cursor.fetchone()['total']
-        cursor.execute("SELECT COUNT(*) AS total FROM receivers;")
-        r_count = cursor.fetchone()['total']
-        cursor.execute("SELECT SUM(Quantity) AS qty FROM food_listings;")
-        total_qty = cursor.fetchone()['qty']
-
-        with cm1: st.markdown(f'<div class="metric-card"><small>PREMIUM PROVIDERS</small><h2>{p_count}</h2></div>', unsafe_allow_html=True)
-        with cm2: st.markdown(f'<div class="metric-card"><small>DIGNIFIED RECEIVERS</small><h2>{r_count}</h2></div>', unsafe_allow_html=True)
-        with cm3: st.markdown(f'<div class="metric-card"><small>AVAILABLE SERVINGS</small><h2>{total_qty if total_qty else 0}</h2></div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="section-header">Live Inventory & Filtering</div>', unsafe_allow_html=True)
-
-        # --- FILTERS SECTION ---
-        with st.expander("🔍 Refine Search Results", expanded=True):
-            col1, col2, col3, col4 = st.columns(4)
-            try:
-                cursor.execute("SELECT DISTINCT Location FROM food_listings;")
-                cities = [row['Location'] for row in cursor.fetchall()]
-                cursor.execute("SELECT DISTINCT Provider_ID FROM food_listings;")
-                providers_list = [str(row['Provider_ID']) for row in cursor.fetchall()]
-                cursor.execute("SELECT DISTINCT Food_Type FROM food_listings;")
-                food_types = [row['Food_Type'] for row in cursor.fetchall()]
-                cursor.execute("SELECT DISTINCT Meal_Type FROM food_listings;")
-                meal_types = [row['Meal_Type'] for row in cursor.fetchall()]
-            except:
-                cities, providers_list, food_types, meal_types = [], [], [], []
-
-            selected_city = col1.selectbox("Metropolitan Area", ["All"] + cities)
-            selected_provider = col2.selectbox("Provider Reference", ["All"] + providers_list)
-            selected_food_type = col3.selectbox("Culinary Category", ["All"] + food_types)
-            selected_meal_type = col4.selectbox("Service Time", ["All"] + meal_types)
-
-        # --- FILTERED FOOD LISTINGS ---
-        query = "SELECT * FROM food_listings WHERE 1=1"
-        params = []
-        if selected_city != "All": query += " AND Location = %s"; params.append(selected_city)
-        if selected_provider != "All": query += " AND Provider_ID = %s"; params.append(selected_provider)
-        if selected_food_type != "All": query += " AND Food_Type = %s"; params.append(selected_food_type)
-        if selected_meal_type != "All": query += " AND Meal_Type = %s"; params.append(selected_meal_type)
-
-        cursor.execute(query, params)
-        food_data = pd.DataFrame(cursor.fetchall())
-        if not food_data.empty:
-            st.dataframe(food_data, use_container_width=True)
-        else:
-            st.warning("No records found for the current selection.")
-
-        # --- PROVIDER CONTACT DETAILS ---
-        st.markdown('<div class="section-header">📞 Concierge Contact Registry</div>', unsafe_allow_html=True)
-        try:
-            provider_query = "SELECT Provider_ID, Name, Type, City, Contact FROM providers ORDER BY City;"
-            cursor.execute(provider_query)
-            p_contact_df = pd.DataFrame(cursor.fetchall())
-            st.dataframe(p_contact_df, use_container_width=True)
-        except Exception as e:
-            st.error(f"Could not load registry: {e}")
-
-# -------- EXECUTIVE MASTER REGISTRY (FULL CRUD) --------
-    elif choice == "Inventory Management (CRUD)":
-        st.markdown('<div class="section-header">Executive Master Registry</div>', unsafe_allow_html=True)
+    stale = False
+    try:
+        cursor = conn.cursor()
+        summary.ensure(conn)
+
+        # -------- EXHIBITION DASHBOARD --------
+        if choice == "Exhibition Dashboard":
+            # --- QUICK METRICS --- (filled in once the parallel reads below return)
+            cm1, cm2, cm3 = st.columns(3)
+
+            st.markdown('<div class="section-header">Live Inventory & Filtering</div>', unsafe_allow_html=True)
+
+            # --- FILTERS SECTION ---
+            with st.expander("🔍 Refine Search Results", expanded=True):
+                col1, col2, col3, col4 = st.columns(4)
+                # Option lists come from the shared facet index (facets.py) and
+                # cascade: each list is narrowed by the other current picks.
+                selection = {dim: st.session_state.get(f"facet::{dim}", facets.ALL) for dim in facets.DIMENSIONS}
+                profiler.tag(section="filters")
+                try:
+                    facets.index.ensure(cursor)
+                    facet_options = facets.index.options(selection)
+                except MySQLdb.Error:
+                    facet_options = {dim: [] for dim in facets.DIMENSIONS}
+
+                picks = {}
+                for col, dim, label in zip((col1, col2, col3, col4), facets.DIMENSIONS,
+                                           ("Metropolitan Area", "Provider Reference", "Culinary Category", "Service Time")):
+                    counts = dict(facet_options[dim])
+                    values = [facets.ALL] + list(counts)
+                    if selection[dim] not in values:
+                        values.append(selection[dim])
+                    picks[dim] = col.selectbox(label, values, key=f"facet::{dim}",
+                                               format_func=lambda v, c=counts: v if v == facets.ALL else f"{v} ({c.get(v, 0)})")
+                selected_city, selected_provider, selected_food_type, selected_meal_type = (picks[dim] for dim in facets.DIMENSIONS)
+
+            # --- INDEPENDENT READS, DISPATCHED IN PARALLEL ---
+            where, params = listing_filters(selected_city, selected_provider, selected_food_type, selected_meal_type)
+            listing_pager = pager_state("dashboard_listings", where, params)
+            registry_pager = pager_state("provider_registry")
+            results = executor.run_parallel({
+                "totals": summary.totals,
+                "listings": lambda cur: fetch_pager(cur, listing_pager, "food_listings", ("Food_ID",), where=where, params=params),
+                "registry": lambda cur: fetch_pager(cur, registry_pager, "providers", ("City", "Provider_ID"),
+                                                    columns="Provider_ID, Name, Type, City, Contact"),
+            })
+
+            totals = results["totals"]
+            if isinstance(totals, Exception):
+                st.error(f"Could not load metrics: {totals}")
+            else:
+                p_count = totals['providers']['Row_Count']
+                r_count = totals['receivers']['Row_Count']
+                total_qty = totals['food_listings']['Quantity_Sum']
+
+                with cm1: st.markdown(f'<div class="metric-card"><small>PREMIUM PROVIDERS</small><h2>{p_count}</h2></div>', unsafe_allow_html=True)
+                with cm2: st.markdown(f'<div class="metric-card"><small>DIGNIFIED RECEIVERS</small><h2>{r_count}</h2></div>', unsafe_allow_html=True)
+                with cm3: st.markdown(f'<div class="metric-card"><small>AVAILABLE SERVINGS</small><h2>{total_qty if total_qty else 0}</h2></div>', unsafe_allow_html=True)
+
+            # --- FILTERED FOOD LISTINGS ---
+            if isinstance(results["listings"], Exception):
+                st.error(f"Could not load listings: {results['listings']}")
+            else:
+                render_page("dashboard_listings", listing_pager, results["listings"],
+                            empty_message="No records found for the current selection.")
+            render_export(conn, "dashboard_listings", f"SELECT * FROM food_listings WHERE {where} ORDER BY Food_ID", params,
+                          file_name="food_listings.csv")
+
+            # --- PROVIDER CONTACT DETAILS ---
+            st.markdown('<div class="section-header">📞 Concierge Contact Registry</div>', unsafe_allow_html=True)
+            if isinstance(results["registry"], Exception):
+                st.error(f"Could not load registry: {results['registry']}")
+            else:
+                render_page("provider_registry", registry_pager, results["registry"])
+
+    # -------- EXECUTIVE MASTER REGISTRY (FULL CRUD) --------
+        elif choice == "Inventory Management (CRUD)":
+            st.markdown('<div class="section-header">Executive Master Registry</div>', unsafe_allow_html=True)
         
-        # Select target registry [cite: 39, 40, 41, 42]
-        manage_target = st.radio("Select Department to Manage", ["Food Listings", "Providers", "Receivers", "Claims"], horizontal=True)
+            # Select target registry [cite: 39, 40, 41, 42]
+            manage_target = st.radio("Select Department to Manage", ["Food Listings", "Providers", "Receivers", "Claims"], horizontal=True)
         
-        # Action selection for CRUD [cite: 20, 110]
-        action = st.selectbox("Select Management Action", ["View & Search", "Add New Record", "Update Existing Record", "Archive (Delete) Record"])
+            # Action selection for CRUD [cite: 20, 110]
+            action = st.selectbox("Select Management Action", ["View & Search", "Add New Record", "Update Existing Record", "Archive (Delete) Record"])
+            profiler.tag(section=f"{manage_target} / {action}")
 
-        # Table Mapping for SQL Logic [cite: 44, 52, 59, 70]
-        table_map = {"Food Listings": "food_listings", "Providers": "providers", "Receivers": "receivers", "Claims": "claims"}
-        id_map = {"Food Listings": "Food_ID", "Providers": "Provider_ID", "Receivers": "Receiver_ID", "Claims": "Claim_ID"}
+            # Table Mapping for SQL Logic [cite: 44, 52, 59, 70]
+            table_map = {"Food Listings": "food_listings", "Providers": "providers", "Receivers": "receivers", "Claims": "claims"}
+            id_map = {"Food Listings": "Food_ID", "Providers": "Provider_ID", "Receivers": "Receiver_ID", "Claims": "Claim_ID"}
 
-        # --- FEATURE 1: VIEW & SEARCH (READ) ---
-        if action == "View & Search":
-            search_query = st.text_input(f"🔍 Search {manage_target} by Name, City, or ID")
-            
-            sql = f"SELECT * FROM {table_map[manage_target]} WHERE 1=1"
-            params = []
+            # --- FEATURE 1: VIEW & SEARCH (READ) ---
+            if action == "View & Search":
+                search_query = st.text_input(f"🔍 Search {manage_target} by Name, City, or ID")
             
-            if search_query:
-                # Dynamic search based on table columns [cite: 47, 50, 55, 62, 67]
-                if manage_target == "Food Listings":
-                    sql += " AND (Food_Name LIKE %s OR Location LIKE %s)"
-                elif manage_target == "Claims":
-                    sql += " AND Status LIKE %s"
-                else: # Providers or Receivers
-                    sql += " AND (Name LIKE %s OR City LIKE %s)"
-                params.extend([f"%{search_query}%", f"%{search_query}%"])
-
-            cursor.execute(sql, params)
-            df = pd.DataFrame(cursor.fetchall())
-            if not df.empty:
-                st.dataframe(df, use_container_width=True)
-            else:
-                st.warning("No records found.")
-
-        # --- FEATURE 2: ADD NEW RECORD (CREATE) ---
-        elif action == "Add New Record":
-            with st.form(f"add_{manage_target}_form"):
-                if manage_target == "Food Listings":
-                    f_name = st.text_input("Food Item Name")
-                    f_qty = st.number_input("Quantity", min_value=1)
-                    f_exp = st.date_input("Expiry Date")
-                    p_id = st.number_input("Provider ID Reference", min_value=1)
-                    loc = st.text_input("Location City")
-                    f_t = st.selectbox("Food Type", ["Vegetarian", "Non-Vegetarian", "Vegan"])
-                    m_t = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snacks"])
+                if search_query:
+                    # Ranked FULLTEXT / fuzzy lookup shared by all four registries (search.py)
+                    results = search.search(cursor, manage_target, search_query)
+                    if results:
+                        st.caption(f"Top {len(results)} matches, best first")
+                        st.dataframe(profiler.frame(results), use_container_width=True)
+                    else:
+                        st.warning("No records found.")
+                else:
+                    render_paged(cursor, f"registry::{manage_target}", table_map[manage_target], (id_map[manage_target],))
+                    render_export(conn, f"registry::{manage_target}",
+                                  f"SELECT * FROM {table_map[manage_target]} ORDER BY {id_map[manage_target]}",
+                                  file_name=f"{table_map[manage_target]}.csv")
+
+            # --- FEATURE 2: ADD NEW RECORD (CREATE) ---
+            elif action == "Add New Record":
+                with st.form(f"add_{manage_target}_form"):
+                    if manage_target == "Food Listings":
+                        f_name = st.text_input("Food Item Name")
+                        f_qty = st.number_input("Quantity", min_value=1)
+                        f_exp = st.date_input("Expiry Date")
+                        p_id = st.number_input("Provider ID Reference", min_value=1)
+                        loc = st.text_input("Location City")
+                        f_t = st.selectbox("Food Type", ["Vegetarian", "Non-Vegetarian", "Vegan"])
+                        m_t = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snacks"])
                     
-                    if st.form_submit_button("Commit to Registry"):
-                        cursor.execute("INSERT INTO food_listings (Food_Name, Quantity, Expiry_Date, Provider_ID, Location, Food_Type, Meal_Type) VALUES (%s, %s, %s, %s, %s, %s, %s)", 
-                                       (f_name, f_qty, f_exp, p_id, loc, f_t, m_t))
-                        st.success("Food Listing Created Successfully")
-
-                elif manage_target == "Providers":
-                    p_name = st.text_input("Provider Name")
-                    p_type = st.selectbox("Type", ["Restaurant", "Grocery Store", "Supermarket"])
-                    p_city = st.text_input("City")
-                    p_contact = st.text_input("Contact Number")
-                    if st.form_submit_button("Register Provider"):
-                        cursor.execute("INSERT INTO providers (Name, Type, City, Contact) VALUES (%s, %s, %s, %s)", (p_name, p_type, p_city, p_contact))
-                        st.success("Provider Registered")
-
-                elif manage_target == "Receivers":
-                    r_name = st.text_input("Receiver/NGO Name")
-                    r_type = st.selectbox("Category", ["NGO", "Community Center", "Individual"])
-                    r_city = st.text_input("City")
-                    r_contact = st.text_input("Contact")
-                    if st.form_submit_button("Register Beneficiary"):
-                        cursor.execute("INSERT INTO receivers (Name, Type, City, Contact) VALUES (%s, %s, %s, %s)", (r_name, r_type, r_city, r_contact))
-                        st.success("Receiver Registered")
-
-                elif manage_target == "Claims":
-                    f_id = st.number_input("Food ID", min_value=1)
-                    r_id = st.number_input("Receiver ID", min_value=1)
-                    status = st.selectbox("Initial Status", ["Pending", "Completed"])
-                    if st.form_submit_button("Log Claim"):
-                        cursor.execute("INSERT INTO claims (Food_ID, Receiver_ID, Status) VALUES (%s, %s, %s)", (f_id, r_id, status))
-                        st.success("Claim Logged")
-
-# --- FEATURE 3: DYNAMIC MASTER UPDATE ENGINE ---
-        elif action == "Update Existing Record":
-            st.markdown(f"### 📝 Modify {manage_target} Entry")
+                        if st.form_submit_button("Commit to Registry"):
+                            new_id = commit_write(conn, "food_listings", "INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Location, Food_Type, Meal_Type) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                                                  (f_name, f_qty, f_exp, p_id, loc, f_t, m_t), allocate="Food_ID",
+                                                  new=dict(Quantity=f_qty, Provider_ID=p_id, Location=loc, Food_Type=f_t, Meal_Type=m_t))
+                            st.success(f"Food Listing Created Successfully (Food_ID {new_id})")
+
+                    elif manage_target == "Providers":
+                        p_name = st.text_input("Provider Name")
+                        p_type = st.selectbox("Type", ["Restaurant", "Grocery Store", "Supermarket"])
+                        p_city = st.text_input("City")
+                        p_contact = st.text_input("Contact Number")
+                        if st.form_submit_button("Register Provider"):
+                            new_id = commit_write(conn, "providers", "INSERT INTO providers (Provider_ID, Name, Type, City, Contact) VALUES (%s, %s, %s, %s, %s)",
+                                                  (p_name, p_type, p_city, p_contact), allocate="Provider_ID",
+                                                  new=dict(Type=p_type, City=p_city))
+                            st.success(f"Provider Registered (Provider_ID {new_id})")
+
+                    elif manage_target == "Receivers":
+                        r_name = st.text_input("Receiver/NGO Name")
+                        r_type = st.selectbox("Category", ["NGO", "Community Center", "Individual"])
+                        r_city = st.text_input("City")
+                        r_contact = st.text_input("Contact")
+                        if st.form_submit_button("Register Beneficiary"):
+                            new_id = commit_write(conn, "receivers", "INSERT INTO receivers (Receiver_ID, Name, Type, City, Contact) VALUES (%s, %s, %s, %s, %s)",
+                                                  (r_name, r_type, r_city, r_contact), allocate="Receiver_ID",
+                                                  new=dict(Type=r_type, City=r_city))
+                            st.success(f"Receiver Registered (Receiver_ID {new_id})")
+
+                    elif manage_target == "Claims":
+                        f_id = st.number_input("Food ID", min_value=1)
+                        r_id = st.number_input("Receiver ID", min_value=1)
+                        status = st.selectbox("Initial Status", ["Pending", "Completed"])
+                        if st.form_submit_button("Log Claim"):
+                            new_id = commit_write(conn, "claims", "INSERT INTO claims (Claim_ID, Food_ID, Receiver_ID, Status) VALUES (%s, %s, %s, %s)",
+                                                  (f_id, r_id, status), allocate="Claim_ID",
+                                                  new=dict(Status=status))
+                            st.success(f"Claim Logged (Claim_ID {new_id})")
+
+                if manage_target == "Claims":
+                    st.caption("Or let the matching engine allocate every unclaimed, unexpired listing to receivers in the same city, soonest expiry first.")
+                    if st.button("⚡ Auto-Allocate Available Listings"):
+                        try:
+                            with st.spinner("Matching listings to receivers..."):
+                                report = matching.run(conn)
+                            st.success(f"Allocated {report['written']} of {report['listings']} available listings "
+                                       f"across {report['receivers']} receivers in {report['match_seconds']}s.")
+                        except db.LockTimeout:
+                            st.warning("Another allocation run is still in progress; try again once it has finished.")
+
+    # --- FEATURE 3: DYNAMIC MASTER UPDATE ENGINE ---
+            elif action == "Update Existing Record":
+                st.markdown(f"### 📝 Modify {manage_target} Entry")
             
-            # Identify the record
-            target_id = st.number_input(f"Enter {id_map[manage_target]} to Modify", min_value=1)
+                # Identify the record
+                target_id = st.number_input(f"Enter {id_map[manage_target]} to Modify", min_value=1)
             
-            if target_id:
-                # Fetch current data to ensure accuracy and dignify the process
-                cursor.execute(f"SELECT * FROM {table_map[manage_target]} WHERE {id_map[manage_target]}=%s", (target_id,))
-                current_record = cursor.fetchone()
+                if target_id:
+                    # Fetch current data to ensure accuracy and dignify the process
+                    cursor.execute(f"SELECT * FROM {table_map[manage_target]} WHERE {id_map[manage_target]}=%s", (target_id,))
+                    current_record = cursor.fetchone()
                 
-                if current_record:
-                    st.info(f"Targeting Record: **{target_id}**")
+                    if current_record:
+                        st.info(f"Targeting Record: **{target_id}**")
                     
-                    # --- DYNAMIC FIELD SELECTOR BASED ON TARGET ---
-                    if manage_target == "Food Listings":
-                        fields = ["Food_Name", "Quantity", "Expiry_Date", "Location", "Food_Type", "Meal_Type"]
-                    elif manage_target == "Providers":
-                        fields = ["Name", "Type", "Address", "City", "Contact"]
-                    elif manage_target == "Receivers":
-                        fields = ["Name", "Type", "City", "Contact"]
-                    elif manage_target == "Claims":
-                        fields = ["Status"]
+                        # --- DYNAMIC FIELD SELECTOR BASED ON TARGET ---
+                        if manage_target == "Food Listings":
+                            fields = ["Food_Name", "Quantity", "Expiry_Date", "Location", "Food_Type", "Meal_Type"]
+                        elif manage_target == "Providers":
+                            fields = ["Name", "Type", "Address", "City", "Contact"]
+                        elif manage_target == "Receivers":
+                            fields = ["Name", "Type", "City", "Contact"]
+                        elif manage_target == "Claims":
+                            fields = ["Status"]
                     
-                    field_to_modify = st.selectbox("Select Attribute to Revise", fields)
+                        field_to_modify = st.selectbox("Select Attribute to Revise", fields)
                     
-                    # --- DYNAMIC INPUT GENERATION ---
-                    # Handles specialized inputs like dates or dropdowns to ensure data consistency [cite: 17]
-                    if field_to_modify in ["Food_Type", "Type"]:
-                        options = ["Vegetarian", "Non-Vegetarian", "Vegan"] if manage_target == "Food Listings" else ["Restaurant", "Grocery Store", "Supermarket"]
-                        new_val = st.selectbox(f"New {field_to_modify}", options)
-                    elif field_to_modify == "Meal_Type":
-                        new_val = st.selectbox("New Meal Category", ["Breakfast", "Lunch", "Dinner", "Snacks"])
-                    elif field_to_modify == "Status":
-                        new_val = st.selectbox("Update Fulfillment Status", ["Pending", "Completed", "Cancelled"])
-                    elif field_to_modify == "Expiry_Date":
-                        new_val = st.date_input("Select New Expiry Date")
-                    elif field_to_modify == "Quantity":
-                        new_val = st.number_input("Revised Quantity", min_value=1)
+                        # --- DYNAMIC INPUT GENERATION ---
+                        # Handles specialized inputs like dates or dropdowns to ensure data consistency [cite: 17]
+                        if field_to_modify in ["Food_Type", "Type"]:
+                            options = ["Vegetarian", "Non-Vegetarian", "Vegan"] if manage_target == "Food Listings" else ["Restaurant", "Grocery Store", "Supermarket"]
+                            new_val = st.selectbox(f"New {field_to_modify}", options)
+                        elif field_to_modify == "Meal_Type":
+                            new_val = st.selectbox("New Meal Category", ["Breakfast", "Lunch", "Dinner", "Snacks"])
+                        elif field_to_modify == "Status":
+                            new_val = st.selectbox("Update Fulfillment Status", ["Pending", "Completed", "Cancelled"])
+                        elif field_to_modify == "Expiry_Date":
+                            new_val = st.date_input("Select New Expiry Date")
+                        elif field_to_modify == "Quantity":
+                            new_val = st.number_input("Revised Quantity", min_value=1)
+                        else:
+                            new_val = st.text_input(f"Enter New {field_to_modify}", value=str(current_record[field_to_modify]))
+
+                        # --- EXECUTION ---
+                        if st.button(f"AUTHORIZE {field_to_modify.upper()} CHANGE"):
+                            try:
+                                # Dynamic SQL to minimize manual code workload
+                                sql = f"UPDATE {table_map[manage_target]} SET {field_to_modify}=%s WHERE {id_map[manage_target]}=%s"
+                                commit_write(conn, table_map[manage_target], sql, (new_val, target_id),
+                                             key=(id_map[manage_target], target_id), changes={field_to_modify: new_val})
+                                st.success(f"✅ Registry updated: {field_to_modify} is now '{new_val}'.")
+                            except Exception as e:
+                                st.error(f"Modification halted: {e}")
                     else:
-                        new_val = st.text_input(f"Enter New {field_to_modify}", value=str(current_record[field_to_modify]))
-
-                    # --- EXECUTION ---
-                    if st.button(f"AUTHORIZE {field_to_modify.upper()} CHANGE"):
-                        try:
-                            # Dynamic SQL to minimize manual code workload
-                            sql = f"UPDATE {table_map[manage_target]} SET {field_to_modify}=%s WHERE {id_map[manage_target]}=%s"
-                            cursor.execute(sql, (new_val, target_id))
-                            conn.commit()
-                            st.success(f"✅ Registry updated: {field_to_modify} is now '{new_val}'.")
-                        except Exception as e:
-                            st.error(f"Modification halted: {e}")
+                        st.warning(f"Identification failed: No record found with {id_map[manage_target]} {target_id}.")
+
+            # --- FEATURE 4: ARCHIVE RECORD (DELETE) ---
+            elif action == "Archive (Delete) Record":
+                delete_id = st.number_input(f"Enter {id_map[manage_target]} to Permanently Archive", min_value=1)
+                st.warning("Warning: Archival is permanent and cannot be undone.")
+                if st.button("Confirm Archival"):
+                    commit_write(conn, table_map[manage_target], f"DELETE FROM {table_map[manage_target]} WHERE {id_map[manage_target]}=%s", (delete_id,),
+                                 key=(id_map[manage_target], delete_id))
+                    st.error("Record has been purged from the system.")
+
+        # -------- CONCIERGE SQL INSIGHTS (The 15 Queries) --------
+        elif choice == "Concierge SQL Insights":
+            st.markdown('<div class="section-header">Operational Analytics & Trend Intelligence</div>', unsafe_allow_html=True)
+
+            # Streamlit always executes an expander's body, even collapsed, so
+            # each insight sits behind a toggle and only runs once opened. The
+            # opened ones are then fetched in parallel and drawn in place.
+            # "Columnar Snapshot" answers from the Parquet snapshot in memory
+            # (snapshot.py / analytics.py) and keeps the OLTP tables out of it.
+            source = st.radio("Data Source", ["Live MySQL", "Columnar Snapshot"], horizontal=True, key="insight::source")
+            if source == "Columnar Snapshot":
+                snapshot.refresh_async()
+                snapshot_age = snapshot.age()
+                if snapshot.last_error is not None:
+                    st.error(f"Snapshot refresh failed: {snapshot.last_error}")
+                if snapshot_age is None:
+                    st.info("Building the first columnar snapshot in the background; reopen an insight in a moment.")
                 else:
-                    st.warning(f"Identification failed: No record found with {id_map[manage_target]} {target_id}.")
-
-        # --- FEATURE 4: ARCHIVE RECORD (DELETE) ---
-        elif action == "Archive (Delete) Record":
-            delete_id = st.number_input(f"Enter {id_map[manage_target]} to Permanently Archive", min_value=1)
-            st.warning("Warning: Archival is permanent and cannot be undone.")
-            if st.button("Confirm Archival"):
-                cursor.execute(f"DELETE FROM {table_map[manage_target]} WHERE {id_map[manage_target]}=%s", (delete_id,))
-                st.error("Record has been purged from the system.")
-
-    # -------- CONCIERGE SQL INSIGHTS (The 15 Queries) --------
-    elif choice == "Concierge SQL Insights":
-        st.markdown('<div class="section-header">Operational Analytics & Trend Intelligence</div>', unsafe_allow_html=True)
-        
-        sql_queries = {
-            "1️⃣ Provider Density per City": "SELECT City, COUNT(*) AS Total FROM providers GROUP BY City;",
-            "2️⃣ Receiver Density per City": "SELECT City, COUNT(*) AS Total FROM receivers GROUP BY City;",
-            "3️⃣ Dominant Provider Classifications": "SELECT Type, COUNT(*) AS Total FROM providers GROUP BY Type ORDER BY Total DESC;",
-            "4️⃣ Delhi Provider Registry": "SELECT Name, Contact, City FROM providers WHERE City = 'Delhi';",
-            "5️⃣ Top Beneficiary Organizations": "SELECT r.Name, COUNT(c.Claim_ID) AS Claims FROM receivers r JOIN claims c ON r.Receiver_ID = c.Receiver_ID GROUP BY r.Name ORDER BY Claims DESC;",
-            "6️⃣ Global Inventory Volume": "SELECT SUM(Quantity) AS Total_Servings FROM food_listings;",
-            "7️⃣ Regional Supply Leaders": "SELECT Location, COUNT(*) AS Count FROM food_listings GROUP BY Location ORDER BY Count DESC;",
-            "8️⃣ Culinary Preference Trends": "SELECT Food_Type, COUNT(*) AS Count FROM food_listings GROUP BY Food_Type ORDER BY Count DESC;",
-            "9️⃣ Engagement per Listing": "SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claims FROM food_listings f LEFT JOIN claims c ON f.Food_ID = c.Food_ID GROUP BY f.Food_Name;",
-            "🔟 Provider Success Metrics": "SELECT p.Name, COUNT(c.Claim_ID) AS Success FROM providers p JOIN food_listings f ON p.Provider_ID = f.Provider_ID JOIN claims c ON f.Food_ID = c.Food_ID WHERE c.Status = 'Completed' GROUP BY p.Name ORDER BY Success DESC;",
-            "1️⃣1️⃣ Distribution Fulfillment Ratio": "SELECT Status, ROUND(COUNT(*) * 100 / (SELECT COUNT(*) FROM claims), 2) AS Percent FROM claims GROUP BY Status;",
-            "1️⃣2️⃣ Average Allocation per Receiver": "SELECT r.Name, ROUND(AVG(f.Quantity), 2) AS Avg FROM receivers r JOIN claims c ON r.Receiver_ID = c.Receiver_ID JOIN food_listings f ON c.Food_ID = f.Food_ID GROUP BY r.Name;",
-            "1️⃣3️⃣ Peak Demand Service Hours": "SELECT f.Meal_Type, COUNT(c.Claim_ID) AS Claims FROM food_listings f JOIN claims c ON f.Food_ID = c.Food_ID GROUP BY f.Meal_Type ORDER BY Claims DESC;",
-            "1️⃣4️⃣ Provider Contribution Leaderboard": "SELECT p.Name, SUM(f.Quantity) AS Donated FROM providers p JOIN food_listings f ON p.Provider_ID = f.Provider_ID GROUP BY p.Name ORDER BY Donated DESC;",
-            "1️⃣5️⃣ Perishability Audit (Expired)": "SELECT COUNT(*) AS Expired FROM food_listings WHERE Expiry_Date < CURDATE();"
-        }
+                    st.caption(f"Snapshot taken {snapshot_age / 60:.0f} min ago · refreshed every {snapshot.MAX_AGE / 60:.0f} min")
 
-        for title, q in sql_queries.items():
-            with st.expander(title):
-                cursor.execute(q)
-                res = pd.DataFrame(cursor.fetchall())
-                if not res.empty:
-                    st.dataframe(res, use_container_width=True)
-                    if len(res.columns) == 2: st.bar_chart(res.set_index(res.columns[0]), color="#C5A059")
-
-    # -------- DIRECT SQL ACCESS --------
-    elif choice == "Direct SQL Access":
-        st.markdown('<div class="section-header">Executive Query Terminal</div>', unsafe_allow_html=True)
-        raw_q = st.text_area("Enter SQL Command for Direct Database Interfacing...")
-        if st.button("Authorize Execution"):
-            try:
-                cursor.execute(raw_q)
-                st.dataframe(pd.DataFrame(cursor.fetchall()), use_container_width=True)
-            except Exception as e:
-                st.error(f"Command Error: {e}")
-
-    # -------- THE PORTFOLIO --------
-    elif choice == "The Portfolio":
-        st.markdown('<div class="section-header">Developer Pedigree & Vision</div>', unsafe_allow_html=True)
-        st.info(f"Principal Architect: Nirmal Kumar Bhagatkar [cite: 113]\n\nFoundation: Python 3.10 | Streamlit Core | MySQL Relational Engine")
-        st.write("> **Global Mission:** To solve fundamental world problems by orchestrating AI/ML systems that minimize human workload and restore dignity to all living creatures.")
-        st.success("Milestone Goal: To become the first trillionaire person through a founder-led AI/ML revolution.")
-
-    cursor.close()
-    conn.close()
\ No newline at end of file
+            opened = {}
+            for title, q in sql_queries.items():
+                if st.toggle(title, key=f"insight::{title}"):
+                    opened[title] = st.container(border=True)
+
+            if source == "Columnar Snapshot":
+                results = analytics.run_many(opened)
+            else:
+                results = executor.run_parallel({
+                    title: (lambda cur, q=SUMMARY_QUERIES.get(title, sql_queries[title]), ttl=INSIGHT_TTLS.get(title):
+                            query_cache.fetch(cur, q, ttl=ttl))
+                    for title in opened
+                })
+            for title, box in opened.items():
+                with box:
+                    if isinstance(results[title], Exception):
+                        st.error(f"Query failed: {results[title]}")
+                        continue
+                    if isinstance(results[title], pd.DataFrame):
+                        res = results[title]
+                    else:
+                        with profiler.section(title):
+                            res = profiler.frame(results[title])
+                    if not res.empty:
+                        st.dataframe(res, use_container_width=True)
+                        if len(res.columns) == 2: st.bar_chart(res.set_index(res.columns[0]), color="#C5A059")
+
+        # -------- DIRECT SQL ACCESS --------
+        elif choice == "Direct SQL Access":
+            st.markdown('<div class="section-header">Executive Query Terminal</div>', unsafe_allow_html=True)
+            raw_q = st.text_area("Enter SQL Command for Direct Database Interfacing...")
+            st.caption(f"Read-only sandbox · first {terminal.ROW_CAP:,} rows · {terminal.TIMEOUT:g}s time limit · "
+                       f"cost budget {terminal.COST_BUDGET:,.0f}")
+            profiler.tag(section="terminal")
+            run_col, dry_col = st.columns(2)
+            if dry_col.button("Dry Run (EXPLAIN Cost)"):
+                try:
+                    cost = terminal.estimate(raw_q)
+                    if cost is None:
+                        st.info("This statement is not costed; it runs under the time limit only.")
+                    elif cost > terminal.COST_BUDGET:
+                        st.warning(f"Estimated cost {cost:,.0f} is over the budget of {terminal.COST_BUDGET:,.0f}; it would be refused.")
+                    else:
+                        st.success(f"Estimated cost {cost:,.0f} is within the budget of {terminal.COST_BUDGET:,.0f}.")
+                except (terminal.QueryRefused, MySQLdb.Error) as e:
+                    st.error(f"Command Refused: {e}")
+            if run_col.button("Authorize Execution"):
+                previous = st.session_state.pop("terminal_job", None)
+                if previous is not None and not previous.done:
+                    previous.cancel()
+                try:
+                    if terminal.ALLOW_WRITES and not query_cache.is_read_only(raw_q):
+                        # Writes are opt-in (terminal_allow_writes) and run on the app connection.
+                        cursor.execute(raw_q)
+                        query_cache.invalidate_sql(raw_q)
+                        facets.index.invalidate()
+                        # Ad-hoc writes bypass the incremental deltas, so reseed the counters.
+                        if query_cache.referenced_tables(raw_q) & set(summary.DIMENSIONS):
+                            summary.rebuild(conn)
+                        st.success(f"{cursor.rowcount} row(s) affected.")
+                    else:
+                        st.session_state["terminal_job"] = terminal.submit(raw_q)
+                except terminal.QueryRefused as e:
+                    st.error(f"Command Refused: {e}")
+                except Exception as e:
+                    st.error(f"Command Error: {e}")
+            if "terminal_job" in st.session_state:
+                render_terminal_job(st.session_state["terminal_job"])
+
+        # -------- PERFORMANCE CONSOLE --------
+        elif choice == "Performance Console":
+            st.markdown('<div class="section-header">Query Performance Console</div>', unsafe_allow_html=True)
+            st.caption(f"Cursor executes and DataFrame builds since {pd.Timestamp(profiler.profiler.started_at, unit='s'):%Y-%m-%d %H:%M:%S} UTC · "
+                       f"slow-query threshold {profiler.SLOW_QUERY_SECONDS * 1000:g} ms")
+
+            stats = pd.DataFrame(profiler.profiler.summary())
+            if stats.empty:
+                st.info("No queries recorded yet. Browse the other departments to collect samples.")
+            else:
+                pages = ["All"] + sorted(stats["page"].unique())
+                page_filter = st.selectbox("Page", pages)
+                if page_filter != "All":
+                    stats = stats[stats["page"] == page_filter]
+                st.dataframe(stats, use_container_width=True, hide_index=True)
+
+                st.markdown("#### Latency Histogram")
+                labels = [f"{r.page} · {r.section} · {r.statement}" for r in stats.itertuples()]
+                picked = st.selectbox("Series", range(len(labels)), format_func=labels.__getitem__)
+                row = stats.iloc[picked]
+                # Numbered so the chart keeps the buckets in latency order.
+                hist = pd.DataFrame([(f"{i:02d} {label}", calls) for i, (label, calls) in
+                                     enumerate(profiler.profiler.histogram(row["kind"], row["page"], row["section"], row["statement"]))],
+                                    columns=["bucket", "calls"])
+                st.bar_chart(hist.set_index("bucket"), color="#C5A059")
+
+            st.markdown("#### Slow-Query Log")
+            slow = profiler.profiler.slow_queries()
+            if slow:
+                st.dataframe(pd.DataFrame(slow), use_container_width=True, hide_index=True)
+            else:
+                st.success("No query has crossed the slow-query threshold.")
+
+            exp1, exp2 = st.columns(2)
+            exp1.download_button("⬇️ Prometheus Metrics", profiler.profiler.render_prometheus(),
+                                 file_name="metrics.prom", mime="text/plain")
+            if exp2.button("Reset Counters"):
+                profiler.profiler.reset()
+                st.rerun()
+
+        # -------- THE PORTFOLIO --------
+        elif choice == "The Portfolio":
+            st.markdown('<div class="section-header">Developer Pedigree & Vision</div>', unsafe_allow_html=True)
+            st.info(f"Principal Architect: Nirmal Kumar Bhagatkar [cite: 113]\n\nFoundation: Python 3.10 | Streamlit Core | MySQL Relational Engine")
+            st.write("> **Global Mission:** To solve fundamental world problems by orchestrating AI/ML systems that minimize human workload and restore dignity to all living creatures.")
+            st.success("Milestone Goal: To become the first trillionaire person through a founder-led AI/ML revolution.")
+
+        cursor.close()
+    except MySQLdb.OperationalError:
+        stale = True
+        raise
+    except BaseException:
+        # Errors and script stops/reruns can escape mid-transaction; roll back
+        # so the next session does not inherit it.
+        stale = not db.rollback_quietly(conn)
+        raise
+    finally:
+        release_connection(conn, discard=stale)
+
+profiler.maybe_export()
@@ -0,0 +1,513 @@
+"""
+Microbenchmarks for the dashboard, insight and CRUD query paths.
+
+Every case runs a few warm-up iterations and then ``--iterations`` timed
+ones; the latency percentiles are written as JSON together with the commit,
+backend and dataset they were measured on, so two result files can be
+compared across commits.
+
+Two backends are supported:
+
+* ``mysql``  -- the configured database (.env), whatever data it holds;
+* ``sqlite`` -- a stand-in file built from schema.TABLES / schema.INDEXES and
+  filled by synthetic.generate_dataset(), for machines without MySQL. The
+  MySQL-only paths (summary counters, count estimates, FULLTEXT search,
+  snapshots) are skipped there.
+
+CRUD writes run inside a transaction that is always rolled back.
+
+Usage:
+    python bench.py run [--backend mysql|sqlite] [--rows 100000] [--iterations 20]
+                        [--only insight] [--snapshot] [--out bench-results/run.json]
+    python bench.py compare old.json new.json [--threshold 0.10] [--min-ms 1.0]   # exit 1 on regressions
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import paging
+import schema
+import synthetic
+from facets import FacetIndex
+from queries import sql_queries, SUMMARY_QUERIES, listing_filters
+
+RESULTS_DIR = "bench-results"
+SEARCH_TERMS = ["rice", "ric", "rcie", "delhi", "smith", "42"]
+
+
+# -----------------------------
+# RESULT FILES
+# -----------------------------
+def git_revision():
+    """(commit sha, dirty flag) of the working tree, or (None, None) outside git."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=here, capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                cwd=here, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return sha.stdout.strip(), bool(status.stdout.strip())
+
+
+def metadata(suite, **extra):
+    commit, dirty = git_revision()
+    meta = {
+        "suite": suite,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def summarise(name, group, samples_ms, **extra):
+    """Latency summary of one case; ``samples_ms`` are per-iteration milliseconds."""
+    result = {"name": name, "group": group, "count": len(samples_ms)}
+    if samples_ms:
+        ordered = sorted(samples_ms)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        result.update(
+            min_ms=round(ordered[0], 3),
+            p50_ms=round(statistics.median(ordered), 3),
+            p95_ms=round(pick(0.95), 3),
+            p99_ms=round(pick(0.99), 3),
+            max_ms=round(ordered[-1], 3),
+            mean_ms=round(statistics.fmean(ordered), 3),
+        )
+    result.update(extra)
+    return result
+
+
+def write_report(report, out=None):
+    if out is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = (report["meta"].get("commit") or "nogit")[:10]
+        out = os.path.join(RESULTS_DIR, f"{report['meta']['suite']}-{stamp}-{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return out
+
+
+def compare(old, new, threshold=0.10, metric="p50_ms", min_ms=1.0):
+    """
+    Pair up the cases of two reports by name. Returns rows of
+    (name, old ms, new ms, relative change, verdict) where the verdict is
+    "regressed" / "improved" when the change is beyond ``threshold`` and at
+    least ``min_ms`` (timer noise on sub-millisecond cases is not a
+    regression), "ok" otherwise, or "added" / "removed".
+    """
+    before = {case["name"]: case for case in old["results"]}
+    after = {case["name"]: case for case in new["results"]}
+    rows = []
+    for name in list(before) + [n for n in after if n not in before]:
+        a, b = before.get(name, {}).get(metric), after.get(name, {}).get(metric)
+        if a is None or b is None:
+            rows.append((name, a, b, None, "removed" if b is None else "added"))
+            continue
+        change = (b - a) / a if a else 0.0
+        verdict = "ok"
+        if abs(b - a) >= min_ms:
+            verdict = "regressed" if change > threshold else "improved" if change < -threshold else "ok"
+        rows.append((name, a, b, change, verdict))
+    return rows
+
+
+# -----------------------------
+# BACKENDS
+# -----------------------------
+class _SQLiteCursor:
+    """Just enough of MySQLdb's DictCursor for the query helpers to run on sqlite3."""
+
+    _DIALECT = [(re.compile(r"%s"), "?"), (re.compile(r"\bCURDATE\(\)", re.I), "date('now')"),
+                (re.compile(r"\s+FOR UPDATE\b", re.I), "")]
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    @classmethod
+    def translate(cls, sql):
+        for pattern, replacement in cls._DIALECT:
+            sql = pattern.sub(replacement, sql)
+        return sql
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self.translate(sql), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(self.translate(sql), rows)
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _dict(self, row):
+        return dict(zip((col[0] for col in self._cursor.description), row))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._dict(row)
+
+    def fetchall(self):
+        return [self._dict(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self):
+        import db
+        import summary
+        self.conn = db.connect()
+        summary.ensure(self.conn)
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def begin(self, cursor):
+        cursor.execute("START TRANSACTION")
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def version(self):
+        cursor = self.cursor()
+        try:
+            cursor.execute("SELECT VERSION() AS v")
+            return f"MySQL {cursor.fetchone()['v']}"
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.conn.close()
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path):
+        # Autocommit mode: transactions are opened explicitly by begin().
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+
+    def cursor(self):
+        return _SQLiteCursor(self.conn)
+
+    def begin(self, cursor):
+        cursor.execute("BEGIN")
+
+    def rollback(self):
+        self.conn.execute("ROLLBACK")
+
+    def version(self):
+        return f"SQLite {sqlite3.sqlite_version}"
+
+    def close(self):
+        self.conn.close()
+
+
+def _sqlite_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def build_sqlite(path, counts, seed=7, n_cities=None, data_dir="data", batch_size=50000):
+    """Create a SQLite stand-in with the app's tables and indexes and fill it with synthetic rows."""
+    rng = random.Random(seed)
+    profile = synthetic.load_profile(data_dir)
+    cities = synthetic.city_pool(
+        profile, n_cities or max(len(profile["cities"]), counts["food_listings"] // 100), rng)
+    conn = sqlite3.connect(path)
+    try:
+        for ddl in schema.TABLES.values():
+            conn.execute(ddl)
+        for table, rows in synthetic.generate_dataset(counts, profile, rng, cities, batch_size):
+            placeholders = ", ".join("?" * len(rows[0]))
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                             ([_sqlite_value(v) for v in row] for row in rows))
+        for table, name, columns, _ in schema.INDEXES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return len(cities)
+
+
+# -----------------------------
+# CASES
+# -----------------------------
+class Context:
+    """Dataset facts the cases draw their parameters from."""
+
+    def __init__(self, cursor, seed):
+        self.rng = random.Random(seed)
+        self.max_id = {}
+        for table, key in (("providers", "Provider_ID"), ("receivers", "Receiver_ID"),
+                           ("food_listings", "Food_ID"), ("claims", "Claim_ID")):
+            cursor.execute(f"SELECT COALESCE(MAX({key}), 0) AS n FROM {table}")
+            self.max_id[table] = cursor.fetchone()["n"]
+        cursor.execute("SELECT Location, COUNT(*) AS n FROM food_listings GROUP BY Location ORDER BY n DESC LIMIT 1")
+        row = cursor.fetchone()
+        self.busiest_city = row["Location"] if row else ""
+        cursor.execute("SELECT Food_Type FROM food_listings GROUP BY Food_Type ORDER BY COUNT(*) DESC LIMIT 1")
+        row = cursor.fetchone()
+        self.food_type = row["Food_Type"] if row else ""
+
+    def some_id(self, table):
+        return self.rng.randint(1, max(1, self.max_id[table]))
+
+
+def _page(cursor, table, order_by, columns="*", where="1=1", params=(), after=None):
+    rows, _ = paging.keyset_page(cursor, table, columns, order_by, where, params, after)
+    return len(rows)
+
+
+def _facets(cursor, ctx):
+    index = FacetIndex()
+    index.load(cursor)
+    return len(index.options({"Food_Type": ctx.food_type})["Location"])
+
+
+def _fetch(cursor, sql, params=()):
+    cursor.execute(sql, params)
+    return len(cursor.fetchall())
+
+
+def _totals(cursor, ctx):
+    import summary
+    return len(summary.totals(cursor))
+
+
+def _count(cursor, ctx):
+    where, params = listing_filters(food_type=ctx.food_type)
+    return paging.estimate_count(cursor, "food_listings", where, params)[0]
+
+
+def _search(cursor, ctx):
+    import search
+    return len(search.search(cursor, ctx.rng.choice(list(search.REGISTRIES)), ctx.rng.choice(SEARCH_TERMS)))
+
+
+def _rolled_back(write):
+    def case(backend, cursor, ctx):
+        backend.begin(cursor)
+        try:
+            return write(backend, cursor, ctx)
+        finally:
+            backend.rollback()
+    return case
+
+
+def _record_change(backend, cursor, table, old=None, new=None):
+    if backend.name == "mysql":
+        import summary
+        summary.record_change(cursor, table, old=old, new=new)
+
+
+@_rolled_back
+def _insert_listing(backend, cursor, ctx):
+    row = {"Food_ID": ctx.max_id["food_listings"] + 1, "Food_Name": "Rice", "Quantity": 10,
+           "Expiry_Date": datetime.date.today().isoformat(), "Provider_ID": ctx.some_id("providers"),
+           "Location": ctx.busiest_city, "Food_Type": ctx.food_type, "Meal_Type": "Dinner"}
+    cursor.execute(f"INSERT INTO food_listings ({', '.join(row)}) VALUES ({', '.join(['%s'] * len(row))})",
+                   list(row.values()))
+    _record_change(backend, cursor, "food_listings", new=row)
+    return cursor.rowcount
+
+
+@_rolled_back
+def _update_claim(backend, cursor, ctx):
+    claim_id = ctx.some_id("claims")
+    cursor.execute("SELECT * FROM claims WHERE Claim_ID=%s FOR UPDATE", (claim_id,))
+    old = cursor.fetchone()
+    cursor.execute("UPDATE claims SET Status=%s WHERE Claim_ID=%s", ("Completed", claim_id))
+    if old is not None:
+        _record_change(backend, cursor, "claims", old=old, new={**old, "Status": "Completed"})
+    return cursor.rowcount
+
+
+@_rolled_back
+def _delete_claim(backend, cursor, ctx):
+    claim_id = ctx.some_id("claims")
+    cursor.execute("SELECT * FROM claims WHERE Claim_ID=%s FOR UPDATE", (claim_id,))
+    old = cursor.fetchone()
+    cursor.execute("DELETE FROM claims WHERE Claim_ID=%s", (claim_id,))
+    if old is not None:
+        _record_change(backend, cursor, "claims", old=old)
+    return cursor.rowcount
+
+
+def _reads(fn):
+    return lambda backend, cursor, ctx: fn(cursor, ctx)
+
+
+def cases():
+    """(name, group, MySQL only, fn(backend, cursor, ctx) -> row count) for every case."""
+    registry = "Provider_ID, Name, Type, City, Contact"
+    found = [
+        ("dashboard.totals", "dashboard", True, _reads(_totals)),
+        ("dashboard.facets", "dashboard", False, _reads(_facets)),
+        ("dashboard.listings_first_page", "dashboard", False,
+         _reads(lambda cur, ctx: _page(cur, "food_listings", ("Food_ID",)))),
+        ("dashboard.listings_filtered_page", "dashboard", False,
+         _reads(lambda cur, ctx: _page(cur, "food_listings", ("Food_ID",), "*",
+                                       *listing_filters(city=ctx.busiest_city, food_type=ctx.food_type)))),
+        ("dashboard.listings_deep_page", "dashboard", False,
+         _reads(lambda cur, ctx: _page(cur, "food_listings", ("Food_ID",), after=(ctx.some_id("food_listings"),)))),
+        ("dashboard.registry_page", "dashboard", False,
+         _reads(lambda cur, ctx: _page(cur, "providers", ("City", "Provider_ID"), registry))),
+        ("dashboard.count_estimate", "dashboard", True, _reads(_count)),
+    ]
+    for i, (title, sql) in enumerate(sql_queries.items(), start=1):
+        found.append((f"insight.{i:02d}", "insight", False, _reads(lambda cur, ctx, sql=sql: _fetch(cur, sql))))
+        if title in SUMMARY_QUERIES:
+            found.append((f"insight.{i:02d}.summary", "insight", True,
+                          _reads(lambda cur, ctx, sql=SUMMARY_QUERIES[title]: _fetch(cur, sql))))
+    found += [
+        ("crud.lookup", "crud", False,
+         _reads(lambda cur, ctx: _fetch(cur, "SELECT * FROM providers WHERE Provider_ID=%s", (ctx.some_id("providers"),)))),
+        ("crud.search", "crud", True, _reads(_search)),
+        ("crud.insert_listing", "crud", False, _insert_listing),
+        ("crud.update_claim", "crud", False, _update_claim),
+        ("crud.delete_claim", "crud", False, _delete_claim),
+    ]
+    return found
+
+
+def snapshot_cases(conn, root):
+    """The insights answered by analytics.SnapshotEngine from a fresh export of ``conn``."""
+    import analytics
+    import snapshot
+    snapshot.export(conn, root)
+    engine = analytics.SnapshotEngine(root)
+    return [(f"insight.{i:02d}.snapshot", "insight", True,
+             lambda backend, cursor, ctx, title=title: engine.run(title).num_rows)
+            for i, title in enumerate(sql_queries, start=1)]
+
+
+# -----------------------------
+# RUNNER
+# -----------------------------
+def time_case(fn, backend, cursor, ctx, iterations, warmup):
+    rows = None
+    for _ in range(warmup):
+        rows = fn(backend, cursor, ctx)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows = fn(backend, cursor, ctx)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, rows
+
+
+def run(backend, selected, iterations=20, warmup=2, seed=7, out=print):
+    cursor = backend.cursor()
+    results = []
+    try:
+        ctx = Context(cursor, seed)
+        out(f"{'case':<34}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'rows':>9}")
+        for name, group, mysql_only, fn in selected:
+            if mysql_only and backend.name != "mysql":
+                continue
+            try:
+                samples, rows = time_case(fn, backend, cursor, ctx, iterations, warmup)
+            except Exception as err:
+                results.append(summarise(name, group, [], error=f"{type(err).__name__}: {err}"))
+                out(f"{name:<34}{'failed: ' + str(err)}")
+                continue
+            result = summarise(name, group, samples, rows=rows)
+            results.append(result)
+            out(f"{name:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['max_ms']:>10.2f}{rows:>9}")
+    finally:
+        cursor.close()
+    return results, ctx.max_id
+
+
+def print_comparison(rows, out=print):
+    out(f"{'case':<34}{'old ms':>10}{'new ms':>10}{'change':>9}  verdict")
+    for name, a, b, change, verdict in rows:
+        fmt = lambda v: f"{v:>10.2f}" if v is not None else f"{'-':>10}"
+        out(f"{name:<34}{fmt(a)}{fmt(b)}{(f'{change:+.0%}' if change is not None else '-'):>9}  {verdict}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the dashboard, insight and CRUD paths.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("run")
+    bench.add_argument("--backend", choices=["mysql", "sqlite"], default="mysql")
+    bench.add_argument("--sqlite-db", help="reuse (or keep) the SQLite stand-in at this path")
+    synthetic.add_count_arguments(bench)
+    bench.add_argument("--iterations", type=int, default=20)
+    bench.add_argument("--warmup", type=int, default=2)
+    bench.add_argument("--only", help="regex on case names, e.g. '^insight' or 'crud|facets'")
+    bench.add_argument("--snapshot", action="store_true", help="also time the Parquet snapshot engine (mysql)")
+    bench.add_argument("--out")
+    diff = sub.add_parser("compare")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--threshold", type=float, default=0.10, help="relative p50 change that counts")
+    diff.add_argument("--min-ms", type=float, default=1.0, help="smallest absolute change that counts")
+    diff.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.old, encoding="utf-8") as f_old, open(args.new, encoding="utf-8") as f_new:
+            rows = compare(json.load(f_old), json.load(f_new), args.threshold, args.metric, args.min_ms)
+        print_comparison(rows)
+        sys.exit(1 if any(verdict == "regressed" for *_, verdict in rows) else 0)
+
+    dataset = {"source": "configured database"}
+    if args.backend == "sqlite":
+        counts = synthetic.parse_counts(args)
+        path = args.sqlite_db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+        dataset = {"source": "synthetic", "seed": args.seed, "counts": counts}
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            dataset["cities"] = build_sqlite(path, counts, args.seed, args.cities)
+            print(f"built {path} in {time.perf_counter() - start:.1f}s")
+        backend = SQLiteBackend(path)
+    else:
+        backend = MySQLBackend()
+
+    try:
+        selected = cases()
+        if args.snapshot and backend.name == "mysql":
+            selected += snapshot_cases(backend.conn, tempfile.mkdtemp(prefix="bench-snapshot-"))
+        if args.only:
+            selected = [case for case in selected if re.search(args.only, case[0])]
+        results, max_ids = run(backend, selected, args.iterations, args.warmup, args.seed)
+        dataset["max_ids"] = max_ids
+        report = {
+            "meta": metadata("bench", backend=backend.name, server=backend.version(), dataset=dataset,
+                             iterations=args.iterations, warmup=args.warmup),
+            "results": results,
+        }
+    finally:
+        backend.close()
+    print(f"results written to {write_report(report, args.out)}")
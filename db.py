@@ -0,0 +1,287 @@
+"""
+Process-wide MySQL connection pooling for the Epicurean Reserve app.
+
+Streamlit re-executes app.py on every widget interaction, but imported modules
+stay loaded for the lifetime of the server process, so the pools kept here are
+shared by every browser session instead of being rebuilt on each rerun.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import MySQLdb
+from MySQLdb.cursors import DictCursor
+from decouple import config
+
+import profiler
+
+DATABASE = 'food_wastage_management_system'
+
+
+class PoolExhausted(MySQLdb.OperationalError):
+    """Raised when no pooled connection frees up within the checkout timeout."""
+
+
+class LockTimeout(MySQLdb.OperationalError):
+    """Raised when a named lock is still held elsewhere after the wait timeout."""
+
+
+# -----------------------------
+# RAW CONNECTIONS
+# -----------------------------
+def connect(**overrides):
+    params = dict(
+        host=config('db_host'),
+        user=config('db_user'),
+        passwd=config('db_password'),
+        port=int(config('db_port')),
+        database=DATABASE,
+        cursorclass=DictCursor
+    )
+    params.update(overrides)
+    conn = MySQLdb.connect(**params)
+    conn.autocommit(True)
+    return conn
+
+
+def rollback_quietly(conn):
+    """Roll back whatever transaction ``conn`` may have open; False if the connection is unusable."""
+    try:
+        conn.rollback()
+        return True
+    except MySQLdb.Error:
+        return False
+
+
+@contextmanager
+def transaction(conn):
+    """Yield a cursor inside an explicit transaction on an autocommit connection."""
+    cursor = conn.cursor()
+    cursor.execute("START TRANSACTION")
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def named_lock(conn, name, timeout=10):
+    """
+    Hold the server-wide GET_LOCK(``name``) on ``conn`` for the block, so the
+    block runs one at a time across threads, processes and app servers.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS got", (name, timeout))
+        if not cursor.fetchone()['got']:
+            raise LockTimeout(f"lock {name!r} is still held after {timeout}s")
+        try:
+            yield
+        finally:
+            try:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchall()
+            except MySQLdb.Error:
+                pass  # the server releases it when the connection goes away
+    finally:
+        cursor.close()
+
+
+def next_id(cursor, table, column):
+    """
+    The next free ``column`` value of ``table``, for use inside a transaction.
+
+    The keys are plain INTs without AUTO_INCREMENT, so inserts take MAX + 1;
+    FOR UPDATE locks the top of the key index, so concurrent inserters queue
+    instead of picking the same value.
+    """
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 AS next_id FROM {table} FOR UPDATE")
+    return cursor.fetchone()['next_id']
+
+
+# -----------------------------
+# CONNECTION POOL
+# -----------------------------
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections.
+
+    Idle connections are handed out last-in-first-out so the hottest sockets
+    are reused, and any connection that sat idle longer than ``ping_after``
+    seconds is pinged (and transparently replaced if the server dropped it)
+    before it is returned to the caller.
+    """
+
+    def __init__(self, size=8, timeout=10.0, ping_after=30.0, init_statements=(), **connect_kwargs):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.init_statements = tuple(init_statements)
+        self.connect_kwargs = connect_kwargs
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+        self._metrics = {
+            "checkouts": 0,
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _new_connection(self):
+        conn = connect(**self.connect_kwargs)
+        if self.init_statements:
+            cur = conn.cursor()
+            try:
+                for stmt in self.init_statements:
+                    cur.execute(stmt)
+            finally:
+                cur.close()
+        with self._cond:
+            self._metrics["created"] += 1
+        return conn
+
+    def _revive(self, conn):
+        try:
+            conn.ping()
+            return conn
+        except MySQLdb.Error:
+            self._close_quietly(conn)
+            with self._cond:
+                self._metrics["reconnects"] += 1
+            return self._new_connection()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        waited = False
+        with self._cond:
+            self._metrics["checkouts"] += 1
+            if self._idle:
+                self._metrics["hits"] += 1
+            else:
+                self._metrics["misses"] += 1
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolExhausted(f"No database connection available within {timeout:.1f}s (pool size {self.size})")
+                waited = True
+                self._cond.wait(remaining)
+            wait = time.perf_counter() - start
+            if waited:
+                self._metrics["waits"] += 1
+            self._metrics["wait_time_total"] += wait
+            self._metrics["wait_time_max"] = max(self._metrics["wait_time_max"], wait)
+
+        try:
+            if conn is None:
+                return self._new_connection()
+            if time.monotonic() - last_used > self.ping_after:
+                return self._revive(conn)
+            return conn
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        if not discard and not getattr(conn, 'open', True):
+            discard = True
+        with self._cond:
+            if discard:
+                self._open -= 1
+                self._metrics["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except MySQLdb.OperationalError:
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            # Never hand the next caller a connection with a transaction open.
+            self.release(conn, discard=not rollback_quietly(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._metrics)
+            stats["size"] = self.size
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        checkouts = stats["checkouts"] or 1
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts
+        stats["hit_ratio"] = stats["hits"] / checkouts
+        return stats
+
+
+# -----------------------------
+# PROCESS-WIDE REGISTRY
+# -----------------------------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name="default", **options):
+    """Return the named pool, creating it on first use with ``options``."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            options.setdefault("size", config('db_pool_size', default=8, cast=int))
+            options.setdefault("timeout", config('db_pool_timeout', default=10.0, cast=float))
+            options.setdefault("ping_after", config('db_pool_ping_after', default=30.0, cast=float))
+            options.setdefault("cursorclass", profiler.ProfiledCursor)
+            pool = _pools[name] = ConnectionPool(**options)
+        return pool
+
+
+def pool_metrics():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
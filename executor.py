@@ -0,0 +1,132 @@
+"""
+Concurrent execution of independent read queries.
+
+run_parallel() hands each task a cursor on its own pooled connection and
+runs the tasks on a process-wide thread pool, so a page that needs five
+independent reads waits roughly as long as the slowest one instead of the
+sum of all five. Tasks use a dedicated "parallel" pool with one connection
+per worker thread, never the default pool that page scripts hold their own
+connections in, so workers cannot be starved however many sessions rerun at
+once. Every task runs under a server-side MAX_EXECUTION_TIME and a
+client-side deadline; a task that overruns is cancelled -- dropped if it
+has not started, otherwise stopped with KILL QUERY on its connection.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+import MySQLdb
+from decouple import config
+
+import db
+import profiler
+
+DEFAULT_TIMEOUT = config('query_timeout_ms', default=15000, cast=int) / 1000
+WORKERS = config('query_workers', default=8, cast=int)
+
+_workers = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="query")
+
+
+class QueryTimeout(MySQLdb.OperationalError):
+    """Raised (or returned) for a task that missed its deadline and was cancelled."""
+
+
+class _Task:
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.thread_id = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+
+def _run(task, pool, timeout):
+    with task.lock:
+        if task.cancelled:
+            raise QueryTimeout(f"{task.name}: cancelled before it started")
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (int(timeout * 1000),))
+            with task.lock:
+                if task.cancelled:
+                    raise QueryTimeout(f"{task.name}: cancelled before it started")
+                task.thread_id = conn.thread_id()
+            with profiler.section(task.name):
+                return task.fn(cursor)
+        finally:
+            with task.lock:
+                task.thread_id = None
+            try:
+                cursor.execute("SET SESSION MAX_EXECUTION_TIME = 0")
+            finally:
+                cursor.close()
+
+
+def get_pool():
+    # A worker holds at most one connection at a time, so WORKERS connections
+    # are always enough.
+    return db.get_pool("parallel", size=WORKERS)
+
+
+def cancel(task, **connect_kwargs):
+    """Stop ``task``: skip it if still queued, KILL QUERY it if running."""
+    with task.lock:
+        task.cancelled = True
+        thread_id = task.thread_id
+    if thread_id is not None:
+        kill_query(thread_id, **connect_kwargs)
+
+
+def kill_query(thread_id, **connect_kwargs):
+    """KILL QUERY whatever connection ``thread_id`` is running; best effort."""
+    # A fresh connection so cancelling never waits on an exhausted pool. If
+    # even that fails, the server-side MAX_EXECUTION_TIME still ends the query.
+    killer = None
+    try:
+        killer = db.connect(**connect_kwargs)
+        cursor = killer.cursor()
+        cursor.execute("KILL QUERY %s", (thread_id,))
+        cursor.close()
+    except MySQLdb.Error:
+        pass
+    finally:
+        if killer is not None:
+            killer.close()
+
+
+def run_parallel(tasks, timeout=None, pool=None):
+    """
+    Run ``{name: fn(cursor)}`` concurrently and return ``{name: result}``.
+
+    A task that fails or times out maps to its exception instead of a
+    result, so one slow or broken query never blanks the whole page.
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    pool = pool or get_pool()
+    deadline = time.monotonic() + timeout
+    running = []
+    for name, fn in tasks.items():
+        task = _Task(name, fn)
+        # Run in a copy of the caller's context so queries keep its profiler tags.
+        context = contextvars.copy_context()
+        running.append((task, _workers.submit(context.run, _run, task, pool, timeout)))
+
+    results = {}
+    try:
+        for task, future in running:
+            try:
+                results[task.name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeout:
+                cancel(task)
+                results[task.name] = QueryTimeout(f"{task.name}: exceeded {timeout:.1f}s and was cancelled")
+            except Exception as err:
+                results[task.name] = err
+    except BaseException:
+        for task, future in running:
+            if not future.done():
+                cancel(task)
+        raise
+    return results
@@ -0,0 +1,118 @@
+"""
+Index advisor: runs EXPLAIN over every query the app issues and flags full scans.
+
+The workload covers the 15 insights (raw and summary-backed), the dashboard
+filter builder with each filter on its own and all together, the paginated
+registry reads and the CRUD lookups and searches. Filter values are sampled from the live
+data so the optimizer sees realistic selectivity.
+
+Usage:
+    python explain.py            # print a report; exits 1 if any full table scan is found
+"""
+import sys
+
+import MySQLdb
+
+import db
+import search
+from queries import sql_queries, SUMMARY_QUERIES, listing_filters
+
+# Access types that read the whole table or a whole index.
+FULL_SCAN = "ALL"
+FULL_INDEX_SCAN = "index"
+
+
+def workload(cursor):
+    """Yield (label, sql, params) for every query shape the app runs."""
+    for title, sql in sql_queries.items():
+        yield f"insight {title}", sql, ()
+    for title, sql in SUMMARY_QUERIES.items():
+        yield f"insight {title} [summary]", sql, ()
+
+    cursor.execute("SELECT Location, Provider_ID, Food_Type, Meal_Type FROM food_listings LIMIT 1")
+    sample = cursor.fetchone()
+    if sample:
+        filters = {
+            "city": sample['Location'],
+            "provider": str(sample['Provider_ID']),
+            "food_type": sample['Food_Type'],
+            "meal_type": sample['Meal_Type'],
+        }
+        for name, value in filters.items():
+            where, params = listing_filters(**{name: value})
+            yield f"dashboard filter {name}", f"SELECT * FROM food_listings WHERE {where} ORDER BY Food_ID LIMIT 51", params
+        where, params = listing_filters(**filters)
+        yield "dashboard filter all", f"SELECT * FROM food_listings WHERE {where} ORDER BY Food_ID LIMIT 51", params
+
+    yield "dashboard listings page", "SELECT * FROM food_listings WHERE 1=1 AND Food_ID > %s ORDER BY Food_ID LIMIT 51", (0,)
+    yield "provider registry page", (
+        "SELECT Provider_ID, Name, Type, City, Contact FROM providers "
+        "WHERE 1=1 AND (City, Provider_ID) > (%s, %s) ORDER BY City, Provider_ID LIMIT 51"), ("", 0)
+    for table, id_col in (("food_listings", "Food_ID"), ("providers", "Provider_ID"),
+                          ("receivers", "Receiver_ID"), ("claims", "Claim_ID")):
+        yield f"CRUD lookup {table}", f"SELECT * FROM {table} WHERE {id_col}=%s", (1,)
+    for registry in ("Food Listings", "Providers", "Receivers"):
+        sql, params = search.build_query(registry, "rice")
+        yield f"CRUD search {registry}", sql, params
+    # The typo pass behind a search that found nothing containing the term.
+    sql, params = search.candidates_query("Food Listings", "Food_Name", "rcie")
+    yield "CRUD search typo candidates", sql, params
+    sql, params = search.near_miss_query("Food Listings", {"Food_Name": ["Rice"]})
+    yield "CRUD search typo rows", sql, params
+    query = search.claims_query("Pending", search.claim_statuses(cursor) or ["Pending"])
+    if query is not None:
+        yield "CRUD search Claims", query[0], query[1]
+
+
+def explain(cursor, sql, params=()):
+    cursor.execute(f"EXPLAIN {sql.rstrip().rstrip(';')}", list(params))
+    return list(cursor.fetchall())
+
+
+def findings(plan):
+    """Return a list of (severity, message) for one EXPLAIN result."""
+    issues = []
+    for step in plan:
+        table = step.get('table')
+        extra = step.get('Extra') or ""
+        if step.get('type') == FULL_SCAN:
+            issues.append(("FULL SCAN", f"{table}: ~{step.get('rows')} rows, no usable index"))
+        elif step.get('type') == FULL_INDEX_SCAN:
+            issues.append(("index scan", f"{table}: reads all of {step.get('key')}"))
+        if "Using filesort" in extra:
+            issues.append(("filesort", f"{table}: {extra}"))
+        if "Using temporary" in extra:
+            issues.append(("temporary", f"{table}: {extra}"))
+    return issues
+
+
+def report(conn, out=print):
+    """Print a plan summary for the whole workload and return the full-scan count."""
+    cursor = conn.cursor()
+    full_scans = 0
+    try:
+        for label, sql, params in workload(cursor):
+            try:
+                plan = explain(cursor, sql, params)
+            except MySQLdb.Error as err:
+                out(f"[error]     {label}: {err}")
+                continue
+            issues = findings(plan)
+            full_scans += sum(1 for severity, _ in issues if severity == "FULL SCAN")
+            if not issues:
+                keys = ", ".join(f"{step.get('table')}:{step.get('key')}" for step in plan)
+                out(f"[ok]        {label} ({keys})")
+            for severity, message in issues:
+                out(f"[{severity}] {label} -- {message}")
+    finally:
+        cursor.close()
+    out(f"\n{full_scans} full table scan(s) found.")
+    return full_scans
+
+
+if __name__ == "__main__":
+    conn = db.connect()
+    try:
+        sys.exit(1 if report(conn) else 0)
+    finally:
+        conn.close()
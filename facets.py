@@ -0,0 +1,111 @@
+"""
+Shared dimension-value cache for the dashboard filter selectboxes.
+
+One GROUP BY over food_listings loads the count of every
+(Location, Provider_ID, Food_Type, Meal_Type) combination into memory. All
+four option lists -- cascaded by whatever is already selected, with counts --
+are then derived from that map without touching the database. CRUD writes
+adjust the counts in place; a periodic reload picks up writes made by other
+processes such as ingest.py.
+"""
+import threading
+import time
+
+from decouple import config
+
+DIMENSIONS = ("Location", "Provider_ID", "Food_Type", "Meal_Type")
+ALL = "All"
+
+
+def _combo(row):
+    return tuple("" if row.get(dim) is None else str(row.get(dim)) for dim in DIMENSIONS)
+
+
+def _sort_key(value):
+    return (0, int(value), "") if value.isdigit() else (1, 0, value.lower())
+
+
+class FacetIndex:
+
+    def __init__(self, refresh_after=300.0):
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._loaded_at = None
+        self._version = 0
+        self._options_memo = {}
+
+    def load(self, cursor):
+        with self._lock:
+            version = self._version
+        cursor.execute(
+            f"SELECT {', '.join(DIMENSIONS)}, COUNT(*) AS n FROM food_listings "
+            f"GROUP BY {', '.join(DIMENSIONS)}")
+        counts = {_combo(row): row['n'] for row in cursor.fetchall()}
+        with self._lock:
+            # A write that landed while we were reading may or may not be in
+            # the snapshot, so leave the index stale and reload next time.
+            self._loaded_at = time.monotonic() if version == self._version else None
+            self._counts = counts
+            self._version += 1
+            self._options_memo.clear()
+
+    def ensure(self, cursor):
+        with self._lock:
+            fresh = self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_after
+        if not fresh:
+            self.load(cursor)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self._version += 1
+
+    def record_change(self, old=None, new=None):
+        """Apply one food_listings insert/update/delete to the cached counts."""
+        with self._lock:
+            self._version += 1
+            self._options_memo.clear()
+            if self._loaded_at is None:
+                return
+            for row, sign in ((old, -1), (new, 1)):
+                if not row:
+                    continue
+                combo = _combo(row)
+                count = self._counts.get(combo, 0) + sign
+                if count > 0:
+                    self._counts[combo] = count
+                else:
+                    self._counts.pop(combo, None)
+
+    def options(self, selection):
+        """
+        Return {dimension: [(value, count), ...]} where each dimension's counts
+        respect the selections made on every *other* dimension.
+        """
+        selected = tuple(selection.get(dim, ALL) for dim in DIMENSIONS)
+        with self._lock:
+            version = self._version
+            memo = self._options_memo.get((version, selected))
+            if memo is not None:
+                return memo
+            combos = list(self._counts.items())
+        tallies = [{} for _ in DIMENSIONS]
+        for combo, count in combos:
+            misses = [i for i, want in enumerate(selected) if want != ALL and combo[i] != want]
+            if len(misses) > 1:
+                continue
+            for i, value in enumerate(combo):
+                if not misses or misses == [i]:
+                    tallies[i][value] = tallies[i].get(value, 0) + count
+        result = {
+            dim: sorted(tallies[i].items(), key=lambda item: _sort_key(item[0]))
+            for i, dim in enumerate(DIMENSIONS)
+        }
+        with self._lock:
+            if version == self._version:
+                self._options_memo[(version, selected)] = result
+        return result
+
+
+index = FacetIndex(refresh_after=config('facet_refresh_seconds', default=300.0, cast=float))
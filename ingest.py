@@ -0,0 +1,189 @@
+"""
+Bulk CSV ingestion for the providers, receivers, food_listings and claims tables.
+
+Files are read in streaming chunks (the pandas C parser keeps multi-line
+quoted fields such as provider addresses intact) and written either with
+batched ``executemany`` upserts or with MySQL's ``LOAD DATA LOCAL INFILE``.
+
+Usage:
+    python ingest.py [--data-dir data] [--batch-size 5000]
+                     [--mode executemany|load-data] [--tables providers claims ...]
+                     [--disable-fk-checks] [--skip-summary]
+"""
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+import db
+import summary
+
+# Load order respects the foreign keys between the tables.
+SOURCES = {
+    "providers": {
+        "file": "providers_data.csv",
+        "columns": ["Provider_ID", "Name", "Type", "Address", "City", "Contact"],
+        "dates": {},
+    },
+    "receivers": {
+        "file": "receivers_data.csv",
+        "columns": ["Receiver_ID", "Name", "Type", "City", "Contact"],
+        "dates": {},
+    },
+    "food_listings": {
+        "file": "food_listings_data.csv",
+        "columns": ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type", "Location", "Food_Type", "Meal_Type"],
+        "dates": {"Expiry_Date": ("%m/%d/%Y", "%Y-%m-%d")},
+    },
+    "claims": {
+        "file": "claims_data.csv",
+        "columns": ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"],
+        "dates": {"Timestamp": ("%m/%d/%Y %H:%M", "%Y-%m-%d %H:%M:%S")},
+    },
+}
+
+
+def upsert_statement(table):
+    columns = SOURCES[table]["columns"]
+    updates = ", ".join(f"{col} = VALUES({col})" for col in columns[1:])
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON DUPLICATE KEY UPDATE {updates}"
+    )
+
+
+def read_batches(path, table, batch_size):
+    """Yield lists of row tuples, parsing dates one chunk at a time."""
+    spec = SOURCES[table]
+    reader = pd.read_csv(
+        path,
+        usecols=spec["columns"],
+        dtype=str,
+        keep_default_na=False,
+        na_values=[""],
+        chunksize=batch_size,
+    )
+    for chunk in reader:
+        chunk = chunk[spec["columns"]]
+        for column, (source_fmt, sql_fmt) in spec["dates"].items():
+            chunk[column] = pd.to_datetime(chunk[column], format=source_fmt).dt.strftime(sql_fmt)
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield list(chunk.itertuples(index=False, name=None))
+
+
+# -----------------------------
+# LOADERS
+# -----------------------------
+def load_executemany(conn, table, path, batch_size):
+    statement = upsert_statement(table)
+    rows = 0
+    for batch in read_batches(path, table, batch_size):
+        with db.transaction(conn) as tx:
+            tx.executemany(statement, batch)
+        rows += len(batch)
+    return rows
+
+
+def load_data_infile(conn, table, path):
+    """
+    Hand the whole file to the server. ``REPLACE`` gives upsert semantics on
+    the primary key but deletes and re-inserts, so parents that already have
+    child rows (e.g. listings with claims) should go through executemany.
+    """
+    spec = SOURCES[table]
+    targets = [f"@{col}" if col in spec["dates"] else col for col in spec["columns"]]
+    # Doubled percent signs survive MySQLdb's parameter interpolation.
+    assignments = ", ".join(
+        f"{col} = STR_TO_DATE(@{col}, '{source_fmt.replace('%', '%%')}')"
+        for col, (source_fmt, _) in spec["dates"].items()
+    )
+    statement = (
+        f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {table} "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+        "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+        f"({', '.join(targets)})"
+    )
+    if assignments:
+        statement += f" SET {assignments}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(statement, (os.path.abspath(path),))
+        # REPLACE counts every replaced row twice in rowcount (delete + insert);
+        # "Records: n" in the statement's info string is the rows read.
+        records = re.search(r"Records:\s*(\d+)", conn.info() or "")
+        return int(records.group(1)) if records else cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def ingest_all(conn, data_dir="data", tables=None, batch_size=5000, mode="executemany",
+               disable_fk_checks=False, rebuild_summary=True):
+    """Load each table in foreign-key order and return per-table throughput."""
+    report = []
+    cursor = conn.cursor()
+    if disable_fk_checks:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+    try:
+        for table in SOURCES:
+            if tables and table not in tables:
+                continue
+            path = os.path.join(data_dir, SOURCES[table]["file"])
+            start = time.perf_counter()
+            if mode == "load-data":
+                rows = load_data_infile(conn, table, path)
+            else:
+                rows = load_executemany(conn, table, path, batch_size)
+            elapsed = time.perf_counter() - start
+            report.append({
+                "table": table,
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+            })
+    finally:
+        if disable_fk_checks:
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+        cursor.close()
+    if rebuild_summary:
+        summary.rebuild(conn)
+    return report
+
+
+def print_report(report):
+    print(f"{'table':<15}{'rows':>12}{'seconds':>10}{'rows/sec':>14}")
+    for entry in report:
+        print(f"{entry['table']:<15}{entry['rows']:>12}{entry['seconds']:>10}{entry['rows_per_sec'] or '-':>14}")
+    rows = sum(e["rows"] for e in report)
+    seconds = sum(e["seconds"] for e in report)
+    print(f"{'total':<15}{rows:>12}{round(seconds, 3):>10}{round(rows / seconds, 1) if seconds else '-':>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load the data/*.csv registries into MySQL.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--mode", choices=["executemany", "load-data"], default="executemany")
+    parser.add_argument("--tables", nargs="+", choices=list(SOURCES))
+    parser.add_argument("--disable-fk-checks", action="store_true",
+                        help="skip foreign key checks for the session (trusted dumps only)")
+    parser.add_argument("--skip-summary", action="store_true",
+                        help="do not rebuild summary_counters afterwards")
+    args = parser.parse_args()
+
+    connect_kwargs = {"local_infile": 1} if args.mode == "load-data" else {}
+    conn = db.connect(**connect_kwargs)
+    try:
+        print_report(ingest_all(
+            conn,
+            data_dir=args.data_dir,
+            tables=args.tables,
+            batch_size=args.batch_size,
+            mode=args.mode,
+            disable_fk_checks=args.disable_fk_checks,
+            rebuild_summary=not args.skip_summary,
+        ))
+    finally:
+        conn.close()
@@ -0,0 +1,517 @@
+"""
+Headless multi-session load driver for the Streamlit pages.
+
+Each virtual user opens its own websocket session on a running
+``streamlit run app.py`` server (or one started with ``--serve``) and talks
+to it the way a browser tab does: it sends a script rerun carrying the
+current widget states and reads element deltas until the script finishes.
+All users therefore share the server's pools, caches and facet index as
+real visitors would. Every user loops over SCENARIO -- open the dashboard,
+re-run it (its three reads go through executor.run_parallel), filter and
+page it, search the CRUD registry, open a few insights, run a query in the
+SQL terminal -- with a think time between steps.
+
+``--writes`` adds the CRUD write path: each loop registers a provider named
+``Loadtest <hex>``, finds its ID through the registry search, revises its
+contact number and archives it again, so a run only touches rows it created
+(a row whose session dropped mid-cycle is left behind under that name).
+
+Each step's rerun latency is summarised with bench.summarise() and written
+in the same JSON layout as bench.py, so load runs from two commits can be
+compared with ``python bench.py compare``. A step fails when the page
+renders an exception or an st.error, or when its rerun times out.
+
+Usage:
+    python loadtest.py [--url http://127.0.0.1:8501 | --serve] [--users 8] [--duration 60]
+                       [--think 0.5] [--snapshot] [--writes] [--out bench-results/loadtest.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+import pyarrow as pa
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+import bench
+from queries import sql_queries
+
+DEPARTMENT = "📂 Select Department"
+SEARCH_TERMS = bench.SEARCH_TERMS
+RERUN_TIMEOUT = 60.0
+
+# Cheap, always-allowed statements for the SQL terminal step.
+TERMINAL_QUERIES = [
+    "SELECT * FROM food_listings WHERE Food_ID = {n}",
+    "SELECT City, COUNT(*) AS Providers FROM providers GROUP BY City",
+    "SELECT Status, COUNT(*) AS Claims FROM claims GROUP BY Status",
+]
+WRITE_TARGET = "Providers"
+# The archive page reports a successful delete with st.error.
+ARCHIVED = "Record has been purged from the system."
+
+
+class StepFailed(Exception):
+    """The rerun finished, but the page rendered an exception or an error alert."""
+
+
+# -----------------------------
+# ONE BROWSER SESSION
+# -----------------------------
+class Session:
+    """One websocket session, holding the widget states a browser tab would send."""
+
+    def __init__(self, url, timeout=RERUN_TIMEOUT):
+        self.ws_url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.timeout = timeout
+        self.ws = None
+        self.widgets = {}
+        self.states = {}
+        self.frames = []
+        self.notices = []
+        self.page_hash = ""
+        # Fragments the last full run asked to rerun every ``interval`` seconds.
+        self.auto_reruns = {}
+        # Rows this session registered under --writes: names not yet looked up, then IDs.
+        self.inserted = []
+        self.owned = []
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.ws_url, subprotocols=["streamlit"])
+        return await self.rerun()
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+            self.ws = None
+
+    async def rerun(self, trigger=None, fragment_id=None):
+        """Run the script (or one fragment) once with the current states plus a one-shot ``trigger``."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_hash
+        if fragment_id is not None:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        for state in self.states.values():
+            msg.rerun_script.widget_states.widgets.add().CopyFrom(state)
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.add().CopyFrom(trigger)
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        return await asyncio.wait_for(self._read_run(), self.timeout), time.perf_counter() - start
+
+    async def _read_run(self):
+        widgets, errors, frames, notices = {}, [], [], []
+        full_run = True
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the session")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.page_hash = fwd.new_session.page_script_hash
+                full_run = not fwd.new_session.fragment_ids_this_run
+                if full_run:
+                    self.auto_reruns = {}
+            elif kind == "auto_rerun":
+                self.auto_reruns[fwd.auto_rerun.fragment_id] = fwd.auto_rerun.interval
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype = element.WhichOneof("type")
+                proto = getattr(element, etype) if etype else None
+                if etype == "exception":
+                    errors.append(f"{proto.type}: {proto.message}")
+                elif etype == "alert" and proto.format == proto.ERROR:
+                    errors.append(proto.body)
+                elif etype == "alert" and proto.format == proto.SUCCESS:
+                    notices.append(proto.body)
+                elif etype == "arrow_data_frame":
+                    frames.append(proto.data)
+                elif proto is not None and hasattr(proto, "id") and hasattr(proto, "label"):
+                    widgets[proto.id] = (etype, proto)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    widgets, errors, frames, notices = {}, [], [], []
+                    continue
+                break
+        if full_run:
+            # Like the browser, only keep states of widgets rendered by this run.
+            self.widgets = widgets
+            self.states = {wid: state for wid, state in self.states.items() if wid in widgets}
+        else:
+            self.widgets = {**self.widgets, **widgets}
+        self.frames = frames
+        self.notices = notices
+        return errors
+
+    async def settle(self):
+        """
+        Keep rerunning the page's auto-rerun fragments on their interval, as a
+        browser would, until a full run registers none. Returns their errors.
+        """
+        errors = []
+        deadline = time.monotonic() + self.timeout
+        while self.auto_reruns:
+            if time.monotonic() >= deadline:
+                raise StepFailed(f"fragments still polling after {self.timeout:.0f}s")
+            fragment_id, interval = next(iter(self.auto_reruns.items()))
+            await asyncio.sleep(interval)
+            more, _ = await self.rerun(fragment_id=fragment_id)
+            errors.extend(more)
+        return errors
+
+    # -- widget lookup and interaction --
+    def find(self, etype, label=None, key=None, required=True):
+        """The rendered ``etype`` widget with this key (or label prefix)."""
+        for wid, (kind, proto) in self.widgets.items():
+            if kind != etype:
+                continue
+            if key is not None and wid.endswith(f"-{key}"):
+                return proto
+            if label is not None and proto.label.startswith(label):
+                return proto
+        if required:
+            raise LookupError(f"no {etype} {key or label!r} on the page")
+        return None
+
+    def rows(self):
+        """The rows of the last dataframe this run rendered."""
+        if not self.frames:
+            return []
+        return pa.ipc.open_stream(self.frames[-1]).read_all().to_pylist()
+
+    def stage(self, proto, **value):
+        """Set a widget without rerunning, like a form field or an edit not yet submitted."""
+        self.states[proto.id] = WidgetState(id=proto.id, **value)
+
+    def _set(self, proto, **value):
+        self.stage(proto, **value)
+        return self.rerun()
+
+    def select(self, proto, option):
+        return self._set(proto, string_value=option)
+
+    def choose(self, proto, index):
+        return self._set(proto, int_value=index)
+
+    def enter_number(self, proto, value):
+        return self._set(proto, double_value=value)
+
+    def toggle(self, proto, value):
+        return self._set(proto, bool_value=value)
+
+    def type_text(self, proto, text):
+        return self._set(proto, string_value=text)
+
+    def click(self, proto):
+        return self.rerun(trigger=WidgetState(id=proto.id, trigger_value=True))
+
+
+# -----------------------------
+# SCENARIO
+# -----------------------------
+async def _checked(rerun):
+    """Await a preparatory rerun and fail the step if it rendered an error."""
+    errors, seconds = await rerun
+    if errors:
+        raise StepFailed("; ".join(errors)[:300])
+    return seconds
+
+
+async def _department(session, rng, name):
+    return await session.select(session.find("selectbox", label=DEPARTMENT), name)
+
+
+async def open_dashboard(session, rng):
+    return await _department(session, rng, "Exhibition Dashboard")
+
+
+async def refresh_dashboard(session, rng):
+    return await session.rerun()
+
+
+async def filter_dashboard(session, rng):
+    box = session.find("selectbox", key="facet::Food_Type")
+    return await session.select(box, rng.choice(box.options[1:] or box.options))
+
+
+async def next_page(session, rng):
+    button = session.find("button", key="dashboard_listings::next", required=False)
+    return None if button is None or button.disabled else await session.click(button)
+
+
+async def clear_filter(session, rng):
+    box = session.find("selectbox", key="facet::Food_Type")
+    return await session.select(box, box.options[0])
+
+
+async def open_crud(session, rng):
+    return await _department(session, rng, "Inventory Management (CRUD)")
+
+
+async def search_registry(session, rng):
+    return await session.type_text(session.find("text_input", label="🔍 Search"), rng.choice(SEARCH_TERMS))
+
+
+async def _crud_action(session, action):
+    target = session.find("radio", label="Select Department to Manage")
+    session.stage(target, int_value=list(target.options).index(WRITE_TARGET))
+    await _checked(session.select(session.find("selectbox", label="Select Management Action"), action))
+
+
+async def insert_record(session, rng):
+    await _crud_action(session, "Add New Record")
+    name = f"Loadtest {rng.getrandbits(32):08x}"
+    session.stage(session.find("text_input", label="Provider Name"), string_value=name)
+    session.stage(session.find("text_input", label="City"), string_value="Loadtest City")
+    session.stage(session.find("text_input", label="Contact Number"), string_value=f"{rng.randrange(10 ** 10):010d}")
+    result = await session.click(session.find("button", label="Register Provider"))
+    if not result[0]:
+        if not any(notice.startswith("Provider Registered") for notice in session.notices):
+            raise StepFailed("the form submitted but no provider was registered")
+        session.inserted.append(name)
+    return result
+
+
+async def find_record(session, rng):
+    if not session.inserted:
+        return None
+    name = session.inserted.pop(0)
+    await _crud_action(session, "View & Search")
+    result = await session.type_text(session.find("text_input", label="🔍 Search"), name)
+    ids = [row["Provider_ID"] for row in session.rows() if row.get("Name") == name]
+    if not result[0] and not ids:
+        raise LookupError(f"{name!r} is not in the search results")
+    session.owned.extend(ids)
+    return result
+
+
+async def update_record(session, rng):
+    if not session.owned:
+        return None
+    await _crud_action(session, "Update Existing Record")
+    await _checked(session.enter_number(session.find("number_input", label="Enter Provider_ID to Modify"),
+                                        rng.choice(session.owned)))
+    await _checked(session.select(session.find("selectbox", label="Select Attribute to Revise"), "Contact"))
+    session.stage(session.find("text_input", label="Enter New Contact"), string_value=f"{rng.randrange(10 ** 10):010d}")
+    return await session.click(session.find("button", label="AUTHORIZE CONTACT CHANGE"))
+
+
+async def delete_record(session, rng):
+    if not session.owned:
+        return None
+    await _crud_action(session, "Archive (Delete) Record")
+    record = session.owned.pop(0)
+    session.stage(session.find("number_input", label="Enter Provider_ID to Permanently Archive"), double_value=record)
+    errors, seconds = await session.click(session.find("button", label="Confirm Archival"))
+    return [error for error in errors if error != ARCHIVED], seconds
+
+
+async def open_insights(session, rng):
+    return await _department(session, rng, "Concierge SQL Insights")
+
+
+async def use_snapshot(session, rng):
+    radio = session.find("radio", key="insight::source")
+    return await session.choose(radio, 1)
+
+
+async def toggle_insight(session, rng):
+    title = rng.choice(list(sql_queries))
+    toggle = session.find("checkbox", key=f"insight::{title}")
+    return await session.toggle(toggle, not session.states.get(toggle.id, WidgetState()).bool_value)
+
+
+async def open_terminal(session, rng):
+    return await _department(session, rng, "Direct SQL Access")
+
+
+async def run_terminal_query(session, rng):
+    sql = rng.choice(TERMINAL_QUERIES).format(n=rng.randint(1, 1000))
+    session.stage(session.find("text_area", label="Enter SQL Command"), string_value=sql)
+    # The page returns at once and polls the job from a fragment; time until the result is drawn.
+    start = time.perf_counter()
+    errors, _ = await session.click(session.find("button", label="Authorize Execution"))
+    errors += await session.settle()
+    return errors, time.perf_counter() - start
+
+
+SCENARIO = [
+    ("dashboard.open", open_dashboard),
+    ("dashboard.refresh", refresh_dashboard),
+    ("dashboard.filter", filter_dashboard),
+    ("dashboard.next_page", next_page),
+    ("dashboard.clear_filter", clear_filter),
+    ("crud.open", open_crud),
+    ("crud.search", search_registry),
+    ("insights.open", open_insights),
+    ("insights.toggle", toggle_insight),
+    ("insights.toggle", toggle_insight),
+    ("insights.toggle", toggle_insight),
+    ("terminal.open", open_terminal),
+    ("terminal.query", run_terminal_query),
+]
+
+WRITE_STEPS = [
+    ("crud.insert", insert_record),
+    ("crud.find", find_record),
+    ("crud.update", update_record),
+    ("crud.delete", delete_record),
+]
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+class Recorder:
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.last_error = {}
+
+    def ok(self, step, seconds):
+        self.samples[step].append(seconds * 1000)
+
+    def failed(self, step, error):
+        self.failures[step] += 1
+        self.last_error[step] = error
+
+
+async def virtual_user(n, url, scenario, deadline, think, seed, recorder, ramp):
+    rng = random.Random(seed + n)
+    await asyncio.sleep(ramp * rng.random())
+    session = None
+    while time.monotonic() < deadline:
+        for step, action in scenario:
+            if time.monotonic() >= deadline:
+                break
+            try:
+                if session is None:
+                    session = Session(url)
+                    errors, seconds = await session.connect()
+                    recorder.ok("session.connect", seconds)
+                result = await action(session, rng)
+                if result is not None:
+                    errors, seconds = result
+                    if errors:
+                        raise StepFailed("; ".join(errors)[:300])
+                    recorder.ok(step, seconds)
+            except (StepFailed, LookupError) as err:
+                recorder.failed(step, f"{type(err).__name__}: {err}")
+            except (asyncio.TimeoutError, ConnectionError, OSError) as err:
+                recorder.failed(step, f"{type(err).__name__}: {err}")
+                if session is not None:
+                    session.close()
+                session = None
+            await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+    if session is not None:
+        session.close()
+
+
+async def drive(url, users, duration, think, seed=7, ramp=5.0, scenario=SCENARIO):
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(virtual_user(n, url, scenario, deadline, think, seed, recorder, ramp)
+                           for n in range(users)))
+    return recorder
+
+
+def wait_healthy(url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip("/") + "/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become healthy within {timeout:.0f}s")
+
+
+def serve(port, script="app.py"):
+    """Start ``streamlit run`` headless on ``port``; the caller terminates it."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def report(recorder, duration, **meta):
+    results = []
+    for step in sorted(set(recorder.samples) | set(recorder.failures)):
+        results.append(bench.summarise(step, step.split(".")[0], recorder.samples[step],
+                                       failures=recorder.failures[step],
+                                       last_error=recorder.last_error.get(step)))
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "meta": bench.metadata("loadtest", duration_s=duration,
+                               throughput_rps=round(total / duration, 2) if duration else None, **meta),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive concurrent headless sessions against the Streamlit app.")
+    parser.add_argument("--url", default="http://127.0.0.1:8501")
+    parser.add_argument("--serve", action="store_true", help="start `streamlit run app.py` for the run")
+    parser.add_argument("--port", type=int, default=8599, help="port used with --serve")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between steps")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users join")
+    parser.add_argument("--snapshot", action="store_true", help="open insights from the columnar snapshot")
+    parser.add_argument("--writes", action="store_true",
+                        help="also insert, update and delete a provider through the CRUD forms")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    scenario = list(SCENARIO)
+    if args.snapshot:
+        scenario.insert(scenario.index(("insights.open", open_insights)) + 1, ("insights.snapshot", use_snapshot))
+    if args.writes:
+        at = scenario.index(("crud.search", search_registry)) + 1
+        scenario[at:at] = WRITE_STEPS
+    server = None
+    url = args.url
+    if args.serve:
+        url = f"http://127.0.0.1:{args.port}"
+        server = serve(args.port)
+    try:
+        wait_healthy(url)
+        started = time.monotonic()
+        recorder = asyncio.run(drive(url, args.users, args.duration, args.think, args.seed, args.ramp, scenario))
+        elapsed = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result = report(recorder, elapsed, url=url, users=args.users, think_s=args.think,
+                    steps=[step for step, _ in scenario], writes=args.writes)
+    print(f"{'step':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'failed':>8}")
+    for row in result["results"]:
+        print(f"{row['name']:<26}{row['count']:>6}{row.get('p50_ms', 0):>10.1f}{row.get('p95_ms', 0):>10.1f}"
+              f"{row.get('max_ms', 0):>10.1f}{row['failures']:>8}")
+    print(f"{result['meta']['throughput_rps']} reruns/s over {elapsed:.0f}s")
+    print(f"results written to {bench.write_report(result, args.out)}")
+    # A write cycle that never completes would otherwise report only failure counts.
+    stalled = [step for step, _ in WRITE_STEPS if args.writes and not recorder.samples[step]]
+    if stalled:
+        raise SystemExit(f"--writes: no successful {', '.join(stalled)} step "
+                         f"({recorder.last_error.get('crud.insert') or 'no row was ever inserted'})")
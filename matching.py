@@ -0,0 +1,248 @@
+"""
+Matching engine that allocates available food listings to receivers.
+
+Listings are served soonest-expiry first. For each one the engine looks at
+receivers in the same city (food_listings.Location vs receivers.City) and
+picks the best candidate from two lazily-maintained priority queues:
+
+* (city, Food_Type, Meal_Type) -- receivers whose past claims include that
+  kind of food, ranked by how often they claimed it;
+* (city,)                      -- every receiver in the city.
+
+Queue entries are ordered by (allocations in this run, -affinity,
+-historical demand, Receiver_ID), so allocations spread across receivers
+before anyone gets a second listing. An allocation makes a receiver's other
+queue entries stale; they are re-keyed only when they surface at the top of
+a heap, so each decision costs O(log R) instead of a scan over receivers.
+
+A run holds the "matching" named lock from loading the unclaimed listings
+until their claims are written, so two concurrent runs cannot both allocate
+the same listing.
+
+Usage:
+    python matching.py run [--capacity 3] [--dry-run]
+    python matching.py bench [--listings 100000] [--receivers 100000] [--claims 100000] [--seed 7]
+"""
+import argparse
+import datetime
+import heapq
+import random
+import time
+from collections import defaultdict
+
+from MySQLdb.cursors import SSCursor
+
+import db
+import query_cache
+import summary
+import synthetic
+
+ACTIVE_STATUSES = ("Pending", "Completed")
+LOCK_NAME = "matching"
+LOCK_TIMEOUT = 30
+
+
+def _city(value):
+    return (value or "").strip().casefold()
+
+
+class MatchingEngine:
+
+    def __init__(self, receivers, history=None, capacity=3):
+        """
+        ``receivers``: iterable of (Receiver_ID, City).
+        ``history``: {Receiver_ID: {(Food_Type, Meal_Type): claim count}}.
+        ``capacity``: most listings one receiver may get in a single run.
+        """
+        history = history or {}
+        self.capacity = capacity
+        self.allocated = defaultdict(int)
+        self._demand = {}
+        self._by_city = defaultdict(list)
+        self._by_kind = defaultdict(list)
+        for receiver_id, city in receivers:
+            city = _city(city)
+            kinds = history.get(receiver_id, {})
+            demand = sum(kinds.values())
+            self._demand[receiver_id] = demand
+            self._by_city[city].append((0, 0, -demand, receiver_id))
+            for (food_type, meal_type), count in kinds.items():
+                self._by_kind[(city, food_type, meal_type)].append((0, -count, -demand, receiver_id))
+        for heap in self._by_city.values():
+            heapq.heapify(heap)
+        for heap in self._by_kind.values():
+            heapq.heapify(heap)
+
+    def _peek(self, heap):
+        while heap:
+            allocated, affinity, demand, receiver_id = heap[0]
+            current = self.allocated[receiver_id]
+            if current >= self.capacity:
+                heapq.heappop(heap)
+            elif current != allocated:
+                heapq.heapreplace(heap, (current, affinity, demand, receiver_id))
+            else:
+                return heap[0]
+        return None
+
+    def offer(self, city, food_type, meal_type):
+        """Allocate one listing; return the chosen Receiver_ID or None."""
+        city = _city(city)
+        candidates = []
+        kind_heap = self._by_kind.get((city, food_type, meal_type))
+        if kind_heap:
+            top = self._peek(kind_heap)
+            if top:
+                candidates.append(top)
+        city_heap = self._by_city.get(city)
+        if city_heap:
+            top = self._peek(city_heap)
+            if top:
+                candidates.append(top)
+        if not candidates:
+            return None
+        receiver_id = min(candidates)[3]
+        self.allocated[receiver_id] += 1
+        return receiver_id
+
+    def match(self, listings):
+        """
+        Allocate ``listings`` -- iterable of (Food_ID, Location, Food_Type,
+        Meal_Type, Expiry_Date) -- soonest expiry first. Returns a list of
+        (Food_ID, Receiver_ID) pairs.
+        """
+        queue = [(expiry, food_id, city, food_type, meal_type)
+                 for food_id, city, food_type, meal_type, expiry in listings]
+        heapq.heapify(queue)
+        pairs = []
+        while queue:
+            _, food_id, city, food_type, meal_type = heapq.heappop(queue)
+            receiver_id = self.offer(city, food_type, meal_type)
+            if receiver_id is not None:
+                pairs.append((food_id, receiver_id))
+        return pairs
+
+
+# -----------------------------
+# DATABASE I/O
+# -----------------------------
+def load_inputs(conn):
+    """Read unclaimed, unexpired listings, receivers and claim history."""
+    cursor = conn.cursor(SSCursor)
+    try:
+        cursor.execute(
+            "SELECT f.Food_ID, f.Location, f.Food_Type, f.Meal_Type, f.Expiry_Date FROM food_listings f "
+            "WHERE f.Expiry_Date >= CURDATE() AND f.Quantity > 0 AND NOT EXISTS ("
+            "SELECT 1 FROM claims c WHERE c.Food_ID = f.Food_ID AND c.Status IN (%s, %s))",
+            ACTIVE_STATUSES)
+        listings = cursor.fetchall()
+        cursor.execute("SELECT Receiver_ID, City FROM receivers")
+        receivers = cursor.fetchall()
+        cursor.execute(
+            "SELECT c.Receiver_ID, f.Food_Type, f.Meal_Type, COUNT(*) FROM claims c "
+            "JOIN food_listings f ON f.Food_ID = c.Food_ID WHERE c.Status IN (%s, %s) "
+            "GROUP BY c.Receiver_ID, f.Food_Type, f.Meal_Type",
+            ACTIVE_STATUSES)
+        history = defaultdict(dict)
+        for receiver_id, food_type, meal_type, count in cursor.fetchall():
+            history[receiver_id][(food_type, meal_type)] = count
+    finally:
+        cursor.close()
+    return listings, receivers, history
+
+
+def write_claims(conn, pairs, status="Pending"):
+    """Insert one claim per (Food_ID, Receiver_ID) pair in a single transaction."""
+    if not pairs:
+        return 0
+    now = datetime.datetime.now().replace(microsecond=0)
+    with db.transaction(conn) as tx:
+        first_id = db.next_id(tx, "claims", "Claim_ID")
+        rows = [(first_id + i, food_id, receiver_id, status, now)
+                for i, (food_id, receiver_id) in enumerate(pairs)]
+        tx.executemany(
+            "INSERT INTO claims (Claim_ID, Food_ID, Receiver_ID, Status, Timestamp) VALUES (%s, %s, %s, %s, %s)",
+            rows)
+        summary.record_changes(tx, "claims", [(None, {"Status": status})] * len(rows))
+    query_cache.invalidate("claims", summary.TABLE)
+    return len(rows)
+
+
+def run(conn, capacity=3, dry_run=False):
+    """Allocate every available listing and log the claims; return a report."""
+    with db.named_lock(conn, LOCK_NAME, LOCK_TIMEOUT):
+        start = time.perf_counter()
+        listings, receivers, history = load_inputs(conn)
+        loaded = time.perf_counter()
+        pairs = MatchingEngine(receivers, history, capacity).match(listings)
+        matched = time.perf_counter()
+        written = 0 if dry_run else write_claims(conn, pairs)
+    return {
+        "listings": len(listings),
+        "receivers": len(receivers),
+        "matched": len(pairs),
+        "written": written,
+        "load_seconds": round(loaded - start, 3),
+        "match_seconds": round(matched - loaded, 3),
+        "write_seconds": round(time.perf_counter() - matched, 3),
+    }
+
+
+# -----------------------------
+# BENCHMARK
+# -----------------------------
+def benchmark(n_listings, n_receivers, n_claims, seed=7, capacity=3, n_cities=None, data_dir="data"):
+    rng = random.Random(seed)
+    profile = synthetic.load_profile(data_dir)
+    cities = synthetic.city_pool(profile, n_cities or max(1, n_receivers // 100), rng)
+    receivers = synthetic.generate_receivers(n_receivers, profile, cities, rng)
+    listings = synthetic.generate_listings(n_listings, profile, cities, rng)
+    claims = synthetic.generate_claims(n_claims, profile, [l["Food_ID"] for l in listings],
+                                       [r["Receiver_ID"] for r in receivers], rng)
+
+    kinds = {row["Food_ID"]: (row["Food_Type"], row["Meal_Type"]) for row in listings}
+    history = defaultdict(lambda: defaultdict(int))
+    for claim in claims:
+        if claim["Status"] in ACTIVE_STATUSES:
+            history[claim["Receiver_ID"]][kinds[claim["Food_ID"]]] += 1
+
+    start = time.perf_counter()
+    engine = MatchingEngine(((r["Receiver_ID"], r["City"]) for r in receivers), history, capacity)
+    built = time.perf_counter()
+    pairs = engine.match((l["Food_ID"], l["Location"], l["Food_Type"], l["Meal_Type"], l["Expiry_Date"])
+                         for l in listings)
+    done = time.perf_counter()
+    return {
+        "listings": n_listings,
+        "receivers": n_receivers,
+        "claims_history": n_claims,
+        "cities": len(cities),
+        "matched": len(pairs),
+        "build_seconds": round(built - start, 3),
+        "match_seconds": round(done - built, 3),
+        "listings_per_sec": round(n_listings / (done - built), 1) if done > built else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Allocate available listings to receivers.")
+    parser.add_argument("command", choices=["run", "bench"])
+    parser.add_argument("--capacity", type=int, default=3, help="max listings per receiver per run")
+    parser.add_argument("--dry-run", action="store_true", help="match but do not write claims")
+    parser.add_argument("--listings", type=int, default=100000)
+    parser.add_argument("--receivers", type=int, default=100000)
+    parser.add_argument("--claims", type=int, default=100000)
+    parser.add_argument("--cities", type=int)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        report = benchmark(args.listings, args.receivers, args.claims, args.seed, args.capacity, args.cities)
+    else:
+        conn = db.connect()
+        try:
+            report = run(conn, args.capacity, args.dry_run)
+        finally:
+            conn.close()
+    for name, value in report.items():
+        print(f"{name:<18}{value}")
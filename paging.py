@@ -0,0 +1,158 @@
+"""
+Keyset pagination, count estimates and unbuffered exports.
+
+Pages are addressed by the sort key of the last row already shown
+(``WHERE (k1, k2) > (%s, %s) ORDER BY k1, k2 LIMIT n``), so fetching page
+10,000 costs the same index range read as page 1 and no session ever holds
+more than one page of rows. A NULL sort key compares as NULL in a row
+constructor, so a page that starts after one spells out the comparison,
+with NULL sorting first as it does in MySQL's ORDER BY.
+
+Usage:
+    python paging.py export <table> <out.csv>   # stream a full table to disk
+"""
+import csv
+import io
+import sys
+
+from MySQLdb.cursors import SSCursor
+from decouple import config
+
+import db
+
+# Below this many estimated rows an exact COUNT(*) is cheap enough to run.
+EXACT_COUNT_BELOW = 10000
+# Browser downloads stop here; bigger exports go through `python paging.py export`.
+EXPORT_ROW_CAP = config('export_row_cap', default=50000, cast=int)
+
+
+def _after(order_by, after):
+    """``WHERE`` fragment and params for rows sorting after the key ``after``."""
+    if len(order_by) == 1:
+        return f"{order_by[0]} > %s", [after[0]]
+    if None not in after:
+        return f"({', '.join(order_by)}) > ({', '.join(['%s'] * len(order_by))})", list(after)
+    # Expand (k1, k2, ...) > (v1, v2, ...) by hand; the last key is unique and never NULL.
+    col, value = order_by[0], after[0]
+    rest, rest_params = _after(order_by[1:], after[1:])
+    if value is None:
+        return f"({col} IS NOT NULL OR ({col} IS NULL AND {rest}))", rest_params
+    return f"({col} > %s OR ({col} = %s AND {rest}))", [value, value, *rest_params]
+
+
+def keyset_page(cursor, table, columns="*", order_by=("id",), where="1=1", params=(), after=None, page_size=50):
+    """
+    Return ``(rows, next_after)`` for one page. ``order_by`` must end in a
+    unique column; ``next_after`` is None on the last page.
+    """
+    sql = f"SELECT {columns} FROM {table} WHERE {where}"
+    params = list(params)
+    if after is not None:
+        predicate, after_params = _after(order_by, after)
+        sql += f" AND {predicate}"
+        params.extend(after_params)
+    sql += f" ORDER BY {', '.join(order_by)} LIMIT %s"
+    params.append(page_size + 1)
+    cursor.execute(sql, params)
+    rows = list(cursor.fetchall())
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, tuple(rows[-1][col] for col in order_by)
+
+
+def estimate_count(cursor, table, where="1=1", params=()):
+    """
+    Cheap row-count estimate: table statistics for an unfiltered table, the
+    optimizer's row estimate otherwise, and an exact count when that is small.
+    Returns ``(count, exact)``.
+    """
+    if where == "1=1":
+        cursor.execute(
+            "SELECT TABLE_ROWS AS n FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,))
+        row = cursor.fetchone()
+        estimate = int(row['n'] or 0) if row else 0
+    else:
+        cursor.execute(f"EXPLAIN SELECT 1 FROM {table} WHERE {where}", list(params))
+        plan = cursor.fetchone() or {}
+        estimate = int((plan.get('rows') or 0) * float(plan.get('filtered') or 100) / 100)
+    if estimate < EXACT_COUNT_BELOW:
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {table} WHERE {where}", list(params))
+        return cursor.fetchone()['n'], True
+    return estimate, False
+
+
+def fetch_page(cursor, table, order_by, columns="*", where="1=1", params=(), after=None, page_size=50):
+    """One page plus its count estimate, as a dict ready for rendering."""
+    rows, next_after = keyset_page(cursor, table, columns, order_by, where, params, after, page_size)
+    total, exact = estimate_count(cursor, table, where, params)
+    return {"rows": rows, "next_after": next_after, "total": total, "exact": exact}
+
+
+# -----------------------------
+# STREAMING EXPORT
+# -----------------------------
+def stream_csv(conn, sql, params=(), chunk_rows=5000, max_rows=None, stats=None):
+    """
+    Yield CSV text in chunks straight off an unbuffered (server-side) cursor,
+    so only ``chunk_rows`` rows are ever held in memory.
+
+    With ``max_rows``, ``sql`` (which must not carry its own LIMIT) is cut off
+    after that many rows. ``stats``, if given, receives the rows written and
+    whether the result was truncated.
+    """
+    params = list(params)
+    if max_rows is not None:
+        # One row past the cap shows truncation without leaving a long
+        # result pending on the unbuffered cursor.
+        sql += " LIMIT %s"
+        params.append(max_rows + 1)
+    stats = {} if stats is None else stats
+    stats.update(rows=0, truncated=False)
+    cursor = conn.cursor(SSCursor)
+    try:
+        cursor.execute(sql, params)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([col[0] for col in cursor.description])
+        while not stats["truncated"]:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            if max_rows is not None and stats["rows"] + len(rows) > max_rows:
+                rows = rows[:max_rows - stats["rows"]]
+                stats["truncated"] = True
+            writer.writerows(rows)
+            stats["rows"] += len(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        cursor.close()
+
+
+def export_csv(conn, sql, params, out, chunk_rows=5000, max_rows=None, stats=None):
+    """Write the result of ``sql`` to the text file object ``out``; return characters written."""
+    written = 0
+    for chunk in stream_csv(conn, sql, params, chunk_rows, max_rows, stats):
+        written += out.write(chunk)
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        sys.exit(__doc__)
+    _, _, table, path = sys.argv
+    if table not in ("providers", "receivers", "food_listings", "claims"):
+        sys.exit(f"Unknown table: {table}")
+    conn = db.connect()
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            size = export_csv(conn, f"SELECT * FROM {table}", (), out)
+        print(f"Exported {table} to {path} ({size:,} characters).")
+    finally:
+        conn.close()
@@ -0,0 +1,361 @@
+"""
+Query instrumentation for the Streamlit app.
+
+Pooled connections hand out ProfiledCursor, a DictCursor that times every
+execute() and records the rows and (approximate) bytes it returned. Samples
+are tagged with the page and section that issued them -- set with tag() and
+section(), and carried into executor.py worker threads -- and aggregated per
+(page, section, statement shape) into latency histograms, p50/p95/p99
+estimates and a slow-query log. frame() does the same for DataFrame
+construction.
+
+The aggregates are process-wide and can be exported in the Prometheus text
+format: render_prometheus() for the admin page, a periodically rewritten
+file (metrics_file) and an optional HTTP endpoint (metrics_port).
+"""
+import bisect
+import contextvars
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from MySQLdb.cursors import DictCursor
+from decouple import config
+
+SLOW_QUERY_SECONDS = config('slow_query_ms', default=500, cast=int) / 1000
+SLOW_QUERY_LOG = config('slow_query_log', default='')
+METRICS_FILE = config('metrics_file', default='')
+METRICS_PORT = config('metrics_port', default=0, cast=int)
+EXPORT_EVERY = config('metrics_export_seconds', default=15.0, cast=float)
+
+# Prometheus-style latency buckets, in seconds.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+OTHER = "<other>"
+
+_tags = contextvars.ContextVar("profiler_tags", default=("", ""))
+
+_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(sql):
+    """Collapse literals and whitespace so one statement shape maps to one series."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    shape = _IN_LIST_RE.sub("(?+)", _LITERAL_RE.sub("?", " ".join(sql.split())))
+    return shape if len(shape) <= 160 else shape[:157] + "..."
+
+
+def payload_bytes(rows):
+    size = 0
+    for row in rows:
+        for value in (row.values() if isinstance(row, dict) else row):
+            if isinstance(value, (str, bytes, bytearray)):
+                size += len(value)
+            elif value is not None:
+                size += 8
+    return size
+
+
+# -----------------------------
+# TAGGING
+# -----------------------------
+def tag(page=None, section=None):
+    """Set the page/section that subsequent queries in this context belong to."""
+    current_page, current_section = _tags.get()
+    _tags.set((current_page if page is None else page, current_section if section is None else section))
+
+
+@contextmanager
+def section(name):
+    page, _ = _tags.get()
+    token = _tags.set((page, name))
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+# -----------------------------
+# AGGREGATION
+# -----------------------------
+class _Series:
+
+    def __init__(self, samples):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.slow = 0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=samples)
+
+    def add(self, seconds, rows, size, slow):
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += size
+        self.slow += slow
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Profiler:
+
+    def __init__(self, slow_after=0.5, slow_log_size=200, max_series=500, samples=1024, slow_log_path=""):
+        self.slow_after = slow_after
+        self.max_series = max_series
+        self.samples = samples
+        self.slow_log_path = slow_log_path
+        self._lock = threading.Lock()
+        self._series = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self.started_at = time.time()
+
+    def record(self, kind, sql, seconds, rows=0, size=0, params=None):
+        page, section_name = _tags.get()
+        shape = fingerprint(sql) if kind == "query" else sql
+        slow = seconds >= self.slow_after
+        with self._lock:
+            key = (kind, page, section_name, shape)
+            series = self._series.get(key)
+            if series is None:
+                # Ad-hoc terminal SQL could otherwise create unbounded series.
+                if len(self._series) >= self.max_series:
+                    key = (kind, page, section_name, OTHER)
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _Series(self.samples)
+            series.add(seconds, rows, size, slow)
+            if slow:
+                entry = {
+                    "at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "kind": kind,
+                    "page": page,
+                    "section": section_name,
+                    "ms": round(seconds * 1000, 1),
+                    "rows": rows,
+                    "bytes": size,
+                    "sql": " ".join(str(sql).split())[:2000],
+                    "params": repr(params)[:500] if params is not None else None,
+                }
+                self._slow.appendleft(entry)
+        if slow and self.slow_log_path:
+            with open(self.slow_log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry) + "\n")
+
+    def summary(self):
+        """One dict per series, slowest p95 first."""
+        with self._lock:
+            items = [(key, series, series.quantiles()) for key, series in self._series.items()]
+        out = []
+        for (kind, page, section_name, shape), series, quantiles in items:
+            out.append({
+                "kind": kind,
+                "page": page,
+                "section": section_name,
+                "statement": shape,
+                "calls": series.count,
+                "p50_ms": round(quantiles[0.5] * 1000, 2),
+                "p95_ms": round(quantiles[0.95] * 1000, 2),
+                "p99_ms": round(quantiles[0.99] * 1000, 2),
+                "max_ms": round(series.max * 1000, 2),
+                "total_s": round(series.seconds, 3),
+                "avg_rows": round(series.rows / series.count, 1),
+                "avg_bytes": round(series.bytes / series.count),
+                "slow": series.slow,
+            })
+        return sorted(out, key=lambda row: row["p95_ms"], reverse=True)
+
+    def histogram(self, kind, page, section_name, shape):
+        """Return [(upper bound label, count)] for one series (non-cumulative)."""
+        with self._lock:
+            series = self._series.get((kind, page, section_name, shape))
+            counts = list(series.buckets) if series else [0] * (len(BUCKETS) + 1)
+        labels = [f"≤{bound * 1000:g} ms" for bound in BUCKETS] + [f">{BUCKETS[-1] * 1000:g} ms"]
+        return list(zip(labels, counts))
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._slow.clear()
+            self.started_at = time.time()
+
+    # -----------------------------
+    # PROMETHEUS TEXT FORMAT
+    # -----------------------------
+    def render_prometheus(self):
+        with self._lock:
+            items = [(key, series, series.quantiles(), list(series.buckets)) for key, series in self._series.items()]
+        lines = [
+            "# HELP app_query_duration_seconds Wall time of cursor executes and DataFrame builds.",
+            "# TYPE app_query_duration_seconds histogram",
+        ]
+        for key, series, _, buckets in items:
+            labels = _labels(key)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'app_query_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"app_query_duration_seconds_sum{{{labels}}} {series.seconds:.6f}")
+            lines.append(f"app_query_duration_seconds_count{{{labels}}} {series.count}")
+
+        lines += [
+            "# HELP app_query_latency_seconds Latency quantiles over the most recent samples.",
+            "# TYPE app_query_latency_seconds summary",
+        ]
+        for key, series, quantiles, _ in items:
+            labels = _labels(key)
+            for q, value in quantiles.items():
+                lines.append(f'app_query_latency_seconds{{{labels},quantile="{q:g}"}} {value:.6f}')
+            lines.append(f"app_query_latency_seconds_sum{{{labels}}} {series.seconds:.6f}")
+            lines.append(f"app_query_latency_seconds_count{{{labels}}} {series.count}")
+
+        for name, attr, help_text in (
+            ("app_query_rows_total", "rows", "Rows returned (or affected) by cursor executes."),
+            ("app_query_bytes_total", "bytes", "Approximate payload bytes fetched."),
+            ("app_slow_queries_total", "slow", "Executions slower than the slow-query threshold."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for key, series, _, _ in items:
+                lines.append(f"{name}{{{_labels(key)}}} {getattr(series, attr)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(key):
+    kind, page, section_name, shape = key
+    return (f'kind="{_escape(kind)}",page="{_escape(page)}",'
+            f'section="{_escape(section_name)}",statement="{_escape(shape)}"')
+
+
+profiler = Profiler(
+    slow_after=SLOW_QUERY_SECONDS,
+    slow_log_size=config('slow_query_log_size', default=200, cast=int),
+    max_series=config('profiler_max_series', default=500, cast=int),
+    samples=config('profiler_samples', default=1024, cast=int),
+    slow_log_path=SLOW_QUERY_LOG,
+)
+
+
+# -----------------------------
+# INSTRUMENTED CURSOR & DATAFRAMES
+# -----------------------------
+class ProfiledCursor(DictCursor):
+    """DictCursor that reports every execute() to the process-wide profiler."""
+
+    _batched = False
+
+    def execute(self, query, args=None):
+        if self._batched:
+            return super().execute(query, args)
+        start = time.perf_counter()
+        rows = ()
+        try:
+            result = super().execute(query, args)
+            # Store-result cursors hold the whole result set once execute()
+            # returns, so its wall time already includes the transfer.
+            rows = getattr(self, "_rows", None) or ()
+            return result
+        finally:
+            profiler.record("query", query, time.perf_counter() - start,
+                            rows=len(rows) if rows else max(self.rowcount or 0, 0),
+                            size=payload_bytes(rows), params=args)
+
+    def executemany(self, query, args):
+        start = time.perf_counter()
+        self._batched = True
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._batched = False
+            profiler.record("query", query, time.perf_counter() - start,
+                            rows=max(self.rowcount, 0), params=f"<{len(args) if args else 0} rows>")
+
+
+def frame(rows, **kwargs):
+    """pd.DataFrame(rows) with its construction time recorded under the current tags."""
+    start = time.perf_counter()
+    df = pd.DataFrame(rows, **kwargs)
+    profiler.record("dataframe", "pd.DataFrame", time.perf_counter() - start, rows=len(df))
+    return df
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+_last_export = 0.0
+_export_lock = threading.Lock()
+_server = None
+
+
+def maybe_export(path=METRICS_FILE, every=EXPORT_EVERY):
+    """Rewrite the metrics file if it is older than ``every`` seconds."""
+    global _last_export
+    if not path:
+        return False
+    with _export_lock:
+        if time.monotonic() - _last_export < every:
+            return False
+        _last_export = time.monotonic()
+    profiler.write_prometheus(path)
+    return True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = profiler.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporter(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve /metrics on ``port`` from a daemon thread; a no-op after the first call."""
+    global _server
+    if not port:
+        return None
+    with _export_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return _server
@@ -0,0 +1,75 @@
+"""
+SQL catalogue shared by the Streamlit pages and the offline tooling.
+
+Keeping the queries here (rather than inline in app.py) lets command-line
+tools import them without executing the Streamlit script.
+"""
+
+# -----------------------------
+# EXHIBITION DASHBOARD FILTERS
+# -----------------------------
+def listing_filters(city="All", provider="All", food_type="All", meal_type="All"):
+    """Return the (WHERE clause, params) pair for the live inventory filters."""
+    where = "1=1"
+    params = []
+    if city != "All": where += " AND Location = %s"; params.append(city)
+    if provider != "All": where += " AND Provider_ID = %s"; params.append(provider)
+    if food_type != "All": where += " AND Food_Type = %s"; params.append(food_type)
+    if meal_type != "All": where += " AND Meal_Type = %s"; params.append(meal_type)
+    return where, params
+
+
+# -----------------------------
+# CONCIERGE SQL INSIGHTS (The 15 Queries)
+# -----------------------------
+sql_queries = {
+    "1️⃣ Provider Density per City": "SELECT City, COUNT(*) AS Total FROM providers GROUP BY City;",
+    "2️⃣ Receiver Density per City": "SELECT City, COUNT(*) AS Total FROM receivers GROUP BY City;",
+    "3️⃣ Dominant Provider Classifications": "SELECT Type, COUNT(*) AS Total FROM providers GROUP BY Type ORDER BY Total DESC;",
+    "4️⃣ Delhi Provider Registry": "SELECT Name, Contact, City FROM providers WHERE City = 'Delhi';",
+    "5️⃣ Top Beneficiary Organizations": "SELECT r.Name, COUNT(c.Claim_ID) AS Claims FROM receivers r JOIN claims c ON r.Receiver_ID = c.Receiver_ID GROUP BY r.Name ORDER BY Claims DESC;",
+    "6️⃣ Global Inventory Volume": "SELECT SUM(Quantity) AS Total_Servings FROM food_listings;",
+    "7️⃣ Regional Supply Leaders": "SELECT Location, COUNT(*) AS Count FROM food_listings GROUP BY Location ORDER BY Count DESC;",
+    "8️⃣ Culinary Preference Trends": "SELECT Food_Type, COUNT(*) AS Count FROM food_listings GROUP BY Food_Type ORDER BY Count DESC;",
+    "9️⃣ Engagement per Listing": "SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claims FROM food_listings f LEFT JOIN claims c ON f.Food_ID = c.Food_ID GROUP BY f.Food_Name;",
+    "🔟 Provider Success Metrics": "SELECT p.Name, COUNT(c.Claim_ID) AS Success FROM providers p JOIN food_listings f ON p.Provider_ID = f.Provider_ID JOIN claims c ON f.Food_ID = c.Food_ID WHERE c.Status = 'Completed' GROUP BY p.Name ORDER BY Success DESC;",
+    "1️⃣1️⃣ Distribution Fulfillment Ratio": "SELECT Status, ROUND(COUNT(*) * 100 / (SELECT COUNT(*) FROM claims), 2) AS Percent FROM claims GROUP BY Status;",
+    "1️⃣2️⃣ Average Allocation per Receiver": "SELECT r.Name, ROUND(AVG(f.Quantity), 2) AS Avg FROM receivers r JOIN claims c ON r.Receiver_ID = c.Receiver_ID JOIN food_listings f ON c.Food_ID = f.Food_ID GROUP BY r.Name;",
+    "1️⃣3️⃣ Peak Demand Service Hours": "SELECT f.Meal_Type, COUNT(c.Claim_ID) AS Claims FROM food_listings f JOIN claims c ON f.Food_ID = c.Food_ID GROUP BY f.Meal_Type ORDER BY Claims DESC;",
+    "1️⃣4️⃣ Provider Contribution Leaderboard": "SELECT p.Name, SUM(f.Quantity) AS Donated FROM providers p JOIN food_listings f ON p.Provider_ID = f.Provider_ID GROUP BY p.Name ORDER BY Donated DESC;",
+    "1️⃣5️⃣ Perishability Audit (Expired)": "SELECT COUNT(*) AS Expired FROM food_listings WHERE Expiry_Date < CURDATE();"
+}
+
+# Seconds each insight result may be served from the query cache. Registry
+# style queries change rarely; anything reading claims moves with every
+# logged claim, and #15 depends on CURDATE().
+INSIGHT_TTLS = {
+    "1️⃣ Provider Density per City": 600,
+    "2️⃣ Receiver Density per City": 600,
+    "3️⃣ Dominant Provider Classifications": 600,
+    "4️⃣ Delhi Provider Registry": 600,
+    "5️⃣ Top Beneficiary Organizations": 60,
+    "6️⃣ Global Inventory Volume": 120,
+    "7️⃣ Regional Supply Leaders": 120,
+    "8️⃣ Culinary Preference Trends": 120,
+    "9️⃣ Engagement per Listing": 60,
+    "🔟 Provider Success Metrics": 60,
+    "1️⃣1️⃣ Distribution Fulfillment Ratio": 60,
+    "1️⃣2️⃣ Average Allocation per Receiver": 60,
+    "1️⃣3️⃣ Peak Demand Service Hours": 60,
+    "1️⃣4️⃣ Provider Contribution Leaderboard": 120,
+    "1️⃣5️⃣ Perishability Audit (Expired)": 300,
+}
+
+# Equivalent reads served from summary_counters (see summary.py). Each scans
+# one row per group instead of re-aggregating the base tables.
+SUMMARY_QUERIES = {
+    "1️⃣ Provider Density per City": "SELECT Dim_Key AS City, Row_Count AS Total FROM summary_counters WHERE Dimension = 'providers.City' AND Row_Count > 0;",
+    "2️⃣ Receiver Density per City": "SELECT Dim_Key AS City, Row_Count AS Total FROM summary_counters WHERE Dimension = 'receivers.City' AND Row_Count > 0;",
+    "3️⃣ Dominant Provider Classifications": "SELECT Dim_Key AS Type, Row_Count AS Total FROM summary_counters WHERE Dimension = 'providers.Type' AND Row_Count > 0 ORDER BY Total DESC;",
+    "6️⃣ Global Inventory Volume": "SELECT Quantity_Sum AS Total_Servings FROM summary_counters WHERE Dimension = 'food_listings' AND Dim_Key = '*';",
+    "7️⃣ Regional Supply Leaders": "SELECT Dim_Key AS Location, Row_Count AS Count FROM summary_counters WHERE Dimension = 'food_listings.Location' AND Row_Count > 0 ORDER BY Count DESC;",
+    "8️⃣ Culinary Preference Trends": "SELECT Dim_Key AS Food_Type, Row_Count AS Count FROM summary_counters WHERE Dimension = 'food_listings.Food_Type' AND Row_Count > 0 ORDER BY Count DESC;",
+    "1️⃣1️⃣ Distribution Fulfillment Ratio": "SELECT s.Dim_Key AS Status, ROUND(s.Row_Count * 100 / t.Row_Count, 2) AS Percent FROM summary_counters s JOIN summary_counters t ON t.Dimension = 'claims' AND t.Dim_Key = '*' WHERE s.Dimension = 'claims.Status' AND s.Row_Count > 0;",
+    "1️⃣4️⃣ Provider Contribution Leaderboard": "SELECT p.Name, SUM(s.Quantity_Sum) AS Donated FROM summary_counters s JOIN providers p ON p.Provider_ID = CAST(s.Dim_Key AS UNSIGNED) WHERE s.Dimension = 'food_listings.Provider_ID' AND s.Row_Count > 0 GROUP BY p.Name ORDER BY Donated DESC;",
+}
@@ -0,0 +1,153 @@
+"""
+Process-wide result cache for read queries.
+
+Entries are keyed on the normalised SQL text plus its parameters and expire
+after a per-query TTL. Every entry remembers which tables its SQL reads, so a
+write to ``claims`` (for example) drops exactly the cached results that
+depend on ``claims`` and nothing else.
+
+Invalidation also bumps a per-table generation. fetch() notes the generations
+of the tables it reads before running the query and drops the result if a
+write invalidated any of them meanwhile, so a read that raced a commit can
+never re-insert the pre-write rows for a whole TTL.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from decouple import config
+
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+`?(\w+)`?', re.IGNORECASE)
+_READ_VERBS = ("SELECT", "WITH", "SHOW", "EXPLAIN", "DESCRIBE", "DESC")
+
+
+def referenced_tables(sql):
+    return frozenset(name.lower() for name in _TABLE_RE.findall(sql))
+
+
+def is_read_only(sql):
+    words = sql.lstrip(" \t\r\n(").split(None, 1)
+    return bool(words) and words[0].upper() in _READ_VERBS
+
+
+def _key(sql, params):
+    if isinstance(params, list):
+        params = tuple(params)
+    return " ".join(sql.split()), params
+
+
+class QueryCache:
+
+    def __init__(self, default_ttl=60, max_entries=512):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_table = {}
+        # Bumped by invalidate(): one counter per table, plus one for "everything".
+        self._generations = {}
+        self._epoch = 0
+        self._metrics = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evicted": 0, "raced": 0}
+
+    def generation(self, tables):
+        """A token that changes whenever any of ``tables`` is invalidated."""
+        with self._lock:
+            return self._epoch, tuple(self._generations.get(table, 0) for table in sorted(tables))
+
+    def get(self, sql, params=None):
+        key = _key(sql, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            expires, _, rows = entry
+            if expires < time.monotonic():
+                self._drop(key)
+                self._metrics["expired"] += 1
+                self._metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+            return rows
+
+    def put(self, sql, params, rows, ttl=None, generation=None):
+        """
+        Cache ``rows``; with the ``generation`` taken before the query ran,
+        skip them if one of its tables has been invalidated since.
+        """
+        key = _key(sql, params)
+        tables = referenced_tables(sql)
+        expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != (
+                    self._epoch, tuple(self._generations.get(table, 0) for table in sorted(tables))):
+                self._metrics["raced"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, tables, rows)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._metrics["evicted"] += 1
+
+    def fetch(self, cursor, sql, params=None, ttl=None):
+        """Return cached rows for ``sql``, running it on ``cursor`` on a miss."""
+        rows = self.get(sql, params)
+        if rows is None:
+            generation = self.generation(referenced_tables(sql))
+            cursor.execute(sql, params)
+            rows = tuple(cursor.fetchall())
+            self.put(sql, params, rows, ttl, generation)
+        return rows
+
+    def invalidate(self, *tables):
+        with self._lock:
+            if not tables:
+                self._epoch += 1
+                dropped = len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+            else:
+                keys = set()
+                for table in tables:
+                    table = table.lower()
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                    keys |= self._by_table.get(table, set())
+                for key in keys:
+                    self._drop(key)
+                dropped = len(keys)
+            self._metrics["invalidated"] += dropped
+
+    def invalidate_sql(self, sql):
+        """Invalidate whatever an arbitrary statement may have written to."""
+        if not is_read_only(sql):
+            # A write whose target we cannot parse clears the whole cache.
+            self.invalidate(*referenced_tables(sql))
+
+    def _drop(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+cache = QueryCache(
+    default_ttl=config('query_cache_ttl', default=60, cast=int),
+    max_entries=config('query_cache_size', default=512, cast=int),
+)
+fetch = cache.fetch
+invalidate = cache.invalidate
+invalidate_sql = cache.invalidate_sql
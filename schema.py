@@ -0,0 +1,159 @@
+"""
+Schema and index migrations for the food_wastage_management_system database.
+
+The base tables match the ones created in food_wastage.ipynb; INDEXES adds
+the secondary and composite indexes behind the dashboard filters, the CRUD
+lookups and the insight JOINs. Indexes are added online and only if missing,
+so the migration is safe to re-run.
+
+Usage:
+    python schema.py migrate            # create missing tables and indexes
+    python schema.py status             # list which indexes exist
+    python schema.py rebuild-fulltext   # re-create the search indexes without stopwords
+"""
+import sys
+
+import db
+import summary
+
+TABLES = {
+    "providers": """
+        CREATE TABLE IF NOT EXISTS providers (
+            Provider_ID INT PRIMARY KEY,
+            Name VARCHAR(255),
+            Type VARCHAR(100),
+            Address TEXT,
+            City VARCHAR(100),
+            Contact VARCHAR(50)
+        )
+    """,
+    "receivers": """
+        CREATE TABLE IF NOT EXISTS receivers (
+            Receiver_ID INT PRIMARY KEY,
+            Name VARCHAR(255),
+            Type VARCHAR(100),
+            City VARCHAR(100),
+            Contact VARCHAR(50)
+        )
+    """,
+    "food_listings": """
+        CREATE TABLE IF NOT EXISTS food_listings (
+            Food_ID INT PRIMARY KEY,
+            Food_Name VARCHAR(255),
+            Quantity INT,
+            Expiry_Date DATE,
+            Provider_ID INT,
+            Provider_Type VARCHAR(100),
+            Location VARCHAR(255),
+            Food_Type VARCHAR(100),
+            Meal_Type VARCHAR(100),
+            FOREIGN KEY (Provider_ID) REFERENCES providers(Provider_ID)
+        )
+    """,
+    "claims": """
+        CREATE TABLE IF NOT EXISTS claims (
+            Claim_ID INT PRIMARY KEY,
+            Food_ID INT,
+            Receiver_ID INT,
+            Status VARCHAR(50),
+            Timestamp DATETIME,
+            FOREIGN KEY (Food_ID) REFERENCES food_listings(Food_ID),
+            FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID)
+        )
+    """,
+}
+
+# (table, index name, column list, what it serves). InnoDB appends the primary
+# key to every secondary index, so e.g. idx_providers_city is ordered by
+# (City, Provider_ID) -- exactly the registry's keyset sort order.
+INDEXES = [
+    ("food_listings", "idx_listings_location", "Location, Food_Type, Meal_Type", "dashboard city filter (+ type/meal narrowing), insight #7"),
+    ("food_listings", "idx_listings_type_meal", "Food_Type, Meal_Type", "dashboard food type filter, insight #8"),
+    ("food_listings", "idx_listings_meal", "Meal_Type", "dashboard service time filter, insight #13"),
+    ("food_listings", "idx_listings_provider", "Provider_ID, Quantity", "provider filter and JOIN, covering SUM(Quantity) for #6/#14"),
+    ("food_listings", "idx_listings_expiry", "Expiry_Date", "perishability audit #15"),
+    ("food_listings", "idx_listings_name", "Food_Name", "GROUP BY Food_Name in #9, name prefix search"),
+    ("claims", "idx_claims_status_food", "Status, Food_ID", "Status filter in #10, GROUP BY Status in #11"),
+    ("claims", "idx_claims_receiver_food", "Receiver_ID, Food_ID", "receiver JOINs in #5/#12"),
+    ("claims", "idx_claims_food", "Food_ID, Status", "listing JOINs in #9/#10/#13"),
+    ("providers", "idx_providers_city", "City", "city lookups (#1, #4) and registry ordering"),
+    ("providers", "idx_providers_type", "Type", "insight #3"),
+    ("providers", "idx_providers_name", "Name", "GROUP BY Name in #10/#14, name prefix search"),
+    ("receivers", "idx_receivers_city", "City", "insight #2"),
+    ("receivers", "idx_receivers_name", "Name", "GROUP BY Name in #5/#12, name prefix search"),
+]
+
+# ngram FULLTEXT indexes behind search.py; ngram_token_size (default 2) sets
+# the token length used for both indexing and matching. They are built with
+# stopwords off: with ngram, InnoDB drops every token that *contains* a
+# stopword such as "a", "i" or "in", so "rice" would be indexed as just "ce".
+FULLTEXT_INDEXES = [
+    ("food_listings", "ft_listings_search", "Food_Name, Location"),
+    ("providers", "ft_providers_search", "Name, City"),
+    ("receivers", "ft_receivers_search", "Name, City"),
+]
+
+
+def existing_indexes(cursor):
+    cursor.execute(
+        "SELECT DISTINCT TABLE_NAME, INDEX_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE()")
+    return {(row['TABLE_NAME'], row['INDEX_NAME']) for row in cursor.fetchall()}
+
+
+def migrate(conn, log=print, rebuild_fulltext=False):
+    """
+    Create any missing tables and indexes; return the indexes added.
+    ``rebuild_fulltext`` drops and re-creates the FULLTEXT indexes, e.g. ones
+    built earlier with the default stopword list.
+    """
+    cursor = conn.cursor()
+    added = []
+    try:
+        for ddl in TABLES.values():
+            cursor.execute(ddl)
+        present = existing_indexes(cursor)
+        for table, name, columns, _ in INDEXES:
+            if (table, name) in present:
+                continue
+            log(f"adding {table}.{name} ({columns})")
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+            added.append((table, name))
+        # Read when the index is built, so it only has to hold for this session.
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        for table, name, columns in FULLTEXT_INDEXES:
+            if (table, name) in present:
+                if not rebuild_fulltext:
+                    continue
+                log(f"dropping {table}.{name} to rebuild it")
+                cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+            log(f"adding {table}.{name} FULLTEXT ({columns}) WITH PARSER ngram")
+            cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns}) WITH PARSER ngram")
+            added.append((table, name))
+    finally:
+        cursor.close()
+    summary.ensure(conn)
+    return added
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    conn = db.connect()
+    try:
+        if command in ("migrate", "rebuild-fulltext"):
+            added = migrate(conn, rebuild_fulltext=command == "rebuild-fulltext")
+            print(f"{len(added)} index(es) added.")
+        elif command == "status":
+            cur = conn.cursor()
+            present = existing_indexes(cur)
+            cur.close()
+            for table, name, columns, purpose in INDEXES:
+                mark = "ok     " if (table, name) in present else "MISSING"
+                print(f"{mark} {table}.{name} ({columns}) -- {purpose}")
+            for table, name, columns in FULLTEXT_INDEXES:
+                mark = "ok     " if (table, name) in present else "MISSING"
+                print(f"{mark} {table}.{name} FULLTEXT ngram ({columns}) -- registry search")
+        else:
+            sys.exit(__doc__)
+    finally:
+        conn.close()
@@ -0,0 +1,228 @@
+"""
+Ranked registry search used by the CRUD "View & Search" box.
+
+Food listings, providers and receivers are searched through InnoDB FULLTEXT
+indexes built with the ngram parser (see schema.FULLTEXT_INDEXES). The
+ngram parser splits both the text and the search term into 2-character
+tokens, so a partial word ("ric") still shares tokens with "Rice" and rows
+are ranked by how many they share. Transposed or mistyped letters ("rcie")
+can share no token at all, so when no hit contains the term itself, a typo
+pass compares it against the distinct column values that start with the
+same letter (a B-tree range) and puts the close matches first. Numeric terms
+also match the primary key, and one-character terms fall back to a prefix
+scan on the B-tree indexes. Claims only carry a short Status, which is matched fuzzily
+against the distinct status values. Until `python schema.py migrate` has
+added the FULLTEXT indexes, searches fall back to the LIKE predicate.
+
+Usage:
+    python search.py bench [term ...] [--repeat N]   # FULLTEXT vs the old LIKE path
+"""
+import argparse
+import difflib
+import statistics
+import time
+
+import MySQLdb
+
+import db
+
+REGISTRIES = {
+    "Food Listings": {"table": "food_listings", "id": "Food_ID", "columns": ("Food_Name", "Location")},
+    "Providers": {"table": "providers", "id": "Provider_ID", "columns": ("Name", "City")},
+    "Receivers": {"table": "receivers", "id": "Receiver_ID", "columns": ("Name", "City")},
+    "Claims": {"table": "claims", "id": "Claim_ID", "columns": ("Status",)},
+}
+FULLTEXT_TABLES = ("food_listings", "providers", "receivers")
+
+# ER_FT_MATCHING_KEY_NOT_FOUND: the FULLTEXT index has not been migrated yet.
+MISSING_FULLTEXT_INDEX = 1191
+
+# Exact phrase hits outrank rows that merely share some ngrams with the term.
+PHRASE_BOOST = 10
+
+# Typo pass: distinct values read per column, and the difflib similarity a
+# value needs to count as a near miss.
+TYPO_CANDIDATES = 2000
+TYPO_CUTOFF = 0.6
+
+
+def _phrase(term):
+    return '"' + term.replace('"', " ") + '"'
+
+
+def build_query(registry, term, limit=100):
+    """Return the (sql, params) that search() runs for FULLTEXT registries."""
+    spec = REGISTRIES[registry]
+    table, id_col, columns = spec["table"], spec["id"], ", ".join(spec["columns"])
+    term = term.strip()
+    if len(term) < 2:
+        prefix = " OR ".join(f"{col} LIKE %s" for col in spec["columns"])
+        params = [f"{term}%"] * len(spec["columns"])
+        return f"SELECT * FROM {table} WHERE {prefix} ORDER BY {id_col} LIMIT %s", params + [limit]
+
+    match = f"MATCH({columns}) AGAINST(%s IN NATURAL LANGUAGE MODE)"
+    phrase = f"MATCH({columns}) AGAINST(%s IN BOOLEAN MODE)"
+    sql = f"SELECT *, {match} + {PHRASE_BOOST} * {phrase} AS Relevance FROM {table} WHERE {match}"
+    params = [term, _phrase(term), term]
+    if term.isdigit():
+        sql = (f"SELECT *, 1000 AS Relevance FROM {table} WHERE {id_col} = %s UNION ALL "
+               f"({sql} AND {id_col} <> %s)")
+        params = [int(term)] + params + [int(term)]
+    sql += " ORDER BY Relevance DESC LIMIT %s"
+    return sql, params + [limit]
+
+
+def claims_query(term, statuses, limit=100):
+    """
+    Return the (sql, params) that search() runs for Claims, given the
+    distinct ``statuses`` on file, or None when nothing can match.
+    """
+    term = term.strip()
+    lowered = {s.lower(): s for s in statuses}
+    wanted = [s for s in statuses if s.lower().startswith(term.lower())]
+    wanted += [lowered[m] for m in difflib.get_close_matches(term.lower(), lowered, n=3, cutoff=0.6)
+               if lowered[m] not in wanted]
+    clauses, params = [], []
+    if term.isdigit():
+        clauses.append("Claim_ID = %s")
+        params.append(int(term))
+    if wanted:
+        clauses.append(f"Status IN ({', '.join(['%s'] * len(wanted))})")
+        params.extend(wanted)
+    if not clauses:
+        return None
+    return f"SELECT * FROM claims WHERE {' OR '.join(clauses)} ORDER BY Claim_ID DESC LIMIT %s", params + [limit]
+
+
+def claim_statuses(cursor):
+    """The distinct claim statuses on file, which claims_query() matches against."""
+    cursor.execute("SELECT DISTINCT Status FROM claims")
+    return [row['Status'] for row in cursor.fetchall() if row['Status']]
+
+
+def _search_claims(cursor, term, limit):
+    query = claims_query(term, claim_statuses(cursor), limit)
+    if query is None:
+        return []
+    cursor.execute(*query)
+    return list(cursor.fetchall())
+
+
+def _contains(row, spec, term):
+    term = term.lower()
+    return any(term in str(row.get(col) or "").lower() for col in spec["columns"])
+
+
+def candidates_query(registry, column, term):
+    """Return the (sql, params) the typo pass uses to list ``column`` values starting like ``term``."""
+    spec = REGISTRIES[registry]
+    first = term[0].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return (f"SELECT DISTINCT {column} AS value FROM {spec['table']} WHERE {column} LIKE %s LIMIT %s",
+            [first + "%", TYPO_CANDIDATES])
+
+
+def near_miss_query(registry, close, limit=100):
+    """Return the (sql, params) fetching rows whose column holds one of ``close`` ({column: values})."""
+    spec = REGISTRIES[registry]
+    clauses, params = [], []
+    for col, values in close.items():
+        clauses.append(f"{col} IN ({', '.join(['%s'] * len(values))})")
+        params.extend(values)
+    return f"SELECT * FROM {spec['table']} WHERE {' OR '.join(clauses)} ORDER BY {spec['id']} LIMIT %s", params + [limit]
+
+
+def _near_misses(cursor, registry, term, limit):
+    """Rows whose column value is within TYPO_CUTOFF similarity of ``term``."""
+    close = {}
+    for col in REGISTRIES[registry]["columns"]:
+        cursor.execute(*candidates_query(registry, col, term))
+        lowered = {row['value'].lower(): row['value'] for row in cursor.fetchall() if row['value']}
+        matches = [lowered[m] for m in difflib.get_close_matches(term.lower(), lowered, n=5, cutoff=TYPO_CUTOFF)]
+        if matches:
+            close[col] = matches
+    if not close:
+        return []
+    cursor.execute(*near_miss_query(registry, close, limit))
+    return list(cursor.fetchall())
+
+
+def search(cursor, registry, term, limit=100):
+    """Return up to ``limit`` rows of ``registry`` matching ``term``, best first."""
+    term = term.strip()
+    if not term:
+        return []
+    spec = REGISTRIES[registry]
+    if spec["table"] not in FULLTEXT_TABLES:
+        return _search_claims(cursor, term, limit)
+    sql, params = build_query(registry, term, limit)
+    try:
+        cursor.execute(sql, params)
+    except MySQLdb.OperationalError as err:
+        if err.args[0] != MISSING_FULLTEXT_INDEX:
+            raise
+        cursor.execute(*like_query(registry, term, limit))
+    rows = list(cursor.fetchall())
+    if len(term) >= 3 and not term.isdigit() and not any(_contains(row, spec, term) for row in rows):
+        near = _near_misses(cursor, registry, term, limit)
+        seen = {row[spec["id"]] for row in near}
+        rows = (near + [row for row in rows if row[spec["id"]] not in seen])[:limit]
+    return rows
+
+
+def like_query(registry, term, limit=100):
+    """The original leading-wildcard LIKE predicate, kept for benchmarking."""
+    spec = REGISTRIES[registry]
+    predicate = " OR ".join(f"{col} LIKE %s" for col in spec["columns"])
+    params = [f"%{term}%"] * len(spec["columns"])
+    return f"SELECT * FROM {spec['table']} WHERE {predicate} LIMIT %s", params + [limit]
+
+
+# -----------------------------
+# BENCHMARK
+# -----------------------------
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples), result
+
+
+def benchmark(conn, terms, repeat=5, out=print):
+    cursor = conn.cursor()
+    results = []
+    try:
+        out(f"{'registry':<15}{'term':<14}{'LIKE p50 ms':>12}{'max':>9}{'SEARCH p50 ms':>15}{'max':>9}{'hits':>7}")
+        for registry in REGISTRIES:
+            for term in terms:
+                like_sql, like_params = like_query(registry, term)
+
+                def run_like():
+                    cursor.execute(like_sql, like_params)
+                    return cursor.fetchall()
+
+                like_p50, like_max, _ = _time(run_like, repeat)
+                search_p50, search_max, rows = _time(lambda: search(cursor, registry, term), repeat)
+                results.append({
+                    "registry": registry, "term": term,
+                    "like_p50_ms": like_p50, "search_p50_ms": search_p50, "hits": len(rows),
+                })
+                out(f"{registry:<15}{term:<14}{like_p50:>12.2f}{like_max:>9.2f}{search_p50:>15.2f}{search_max:>9.2f}{len(rows):>7}")
+    finally:
+        cursor.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FULLTEXT search against the LIKE path.")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("terms", nargs="*", default=["rice", "ric", "rcie", "delhi", "pending", "smith", "42"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = db.connect()
+    try:
+        benchmark(conn, args.terms, args.repeat)
+    finally:
+        conn.close()
@@ -0,0 +1,307 @@
+"""
+Columnar Parquet snapshots of the providers, receivers, food_listings and
+claims tables.
+
+export() reads all four tables inside one consistent-read transaction,
+streaming tuples off an unbuffered cursor straight into Arrow columns (no
+per-row dicts), and writes Parquet files partitioned by city and month:
+
+    snapshots/food_listings/city_bucket=07/month=2025-03/part-000012.parquet
+
+Cities are hashed into ``snapshot_city_buckets`` buckets, so a registry with
+thousands of distinct cities does not turn into thousands of one-row files.
+Every refresh is a full export: the tables carry no updated-at column to
+key an incremental read on, so all rows are re-read, and only the writes are
+incremental. Files are immutable and named after the snapshot generation
+plus a per-export token, and manifest.json lists the live set. A refresh
+rewrites only the partitions whose content changed and then swaps the
+manifest. Each file is written under a temporary name and moved into place,
+and exports hold the "snapshot_export" named lock, so two refreshes never
+interleave. Superseded files are deleted one refresh later, so a reader
+holding the previous manifest can still open them.
+
+Usage:
+    python snapshot.py export [--tables claims ...]   # refresh from MySQL
+    python snapshot.py status                         # generation, age, partitions
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from MySQLdb.cursors import SSCursor
+from decouple import config
+
+import db
+
+SNAPSHOT_DIR = config('snapshot_dir', default='snapshots')
+CITY_BUCKETS = config('snapshot_city_buckets', default=16, cast=int)
+MAX_AGE = config('snapshot_max_age', default=900, cast=int)
+MANIFEST = "manifest.json"
+FETCH_ROWS = 50000
+LOCK_NAME = "snapshot_export"
+LOCK_TIMEOUT = 300
+
+SCHEMAS = {
+    "providers": pa.schema([
+        ("Provider_ID", pa.int32()), ("Name", pa.string()), ("Type", pa.string()),
+        ("Address", pa.string()), ("City", pa.string()), ("Contact", pa.string()),
+    ]),
+    "receivers": pa.schema([
+        ("Receiver_ID", pa.int32()), ("Name", pa.string()), ("Type", pa.string()),
+        ("City", pa.string()), ("Contact", pa.string()),
+    ]),
+    "food_listings": pa.schema([
+        ("Food_ID", pa.int32()), ("Food_Name", pa.string()), ("Quantity", pa.int32()),
+        ("Expiry_Date", pa.date32()), ("Provider_ID", pa.int32()), ("Provider_Type", pa.string()),
+        ("Location", pa.string()), ("Food_Type", pa.string()), ("Meal_Type", pa.string()),
+    ]),
+    "claims": pa.schema([
+        ("Claim_ID", pa.int32()), ("Food_ID", pa.int32()), ("Receiver_ID", pa.int32()),
+        ("Status", pa.string()), ("Timestamp", pa.timestamp("s")),
+    ]),
+}
+
+# (city column, month column) per table. Claims have no city of their own and
+# are partitioned by the city of the listing they claim.
+PARTITIONS = {
+    "providers": ("City", None),
+    "receivers": ("City", None),
+    "food_listings": ("Location", "Expiry_Date"),
+    "claims": ("Listing_City", "Timestamp"),
+}
+
+SELECTS = {
+    "claims": "SELECT c.Claim_ID, c.Food_ID, c.Receiver_ID, c.Status, c.Timestamp, f.Location AS Listing_City "
+              "FROM claims c LEFT JOIN food_listings f ON f.Food_ID = c.Food_ID",
+}
+
+
+def city_bucket(city):
+    # Casefolded, so cities that MySQL's case-insensitive collation treats as
+    # equal land in the same bucket.
+    return zlib.crc32((city or "").strip().casefold().encode("utf-8")) % CITY_BUCKETS
+
+
+def _read_schema(table):
+    schema = SCHEMAS[table]
+    city_column = PARTITIONS[table][0]
+    if city_column not in schema.names:
+        schema = schema.append(pa.field(city_column, pa.string()))
+    return schema
+
+
+# -----------------------------
+# READ FROM MYSQL
+# -----------------------------
+def read_table(conn, table, fetch_rows=FETCH_ROWS):
+    """Stream one table into an Arrow table, ``fetch_rows`` tuples at a time."""
+    schema = _read_schema(table)
+    sql = SELECTS.get(table, f"SELECT {', '.join(schema.names)} FROM {table}")
+    cursor = conn.cursor(SSCursor)
+    batches = []
+    try:
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            batches.append(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+    finally:
+        cursor.close()
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+# -----------------------------
+# PARTITIONED WRITES
+# -----------------------------
+def partitions(table_name, table):
+    """Yield (relative partition dir, rows) pairs, each sorted by primary key."""
+    city_column, month_column = PARTITIONS[table_name]
+    key_column = SCHEMAS[table_name].names[0]
+    if table.num_rows == 0:
+        return
+
+    encoded = pc.dictionary_encode(table[city_column], null_encoding="encode").combine_chunks()
+    bucket_of = np.array([city_bucket(city) for city in encoded.dictionary.to_pylist()], dtype=np.int64)
+    buckets = bucket_of[encoded.indices.to_numpy(zero_copy_only=False)]
+    if month_column:
+        dates = table[month_column]
+        months = pc.fill_null(pc.add(pc.multiply(pc.year(dates), 100), pc.month(dates)), 0).to_numpy()
+    else:
+        months = np.zeros(table.num_rows, dtype=np.int64)
+    keys = buckets * 1_000_000 + months
+
+    order = np.lexsort((table[key_column].to_numpy(), keys))
+    keys = keys[order]
+    table = table.take(pa.array(order)).select(SCHEMAS[table_name].names).combine_chunks()
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]))
+    for start, end in zip(starts[:-1], starts[1:]):
+        bucket, month = divmod(int(keys[start]), 1_000_000)
+        rel = f"city_bucket={bucket:02d}"
+        if month_column:
+            rel += f"/month={month // 100:04d}-{month % 100:02d}" if month else "/month=unknown"
+        yield rel, table.slice(start, end - start)
+
+
+def _digest(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table.combine_chunks())
+    return hashlib.sha1(sink.getvalue()).hexdigest()
+
+
+def load_manifest(root=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_atomic(write, path):
+    """Call ``write(tmp path)``, then move the finished file to ``path``."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        _remove_quietly(tmp)
+        raise
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_snapshot(tables, root=SNAPSHOT_DIR):
+    """
+    Write ``{table name: Arrow table}`` as the next snapshot generation,
+    reusing unchanged partitions. Tables not passed keep their current files.
+    """
+    manifest = load_manifest(root)
+    generation = manifest.get("generation", 0) + 1
+    token = uuid.uuid4().hex[:8]
+    tables_meta = dict(manifest.get("tables", {}))
+    retired = []
+    written = reused = 0
+    for name, table in tables.items():
+        previous = tables_meta.get(name, {}).get("partitions", {})
+        current = {}
+        for rel, rows in partitions(name, table):
+            digest = _digest(rows)
+            old = previous.get(rel)
+            if old and old["digest"] == digest and os.path.exists(os.path.join(root, old["file"])):
+                current[rel] = old
+                reused += 1
+                continue
+            file = f"{name}/{rel}/part-{generation:06d}-{token}.parquet"
+            os.makedirs(os.path.dirname(os.path.join(root, file)), exist_ok=True)
+            _write_atomic(lambda tmp, rows=rows: pq.write_table(rows, tmp), os.path.join(root, file))
+            current[rel] = {"file": file, "rows": rows.num_rows, "digest": digest}
+            written += 1
+        retired += [old["file"] for rel, old in previous.items() if current.get(rel) is not old]
+        tables_meta[name] = {"rows": table.num_rows, "partitions": current}
+
+    os.makedirs(root, exist_ok=True)
+    content = {"generation": generation, "exported_at": time.time(), "tables": tables_meta, "retired": retired}
+
+    def write_manifest(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(content, f)
+
+    _write_atomic(write_manifest, os.path.join(root, MANIFEST))
+    for file in manifest.get("retired", []):
+        _remove_quietly(os.path.join(root, file))
+    return {"generation": generation, "written": written, "reused": reused, "retired": len(retired)}
+
+
+def export(conn, root=SNAPSHOT_DIR, tables=None):
+    """Snapshot ``tables`` (default: all four) from one consistent read."""
+    with db.named_lock(conn, LOCK_NAME, LOCK_TIMEOUT):
+        start = time.perf_counter()
+        with db.transaction(conn):
+            data = {name: read_table(conn, name) for name in (tables or SCHEMAS)}
+        read = time.perf_counter()
+        report = write_snapshot(data, root)
+    report.update(
+        rows=sum(table.num_rows for table in data.values()),
+        read_seconds=round(read - start, 3),
+        write_seconds=round(time.perf_counter() - read, 3),
+    )
+    return report
+
+
+# -----------------------------
+# BACKGROUND REFRESH
+# -----------------------------
+_refresh_lock = threading.Lock()
+last_error = None
+
+
+def age(root=SNAPSHOT_DIR):
+    """Seconds since the last export, or None if there is no snapshot yet."""
+    exported_at = load_manifest(root).get("exported_at")
+    return None if exported_at is None else time.time() - exported_at
+
+
+def refresh_async(max_age=MAX_AGE, root=SNAPSHOT_DIR):
+    """Start a background export if the snapshot is older than ``max_age`` seconds."""
+    current = age(root)
+    if current is not None and current < max_age:
+        return False
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def work():
+        global last_error
+        try:
+            conn = db.connect()
+            try:
+                export(conn, root)
+                last_error = None
+            finally:
+                conn.close()
+        except Exception as err:
+            last_error = err
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=work, name="snapshot-refresh", daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar Parquet snapshots of the registry tables.")
+    parser.add_argument("command", choices=["export", "status"])
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--tables", nargs="+", choices=list(SCHEMAS))
+    args = parser.parse_args()
+
+    if args.command == "export":
+        conn = db.connect()
+        try:
+            for name, value in export(conn, args.dir, args.tables).items():
+                print(f"{name:<15}{value}")
+        finally:
+            conn.close()
+    else:
+        manifest = load_manifest(args.dir)
+        if not manifest:
+            raise SystemExit(f"No snapshot in {args.dir}/")
+        print(f"generation {manifest['generation']}, {age(args.dir):.0f}s old")
+        for name, meta in manifest["tables"].items():
+            print(f"{name:<15}{meta['rows']:>10} rows in {len(meta['partitions'])} partitions")
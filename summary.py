@@ -0,0 +1,195 @@
+"""
+Pre-aggregated counters behind the dashboard metric cards and insights.
+
+``summary_counters`` holds one row per (dimension, key) -- e.g.
+("food_listings.Location", "Delhi") -- with a row count and, for
+food_listings, the summed Quantity. The CRUD page applies +1/-1 deltas in
+the same transaction as each write, so readers scan O(groups) rows instead
+of re-aggregating the base tables. Rebuilds run one at a time, across
+threads and processes, under the "summary_rebuild" named lock.
+
+Usage:
+    python summary.py rebuild     # recompute every counter from the base tables
+    python summary.py show        # print the current totals
+"""
+import sys
+import threading
+
+import db
+
+TABLE = "summary_counters"
+TOTAL_KEY = "*"
+
+# Per base table: (dimension name, grouping column or None for the table total)
+DIMENSIONS = {
+    "providers": [
+        ("providers", None),
+        ("providers.City", "City"),
+        ("providers.Type", "Type"),
+    ],
+    "receivers": [
+        ("receivers", None),
+        ("receivers.City", "City"),
+    ],
+    "food_listings": [
+        ("food_listings", None),
+        ("food_listings.Location", "Location"),
+        ("food_listings.Food_Type", "Food_Type"),
+        ("food_listings.Meal_Type", "Meal_Type"),
+        ("food_listings.Provider_ID", "Provider_ID"),
+    ],
+    "claims": [
+        ("claims", None),
+        ("claims.Status", "Status"),
+    ],
+}
+QUANTITY_COLUMN = {"food_listings": "Quantity"}
+
+DDL = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE} (
+        Dimension VARCHAR(64) NOT NULL,
+        Dim_Key VARCHAR(255) NOT NULL,
+        Row_Count BIGINT NOT NULL DEFAULT 0,
+        Quantity_Sum BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (Dimension, Dim_Key)
+    )
+"""
+UPSERT = f"""
+    INSERT INTO {TABLE} (Dimension, Dim_Key, Row_Count, Quantity_Sum)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        Row_Count = Row_Count + VALUES(Row_Count),
+        Quantity_Sum = Quantity_Sum + VALUES(Quantity_Sum)
+"""
+# Marker row written by rebuild(); its presence means the counters are seeded.
+BUILT_MARKER = ("__meta__", "built")
+
+LOCK_NAME = "summary_rebuild"
+LOCK_TIMEOUT = 60
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def _dim_key(value):
+    return "" if value is None else str(value)
+
+
+# -----------------------------
+# INCREMENTAL MAINTENANCE
+# -----------------------------
+def record_change(cursor, table, old=None, new=None):
+    """
+    Apply the counter deltas for one row changing from ``old`` to ``new``.
+
+    Pass only ``new`` for an insert, only ``old`` for a delete and both for an
+    update. Run it on the cursor of the transaction that performs the write.
+    """
+    record_changes(cursor, table, [(old, new)])
+
+
+def record_changes(cursor, table, changes):
+    """Apply many (old, new) row changes as one batched upsert."""
+    if table not in DIMENSIONS:
+        return
+    qty_col = QUANTITY_COLUMN.get(table)
+    deltas = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if not row:
+                continue
+            qty = int(row.get(qty_col) or 0) if qty_col else 0
+            for dimension, column in DIMENSIONS[table]:
+                key = TOTAL_KEY if column is None else _dim_key(row.get(column))
+                count, total = deltas.get((dimension, key), (0, 0))
+                deltas[(dimension, key)] = (count + sign, total + sign * qty)
+    rows = [(dim, key, count, total) for (dim, key), (count, total) in deltas.items() if count or total]
+    if rows:
+        cursor.executemany(UPSERT, rows)
+
+
+# -----------------------------
+# FULL REBUILD
+# -----------------------------
+def rebuild(conn):
+    """Recompute every counter from the base tables in one transaction."""
+    with db.named_lock(conn, LOCK_NAME, LOCK_TIMEOUT):
+        _rebuild(conn)
+
+
+def _rebuild(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(DDL)
+    finally:
+        cursor.close()
+    with db.transaction(conn) as tx:
+        tx.execute(f"DELETE FROM {TABLE}")
+        for table, dimensions in DIMENSIONS.items():
+            qty_col = QUANTITY_COLUMN.get(table)
+            qty = f"COALESCE(SUM({qty_col}), 0)" if qty_col else "0"
+            for dimension, column in dimensions:
+                if column is None:
+                    tx.execute(
+                        f"INSERT INTO {TABLE} (Dimension, Dim_Key, Row_Count, Quantity_Sum) "
+                        f"SELECT %s, %s, COUNT(*), {qty} FROM {table}",
+                        (dimension, TOTAL_KEY))
+                else:
+                    key = f"COALESCE(CAST({column} AS CHAR), '')"
+                    tx.execute(
+                        f"INSERT INTO {TABLE} (Dimension, Dim_Key, Row_Count, Quantity_Sum) "
+                        f"SELECT %s, {key}, COUNT(*), {qty} FROM {table} GROUP BY {key}",
+                        (dimension,))
+        tx.execute(UPSERT, BUILT_MARKER + (0, 0))
+
+
+def ensure(conn):
+    """Create and seed the summary table once per process if it is missing."""
+    global _ready
+    if _ready:
+        return
+    # Concurrent first page loads wait here instead of all rebuilding; the
+    # marker is re-read under the named lock in case another process won.
+    with _ready_lock:
+        if _ready:
+            return
+        with db.named_lock(conn, LOCK_NAME, LOCK_TIMEOUT):
+            cursor = conn.cursor()
+            try:
+                cursor.execute(DDL)
+                cursor.execute(f"SELECT 1 FROM {TABLE} WHERE Dimension = %s AND Dim_Key = %s", BUILT_MARKER)
+                built = cursor.fetchone() is not None
+            finally:
+                cursor.close()
+            if not built:
+                _rebuild(conn)
+        _ready = True
+
+
+# -----------------------------
+# READERS
+# -----------------------------
+def totals(cursor):
+    """Return {table: {"Row_Count": n, "Quantity_Sum": q}} from the total rows."""
+    cursor.execute(
+        f"SELECT Dimension, Row_Count, Quantity_Sum FROM {TABLE} WHERE Dim_Key = %s",
+        (TOTAL_KEY,))
+    return {row['Dimension']: row for row in cursor.fetchall()}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    conn = db.connect()
+    try:
+        if command == "rebuild":
+            rebuild(conn)
+            print(f"{TABLE} rebuilt.")
+        elif command == "show":
+            cur = conn.cursor()
+            for name, row in totals(cur).items():
+                print(f"{name:<16} rows={row['Row_Count']:<10} quantity={row['Quantity_Sum']}")
+            cur.close()
+        else:
+            sys.exit(__doc__)
+    finally:
+        conn.close()
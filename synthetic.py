@@ -0,0 +1,237 @@
+"""
+Synthetic registry data shaped like the data/*.csv sample.
+
+load_profile() reads the sample once and keeps the empirical value
+distributions (food names, types, meal times, quantities, expiry offsets,
+claim statuses, ...). The generators then draw rows from those
+distributions at any scale, with deterministic output for a given seed.
+
+generate_dataset() streams all four tables in batches with their foreign
+keys intact, and write_csv() saves them in the data/*.csv layout so
+ingest.py can load them:
+
+    python synthetic.py --rows 1000000 --out data/synthetic-1e6
+    python ingest.py --data-dir data/synthetic-1e6 --mode load-data --disable-fk-checks
+"""
+import argparse
+import csv
+import datetime
+import os
+import random
+from collections import Counter
+
+import pandas as pd
+
+from ingest import SOURCES
+
+DATE_FMT = "%m/%d/%Y"
+TABLES = ("providers", "receivers", "food_listings", "claims")
+
+
+def _weights(series):
+    counts = Counter(series.dropna())
+    values = list(counts)
+    return values, [counts[v] for v in values]
+
+
+def load_profile(data_dir="data"):
+    providers = pd.read_csv(os.path.join(data_dir, "providers_data.csv"))
+    receivers = pd.read_csv(os.path.join(data_dir, "receivers_data.csv"))
+    listings = pd.read_csv(os.path.join(data_dir, "food_listings_data.csv"))
+    claims = pd.read_csv(os.path.join(data_dir, "claims_data.csv"))
+
+    expiry = pd.to_datetime(listings["Expiry_Date"], format=DATE_FMT)
+    claimed_at = pd.to_datetime(claims["Timestamp"], format="%m/%d/%Y %H:%M")
+    return {
+        # Sample cities are mostly unique per row; the generators reuse this
+        # pool so that listings and receivers actually share cities.
+        "cities": sorted(set(listings["Location"]) | set(receivers["City"]) | set(providers["City"])),
+        "provider_types": _weights(providers["Type"]),
+        "receiver_types": _weights(receivers["Type"]),
+        "food_names": _weights(listings["Food_Name"]),
+        "food_types": _weights(listings["Food_Type"]),
+        "meal_types": _weights(listings["Meal_Type"]),
+        "statuses": _weights(claims["Status"]),
+        "quantities": listings["Quantity"].tolist(),
+        "expiry_start": expiry.min().date(),
+        "expiry_span_days": max(1, (expiry.max() - expiry.min()).days),
+        "claims_start": claimed_at.min().to_pydatetime(),
+        "claims_span_minutes": max(1, int((claimed_at.max() - claimed_at.min()).total_seconds() // 60)),
+        "names": providers["Name"].tolist() + receivers["Name"].tolist(),
+        "addresses": providers["Address"].dropna().tolist(),
+    }
+
+
+def _pick(rng, weighted, k):
+    values, weights = weighted
+    return rng.choices(values, weights=weights, k=k)
+
+
+def city_pool(profile, n_cities, rng):
+    cities = list(profile["cities"])
+    rng.shuffle(cities)
+    while len(cities) < n_cities:
+        cities.append(f"{rng.choice(profile['cities'])} {len(cities)}")
+    return cities[:n_cities]
+
+
+def _phone(rng):
+    return f"+1-{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+
+
+def generate_providers(n, profile, cities, rng, start_id=1):
+    types = _pick(rng, profile["provider_types"], n)
+    return [
+        {
+            "Provider_ID": start_id + i,
+            "Name": rng.choice(profile["names"]),
+            "Type": types[i],
+            "Address": rng.choice(profile["addresses"]),
+            "City": rng.choice(cities),
+            "Contact": _phone(rng),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_receivers(n, profile, cities, rng, start_id=1):
+    types = _pick(rng, profile["receiver_types"], n)
+    return [
+        {
+            "Receiver_ID": start_id + i,
+            "Name": rng.choice(profile["names"]),
+            "Type": types[i],
+            "City": rng.choice(cities),
+            "Contact": _phone(rng),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_listings(n, profile, cities, rng, provider_ids=None, start_id=1, expiry_start=None):
+    names = _pick(rng, profile["food_names"], n)
+    food_types = _pick(rng, profile["food_types"], n)
+    meal_types = _pick(rng, profile["meal_types"], n)
+    provider_types = _pick(rng, profile["provider_types"], n)
+    expiry_start = expiry_start or profile["expiry_start"]
+    span = profile["expiry_span_days"]
+    return [
+        {
+            "Food_ID": start_id + i,
+            "Food_Name": names[i],
+            "Quantity": rng.choice(profile["quantities"]),
+            "Expiry_Date": expiry_start + datetime.timedelta(days=rng.randint(0, span)),
+            "Provider_ID": rng.choice(provider_ids) if provider_ids else rng.randint(1, max(1, n // 10)),
+            "Provider_Type": provider_types[i],
+            "Location": rng.choice(cities),
+            "Food_Type": food_types[i],
+            "Meal_Type": meal_types[i],
+        }
+        for i in range(n)
+    ]
+
+
+def generate_claims(n, profile, food_ids, receiver_ids, rng, start_id=1):
+    statuses = _pick(rng, profile["statuses"], n)
+    start, span = profile["claims_start"], profile["claims_span_minutes"]
+    return [
+        {
+            "Claim_ID": start_id + i,
+            "Food_ID": rng.choice(food_ids),
+            "Receiver_ID": rng.choice(receiver_ids),
+            "Status": statuses[i],
+            "Timestamp": start + datetime.timedelta(minutes=rng.randint(0, span)),
+        }
+        for i in range(n)
+    ]
+
+
+# -----------------------------
+# FULL DATASETS
+# -----------------------------
+def generate_dataset(counts, profile, rng, cities, batch_size=50000):
+    """
+    Yield ``(table, rows)`` batches for all four tables in foreign-key order,
+    each row a tuple in ingest.SOURCES column order. As in the sample, a
+    listing's Location and Provider_Type are those of its provider, and every
+    claim references an existing listing and receiver.
+    """
+    provider_city, provider_type = [], []
+    for start in range(0, counts["providers"], batch_size):
+        rows = generate_providers(min(batch_size, counts["providers"] - start), profile, cities, rng, start + 1)
+        provider_city += [row["City"] for row in rows]
+        provider_type += [row["Type"] for row in rows]
+        yield "providers", _tuples("providers", rows)
+
+    for start in range(0, counts["receivers"], batch_size):
+        rows = generate_receivers(min(batch_size, counts["receivers"] - start), profile, cities, rng, start + 1)
+        yield "receivers", _tuples("receivers", rows)
+
+    provider_ids = range(1, counts["providers"] + 1)
+    for start in range(0, counts["food_listings"], batch_size):
+        rows = generate_listings(min(batch_size, counts["food_listings"] - start), profile, cities, rng,
+                                 provider_ids=provider_ids, start_id=start + 1)
+        for row in rows:
+            row["Location"] = provider_city[row["Provider_ID"] - 1]
+            row["Provider_Type"] = provider_type[row["Provider_ID"] - 1]
+        yield "food_listings", _tuples("food_listings", rows)
+
+    food_ids, receiver_ids = range(1, counts["food_listings"] + 1), range(1, counts["receivers"] + 1)
+    for start in range(0, counts["claims"], batch_size):
+        rows = generate_claims(min(batch_size, counts["claims"] - start), profile, food_ids, receiver_ids, rng, start + 1)
+        yield "claims", _tuples("claims", rows)
+
+
+def _tuples(table, rows):
+    columns = SOURCES[table]["columns"]
+    return [tuple(row[column] for column in columns) for row in rows]
+
+
+def _csv_value(value):
+    # The sample's own formats, e.g. 3/17/2025 and 3/5/2025 5:26.
+    if isinstance(value, datetime.datetime):
+        return f"{value.month}/{value.day}/{value.year} {value.hour}:{value.minute:02d}"
+    if isinstance(value, datetime.date):
+        return f"{value.month}/{value.day}/{value.year}"
+    return value
+
+
+def write_csv(out_dir, counts, seed=7, n_cities=None, data_dir="data", batch_size=50000):
+    """Write a synthetic dataset as <table>_data.csv files; return the row counts."""
+    rng = random.Random(seed)
+    profile = load_profile(data_dir)
+    cities = city_pool(profile, n_cities or max(len(profile["cities"]), counts["food_listings"] // 100), rng)
+    os.makedirs(out_dir, exist_ok=True)
+    files, writers = {}, {}
+    try:
+        for table, rows in generate_dataset(counts, profile, rng, cities, batch_size):
+            if table not in writers:
+                files[table] = open(os.path.join(out_dir, SOURCES[table]["file"]), "w", newline="", encoding="utf-8")
+                writers[table] = csv.writer(files[table], lineterminator="\n")
+                writers[table].writerow(SOURCES[table]["columns"])
+            writers[table].writerows([_csv_value(v) for v in row] for row in rows)
+    finally:
+        for f in files.values():
+            f.close()
+    return dict(counts)
+
+
+def parse_counts(args):
+    return {table: getattr(args, table) or args.rows for table in TABLES}
+
+
+def add_count_arguments(parser, default_rows=100000):
+    parser.add_argument("--rows", type=int, default=default_rows, help="rows per table unless overridden")
+    for table in TABLES:
+        parser.add_argument(f"--{table.replace('_', '-')}", dest=table, type=int)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cities", type=int, help="distinct cities (default: one per 100 listings, at least the sample's)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset in the data/*.csv layout.")
+    parser.add_argument("--out", required=True, help="output directory")
+    add_count_arguments(parser)
+    args = parser.parse_args()
+    for table, n in write_csv(args.out, parse_counts(args), args.seed, args.cities).items():
+        print(f"{table:<15}{n:>12,} rows")
@@ -0,0 +1,317 @@
+"""
+Sandboxed execution for the Direct SQL Access terminal.
+
+Ad-hoc statements never touch the app's own pool. They run on a small,
+separate "terminal" pool whose sessions are READ ONLY, optionally use a
+SELECT-only account and a low-priority resource group, and carry a
+MAX_EXECUTION_TIME. Before a query runs:
+
+* the text is scanned and refused unless it is a single SELECT / WITH /
+  TABLE / SHOW / EXPLAIN / DESCRIBE statement with no locking reads,
+  INTO OUTFILE, executable comments or GET_LOCK / SLEEP style calls;
+* SELECTs are costed with EXPLAIN FORMAT=JSON and refused over the budget.
+
+Results are streamed off an unbuffered cursor and capped at ``ROW_CAP``
+rows; at the cap the statement is killed rather than drained, so a
+forgotten LIMIT costs one page of rows, not the server or the Streamlit
+process. Each query is a Job running on a background thread, which
+the UI polls and can cancel (KILL QUERY) at any time.
+"""
+import contextvars
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import MySQLdb
+from MySQLdb.cursors import SSDictCursor
+from decouple import config
+
+import db
+import executor
+import profiler
+
+ROW_CAP = config('terminal_row_cap', default=1000, cast=int)
+TIMEOUT = config('terminal_timeout_ms', default=10000, cast=int) / 1000
+COST_BUDGET = config('terminal_cost_budget', default=100000.0, cast=float)
+POOL_SIZE = config('terminal_pool_size', default=2, cast=int)
+ALLOW_WRITES = config('terminal_allow_writes', default=False, cast=bool)
+FETCH_CHUNK = 200
+
+_READ_VERBS = ("SELECT", "WITH", "TABLE", "SHOW", "EXPLAIN", "DESCRIBE", "DESC")
+_COSTED_VERBS = ("SELECT", "WITH", "TABLE")
+# Statement types only come from the leading verb (and, after WITH, the verb
+# the CTEs belong to), so function names such as REPLACE() are never mistaken
+# for statements. These patterns catch what a read-only verb can still carry.
+_FORBIDDEN = [
+    (re.compile(r"\bINTO\s+(OUTFILE|DUMPFILE)\b"), "INTO OUTFILE / DUMPFILE is not allowed"),
+    (re.compile(r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b"), "locking reads are not allowed"),
+    (re.compile(r"^(EXPLAIN|DESCRIBE|DESC)\s+ANALYZE\b"), "EXPLAIN ANALYZE executes the query; use plain EXPLAIN"),
+    # Named locks would outlive the query on a pooled connection.
+    (re.compile(r"\b(GET_LOCK|RELEASE_LOCK|RELEASE_ALL_LOCKS|SLEEP|BENCHMARK|LOAD_FILE)\s*\("),
+     "GET_LOCK, RELEASE_LOCK, SLEEP, BENCHMARK and LOAD_FILE are not allowed"),
+]
+
+_jobs = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="terminal")
+
+
+class QueryRefused(Exception):
+    """The statement failed the sandbox checks and was not sent to the server."""
+
+
+class QueryCancelled(MySQLdb.OperationalError):
+    """The query was cancelled from the UI."""
+
+
+# -----------------------------
+# STATEMENT CHECKS
+# -----------------------------
+def _code_only(sql):
+    """
+    Return ``sql`` with string literals, quoted identifiers and comments
+    blanked out, so keyword checks cannot be fooled by (or trip over) them.
+    """
+    out = []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in "'\"`":
+            j = i + 1
+            while j < n:
+                if sql[j] == "\\" and ch != "`":
+                    j += 2
+                    continue
+                if sql[j] == ch:
+                    if j + 1 < n and sql[j + 1] == ch:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            out.append(" ")
+            i = j + 1
+        elif sql.startswith("/*", i):
+            if sql.startswith("/*!", i) or sql.startswith("/*+", i):
+                raise QueryRefused("executable comments and optimizer hints are not allowed")
+            end = sql.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            out.append(" ")
+        elif ch == "#" or (sql.startswith("--", i) and (i + 2 == n or sql[i + 2].isspace())):
+            end = sql.find("\n", i)
+            i = n if end < 0 else end
+            out.append(" ")
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _cte_statement_verb(code):
+    """The verb of the statement that follows a leading WITH clause."""
+    depth, in_body, after_body = 0, False, False
+    for token in re.findall(r"[(),]|[^\s(),]+", code)[1:]:
+        if after_body and depth == 0:
+            if token != ",":
+                return "SELECT" if token == "(" else token
+            after_body = False
+        elif token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+            if depth == 0 and in_body:
+                in_body, after_body = False, True
+        elif depth == 0 and token == "AS":
+            in_body = True
+    return ""
+
+
+def check(sql):
+    """Refuse anything but one read-only statement; return its leading verb."""
+    code = " ".join(_code_only(sql).split()).rstrip("; ").upper()
+    if not code:
+        raise QueryRefused("empty statement")
+    if ";" in code:
+        raise QueryRefused("only one statement can run at a time")
+    verb = code.lstrip("(").split(None, 1)[0]
+    if verb not in _READ_VERBS:
+        raise QueryRefused(f"{verb} is not a read-only statement")
+    if verb == "WITH":
+        statement = _cte_statement_verb(code)
+        if statement not in ("SELECT", "TABLE", "VALUES"):
+            raise QueryRefused(f"WITH ... {statement or '(nothing)'} is not a read-only statement")
+    for pattern, reason in _FORBIDDEN:
+        if pattern.search(code):
+            raise QueryRefused(reason)
+    return verb
+
+
+def _query_cost(plan):
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    if cost is not None:
+        return float(cost)
+    # UNIONs and some subquery plans only carry costs on their inner blocks.
+    total = 0.0
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "query_cost" in node:
+                total += float(node["query_cost"])
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return total
+
+
+def explain_cost(cursor, sql):
+    cursor.execute("EXPLAIN FORMAT=JSON " + sql.strip().rstrip(";"))
+    row = cursor.fetchone()
+    return _query_cost(json.loads(next(iter(row.values()))))
+
+
+# -----------------------------
+# SANDBOX POOL
+# -----------------------------
+def get_pool():
+    # sql_select_limit makes the server stop after ROW_CAP + 1 rows unless the
+    # query carries its own LIMIT; the streaming fetch caps the rest.
+    init = ["SET SESSION TRANSACTION READ ONLY",
+            f"SET SESSION MAX_EXECUTION_TIME = {int(TIMEOUT * 1000)}",
+            f"SET SESSION sql_select_limit = {ROW_CAP + 1}"]
+    resource_group = config('terminal_resource_group', default='')
+    if resource_group:
+        init.append(f"SET RESOURCE GROUP {resource_group}")
+    options = dict(
+        size=POOL_SIZE,
+        timeout=config('terminal_pool_timeout', default=2.0, cast=float),
+        init_statements=init,
+    )
+    user = config('terminal_db_user', default='')
+    if user:
+        options.update(user=user, passwd=config('terminal_db_password', default=''))
+    return db.get_pool("terminal", **options)
+
+
+def estimate(sql):
+    """Dry run: check the statement and return its EXPLAIN cost (None if not costed)."""
+    verb = check(sql)
+    if verb not in _COSTED_VERBS:
+        return None
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            return explain_cost(cursor, sql)
+        finally:
+            cursor.close()
+
+
+# -----------------------------
+# JOBS
+# -----------------------------
+class Job:
+    """One terminal query running in the background; poll ``done`` and read the result."""
+
+    def __init__(self, sql, verb):
+        self.sql = sql
+        self.verb = verb
+        self.status = "queued"
+        self.columns = []
+        self.rows = []
+        self.truncated = False
+        self.cost = None
+        self.error = None
+        self.started = time.monotonic()
+        self.finished = None
+        self.thread_id = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def cancel(self):
+        # Kill with the sandbox credentials; the app account may lack the privilege.
+        executor.cancel(self, **get_pool().connect_kwargs)
+
+    def _set(self, status):
+        with self.lock:
+            if self.cancelled:
+                raise QueryCancelled("cancelled")
+            self.status = status
+
+
+def _stream(job, conn):
+    if job.verb in _COSTED_VERBS:
+        job._set("explaining")
+        cursor = conn.cursor()
+        try:
+            job.cost = explain_cost(cursor, job.sql)
+        finally:
+            cursor.close()
+        if job.cost > COST_BUDGET:
+            raise QueryRefused(f"estimated cost {job.cost:,.0f} is over the budget of {COST_BUDGET:,.0f}; "
+                               "add filters or a LIMIT")
+
+    job._set("running")
+    stream = conn.cursor(SSDictCursor)
+    stream.execute(job.sql)
+    job.columns = [col[0] for col in stream.description or ()]
+    while len(job.rows) <= ROW_CAP:
+        job._set("fetching")
+        chunk = stream.fetchmany(FETCH_CHUNK)
+        if not chunk:
+            stream.close()
+            return True
+        job.rows.extend(chunk)
+    job.truncated = True
+    del job.rows[ROW_CAP:]
+    # Rows are still pending, and freeing an unbuffered result reads all of
+    # them off the socket. Stop the statement on the server first so only its
+    # error is left to read; the caller then discards the connection.
+    executor.kill_query(job.thread_id, **get_pool().connect_kwargs)
+    try:
+        stream.close()
+    except MySQLdb.Error:
+        pass
+    return False
+
+
+def _execute(job):
+    pool = get_pool()
+    discard = False
+    try:
+        conn = pool.acquire()
+        try:
+            with job.lock:
+                if job.cancelled:
+                    raise QueryCancelled("cancelled before it started")
+                job.thread_id = conn.thread_id()
+            discard = not _stream(job, conn)
+        except MySQLdb.OperationalError:
+            discard = True
+            raise
+        finally:
+            with job.lock:
+                job.thread_id = None
+            pool.release(conn, discard=discard)
+        job.status = "done"
+    except Exception as err:
+        job.error = QueryCancelled("cancelled") if job.cancelled else err
+        job.status = "cancelled" if job.cancelled else "refused" if isinstance(err, QueryRefused) else "failed"
+    finally:
+        job.finished = time.monotonic()
+        profiler.profiler.record("query", job.sql, job.elapsed, rows=len(job.rows),
+                                 size=profiler.payload_bytes(job.rows))
+
+
+def submit(sql):
+    """Check ``sql`` and start it in the sandbox; QueryRefused is raised up front."""
+    job = Job(sql, check(sql))
+    # Copy the caller's context so the sample keeps its page/section tags.
+    _jobs.submit(contextvars.copy_context().run, _execute, job)
+    return job
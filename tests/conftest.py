@@ -0,0 +1,126 @@
+"""
+Shared fixtures. The tests never reach a MySQL server: connections are fakes,
+and when the mysqlclient driver is not installed a minimal stand-in module
+provides the names the app imports from it (exception classes and cursors).
+"""
+import sys
+import types
+
+import pytest
+
+try:
+    import MySQLdb  # noqa: F401
+except ImportError:
+    class Error(Exception):
+        pass
+
+    class OperationalError(Error):
+        pass
+
+    class BaseCursor:
+
+        def __init__(self, connection=None):
+            self.connection = connection
+
+    def connect(**kwargs):
+        raise OperationalError("MySQLdb is not installed")
+
+    driver = types.ModuleType("MySQLdb")
+    cursors = types.ModuleType("MySQLdb.cursors")
+    driver.Error, driver.OperationalError, driver.connect, driver.cursors = Error, OperationalError, connect, cursors
+    for name in ("BaseCursor", "Cursor", "DictCursor", "SSCursor", "SSDictCursor"):
+        setattr(cursors, name, type(name, (BaseCursor,), {}))
+    sys.modules["MySQLdb"], sys.modules["MySQLdb.cursors"] = driver, cursors
+
+import MySQLdb  # noqa: E402
+
+import db  # noqa: E402
+
+
+class FakeCursor:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        if params is not None:
+            sql = sql % tuple(repr(p) if isinstance(p, str) else p for p in params)
+        self.conn.executed.append(sql)
+        rows = next((rows for prefix, rows in self.conn.responses.items() if sql.startswith(prefix)), ())
+        self.rows = list(rows() if callable(rows) else rows)
+        return len(self.rows)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, thread_id, responses=None):
+        self.responses = {} if responses is None else responses
+        self.open = True
+        self.executed = []
+        self.rollbacks = 0
+        self.fail_rollback = False
+        self._thread_id = thread_id
+
+    def cursor(self, *args):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return self._thread_id
+
+    def ping(self):
+        if not self.open:
+            raise MySQLdb.OperationalError("server has gone away")
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise MySQLdb.OperationalError("lost connection")
+        self.rollbacks += 1
+
+    def close(self):
+        self.open = False
+
+
+class FakeServer:
+    """
+    Hands out FakeConnections in place of db.connect and remembers them.
+    ``responses`` maps a statement prefix to the rows (or a callable
+    returning them) that its cursors fetch.
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.responses = {}
+        self.refuse = False
+
+    def connect(self, **kwargs):
+        if self.refuse:
+            raise MySQLdb.OperationalError("too many connections")
+        conn = FakeConnection(len(self.connections) + 1, self.responses)
+        self.connections.append(conn)
+        return conn
+
+    def statements(self):
+        return [sql for conn in self.connections for sql in conn.executed]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeServer()
+    monkeypatch.setattr(db, "connect", fake.connect)
+    monkeypatch.setattr(db, "_pools", {})
+    return fake
@@ -0,0 +1,91 @@
+"""
+db.ConnectionPool checkout, timeout and discard accounting, against fake
+connections (conftest.py).
+"""
+import threading
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def pool(server):
+    return db.ConnectionPool(size=2, timeout=0.1, init_statements=["SET SESSION sql_select_limit = 10"])
+
+
+def test_reuses_the_most_recent_idle_connection(server, pool):
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is second
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["hits"], stats["misses"], stats["created"]) == (3, 1, 2, 2)
+    assert stats["in_use"] == 1
+    assert server.connections[0].executed == ["SET SESSION sql_select_limit = 10"]
+
+
+def test_checkout_times_out_when_exhausted(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(db.PoolExhausted):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["waits"], stats["open"]) == (1, 0, 2)
+    pool.release(held.pop())
+    assert pool.acquire() is not None
+
+
+def test_waiter_gets_a_released_connection(pool):
+    held = [pool.acquire(), pool.acquire()]
+    timer = threading.Timer(0.02, pool.release, args=(held[0],))
+    timer.start()
+    assert pool.acquire(timeout=2) is held[0]
+    timer.join()
+    assert pool.stats()["waits"] == 1
+
+
+def test_discard_frees_the_slot(server, pool):
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+    assert not conn.open
+    stats = pool.stats()
+    assert (stats["discarded"], stats["open"], stats["idle"]) == (1, 0, 0)
+    assert pool.acquire() is not conn
+
+
+def test_closed_connection_is_discarded_on_release(pool):
+    conn = pool.acquire()
+    conn.close()
+    pool.release(conn)
+    assert pool.stats()["discarded"] == 1
+
+
+def test_failed_connect_frees_the_slot(server, pool):
+    server.refuse = True
+    with pytest.raises(db.MySQLdb.OperationalError):
+        pool.acquire()
+    assert pool.stats()["open"] == 0
+
+
+def test_exception_rolls_back_before_release(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("page error")
+    assert conn.rollbacks == 1 and conn.open
+    assert pool.stats()["idle"] == 1
+
+
+def test_connection_that_cannot_roll_back_is_discarded(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.fail_rollback = True
+            raise ValueError("page error")
+    assert not conn.open
+    assert pool.stats()["discarded"] == 1
+
+
+def test_operational_error_discards(pool):
+    with pytest.raises(db.MySQLdb.OperationalError):
+        with pool.connection() as conn:
+            raise db.MySQLdb.OperationalError("lost connection")
+    assert not conn.open and pool.stats()["open"] == 0
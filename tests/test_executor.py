@@ -0,0 +1,97 @@
+"""
+executor.run_parallel(): the dedicated worker pool under a full default pool,
+and the timeout -> cancel path. Runs against fake connections (conftest.py).
+"""
+import threading
+import time
+
+import pytest
+
+import db
+import executor
+
+
+@pytest.fixture
+def pools(server):
+    return db.get_pool(size=4, timeout=0.5)
+
+
+def run_sessions(page_pool, **run_kwargs):
+    """Hold every page connection at once, then dispatch three reads per session."""
+    holding = threading.Barrier(page_pool.size)
+    results = []
+
+    def session():
+        conn = page_pool.acquire()
+        try:
+            holding.wait()
+            results.append(executor.run_parallel(
+                {f"read{i}": lambda cursor: time.sleep(0.05) for i in range(3)}, timeout=5, **run_kwargs))
+        finally:
+            page_pool.release(conn)
+
+    threads = [threading.Thread(target=session) for _ in range(page_pool.size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [value for result in results for value in result.values()]
+
+
+def test_no_pool_exhaustion_at_pool_size_sessions(pools):
+    values = run_sessions(pools)
+    assert len(values) == 3 * pools.size
+    assert not [value for value in values if isinstance(value, Exception)]
+    assert pools.stats()["timeouts"] == 0
+
+
+def test_sharing_the_page_pool_would_starve(pools):
+    # The old behaviour: workers queue behind the connections the sessions hold.
+    values = run_sessions(pools, pool=pools)
+    assert any(isinstance(value, db.PoolExhausted) for value in values)
+
+
+def test_results_and_failures_map_by_name(server):
+    def broken(cursor):
+        raise ValueError("bad task")
+
+    results = executor.run_parallel({"ok": lambda cursor: 42, "broken": broken}, timeout=5)
+    assert results["ok"] == 42
+    assert isinstance(results["broken"], ValueError)
+
+
+def test_overrunning_task_is_killed(server):
+    release = threading.Event()
+    try:
+        results = executor.run_parallel({"fast": lambda cursor: 1, "slow": lambda cursor: release.wait(5)},
+                                        timeout=0.2)
+        assert results["fast"] == 1
+        assert isinstance(results["slow"], executor.QueryTimeout)
+        running = [conn for conn in server.connections if "SET SESSION MAX_EXECUTION_TIME = 200" in conn.executed]
+        assert any(f"KILL QUERY {conn.thread_id()}" in server.statements() for conn in running)
+    finally:
+        release.set()
+
+
+def test_failed_kill_connection_still_returns_a_timeout(server):
+    release = threading.Event()
+
+    def slow(cursor):
+        server.refuse = True  # the KILL QUERY connection will be refused
+        release.wait(5)
+
+    try:
+        results = executor.run_parallel({"slow": slow}, timeout=0.2)
+        assert isinstance(results["slow"], executor.QueryTimeout)
+        assert not [sql for sql in server.statements() if sql.startswith("KILL")]
+    finally:
+        release.set()
+
+
+def test_task_queued_past_its_deadline_never_runs(server):
+    started = []
+    task = executor._Task("late", lambda cursor: started.append(True))
+    executor.cancel(task)
+    with pytest.raises(executor.QueryTimeout):
+        executor._run(task, executor.get_pool(), timeout=1)
+    assert not started
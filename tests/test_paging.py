@@ -0,0 +1,59 @@
+"""
+paging.keyset_page() walked end to end over an in-memory SQLite table, which
+shares MySQL's NULL semantics for row constructors and sorts NULL first.
+"""
+import sqlite3
+
+import pytest
+
+import paging
+
+
+class Cursor:
+    """A DictCursor look-alike over sqlite3 that accepts MySQL's %s placeholders."""
+
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql.replace("%s", "?"), list(params))
+
+    def fetchall(self):
+        names = [col[0] for col in self.cursor.description]
+        return [dict(zip(names, row)) for row in self.cursor.fetchall()]
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE providers (Provider_ID INTEGER PRIMARY KEY, City TEXT)")
+    cities = [None, "Agra", None, "Pune", "Agra", None, "Delhi", "Pune", None, "Agra", "Delhi"]
+    conn.executemany("INSERT INTO providers VALUES (?, ?)", enumerate(cities, start=1))
+    yield Cursor(conn)
+    conn.close()
+
+
+def walk(cursor, order_by, page_size):
+    seen, after = [], None
+    while True:
+        rows, after = paging.keyset_page(cursor, "providers", order_by=order_by, after=after, page_size=page_size)
+        seen.extend(row["Provider_ID"] for row in rows)
+        if after is None:
+            return seen
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4, 50])
+def test_pages_cover_null_keys(cursor, page_size):
+    cursor.execute("SELECT Provider_ID FROM providers ORDER BY City, Provider_ID")
+    expected = [row["Provider_ID"] for row in cursor.fetchall()]
+    assert walk(cursor, ("City", "Provider_ID"), page_size) == expected
+
+
+def test_page_starting_on_a_null_key(cursor):
+    rows, after = paging.keyset_page(cursor, "providers", order_by=("City", "Provider_ID"), after=(None, 3), page_size=3)
+    assert [row["Provider_ID"] for row in rows] == [6, 9, 2]
+    assert after == ("Agra", 2)
+
+
+def test_single_unique_key(cursor):
+    assert walk(cursor, ("Provider_ID",), 4) == list(range(1, 12))
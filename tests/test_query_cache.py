@@ -0,0 +1,60 @@
+"""
+query_cache.QueryCache: table-scoped invalidation and the generation guard
+that keeps a read racing a write from re-caching the pre-write rows.
+"""
+import query_cache
+
+
+class Cursor:
+    """Returns ``rows``; ``during`` runs between execute() and fetchall(), like a concurrent commit."""
+
+    def __init__(self, rows, during=None):
+        self.rows = rows
+        self.during = during
+        self.executed = 0
+
+    def execute(self, sql, params=None):
+        self.executed += 1
+        if self.during is not None:
+            self.during()
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_hit_after_miss():
+    cache = query_cache.QueryCache()
+    cursor = Cursor([{"n": 1}])
+    assert cache.fetch(cursor, "SELECT COUNT(*) AS n FROM claims") == ({"n": 1},)
+    assert cache.fetch(cursor, "SELECT  COUNT(*) AS n\nFROM claims") == ({"n": 1},)
+    assert cursor.executed == 1
+
+
+def test_invalidate_drops_only_dependent_entries():
+    cache = query_cache.QueryCache()
+    cache.fetch(Cursor([1]), "SELECT * FROM claims")
+    cache.fetch(Cursor([2]), "SELECT * FROM providers")
+    cache.invalidate("Claims")
+    assert cache.get("SELECT * FROM claims") is None
+    assert cache.get("SELECT * FROM providers") == (2,)
+
+
+def test_write_during_read_is_not_cached():
+    cache = query_cache.QueryCache()
+    stale = Cursor(["before the write"], during=lambda: cache.invalidate("claims"))
+    assert cache.fetch(stale, "SELECT * FROM claims") == ("before the write",)
+    assert cache.get("SELECT * FROM claims") is None
+    assert cache.stats()["raced"] == 1
+    assert cache.fetch(Cursor(["after"]), "SELECT * FROM claims") == ("after",)
+
+
+def test_full_invalidation_during_read_is_not_cached():
+    cache = query_cache.QueryCache()
+    cache.fetch(Cursor([1], during=lambda: cache.invalidate_sql("TRUNCATE something_unparsed")), "SELECT * FROM claims")
+    assert cache.get("SELECT * FROM claims") is None
+
+
+def test_unrelated_write_during_read_still_caches():
+    cache = query_cache.QueryCache()
+    cache.fetch(Cursor([1], during=lambda: cache.invalidate("providers")), "SELECT * FROM claims")
+    assert cache.get("SELECT * FROM claims") == (1,)
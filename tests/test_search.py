@@ -0,0 +1,36 @@
+"""
+The query builders search.py exposes, which explain.py feeds to EXPLAIN
+instead of keeping its own copies of the search SQL.
+"""
+import search
+
+STATUSES = ["Pending", "Completed", "Cancelled"]
+
+
+def test_claims_prefix_and_typo_match_statuses():
+    sql, params = search.claims_query("pend", STATUSES)
+    assert "Status IN (%s)" in sql and params == ["Pending", 100]
+    sql, params = search.claims_query("compelted", STATUSES, limit=5)
+    assert params == ["Completed", 5]
+
+
+def test_claims_numeric_term_matches_the_id():
+    sql, params = search.claims_query("42", STATUSES)
+    assert sql.startswith("SELECT * FROM claims WHERE Claim_ID = %s")
+    assert params == [42, 100]
+
+
+def test_claims_query_is_none_without_a_match():
+    assert search.claims_query("zzz", STATUSES) is None
+
+
+def test_typo_candidates_escape_like_wildcards():
+    sql, params = search.candidates_query("Providers", "Name", "%ice")
+    assert sql.startswith("SELECT DISTINCT Name AS value FROM providers WHERE Name LIKE %s")
+    assert params == ["\\%%", search.TYPO_CANDIDATES]
+
+
+def test_near_miss_query_ors_the_columns():
+    sql, params = search.near_miss_query("Receivers", {"Name": ["Asha"], "City": ["Pune", "Puri"]}, limit=7)
+    assert "Name IN (%s) OR City IN (%s, %s)" in sql and sql.endswith("ORDER BY Receiver_ID LIMIT %s")
+    assert params == ["Asha", "Pune", "Puri", 7]
@@ -0,0 +1,63 @@
+"""
+snapshot.write_snapshot(): files are written under temporary names and never
+shared between exports, so overlapping refreshes leave only complete files.
+"""
+import datetime
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import snapshot
+
+
+def listings(n, offset=0):
+    return pa.table({
+        "Food_ID": pa.array(range(offset, offset + n), pa.int32()),
+        "Food_Name": [f"item {i}" for i in range(n)],
+        "Quantity": pa.array([i % 7 for i in range(n)], pa.int32()),
+        "Expiry_Date": pa.array([datetime.date(2025, 1 + i % 12, 1) for i in range(n)], pa.date32()),
+        "Provider_ID": pa.array([i % 5 for i in range(n)], pa.int32()),
+        "Provider_Type": ["Restaurant"] * n,
+        "Location": [f"City {i % 9}" for i in range(n)],
+        "Food_Type": ["Vegan"] * n,
+        "Meal_Type": ["Lunch"] * n,
+    }, schema=snapshot.SCHEMAS["food_listings"])
+
+
+def test_reuses_unchanged_partitions(tmp_path):
+    first = snapshot.write_snapshot({"food_listings": listings(200)}, tmp_path)
+    again = snapshot.write_snapshot({"food_listings": listings(200)}, tmp_path)
+    assert first["written"] > 0 and again["written"] == 0 and again["reused"] == first["written"]
+
+
+def test_overlapping_exports_leave_complete_files(tmp_path):
+    start = threading.Barrier(4)
+    errors = []
+
+    def export(offset):
+        start.wait()
+        try:
+            snapshot.write_snapshot({"food_listings": listings(500, offset)}, tmp_path)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=export, args=(offset,)) for offset in (0, 1000, 2000, 3000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    manifest = snapshot.load_manifest(tmp_path)
+    parts = list(manifest["tables"]["food_listings"]["partitions"].values())
+    assert sum(part["rows"] for part in parts) == 500
+    exports = set()
+    for part in parts:
+        # Every listed file holds the rows of the export whose manifest won, and only those.
+        ids = pq.read_table(os.path.join(tmp_path, part["file"]))["Food_ID"].to_pylist()
+        assert len(ids) == part["rows"]
+        exports |= {food_id // 1000 for food_id in ids}
+    assert len(exports) == 1
+    leftovers = [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+    assert not leftovers
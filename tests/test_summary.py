@@ -0,0 +1,41 @@
+"""
+summary.ensure(): concurrent first page loads seed the counters once.
+Runs against fake connections (conftest.py).
+"""
+import threading
+
+import summary
+
+
+def test_concurrent_first_loads_rebuild_once(server, monkeypatch):
+    monkeypatch.setattr(summary, "_ready", False)
+    built = []
+    server.responses["SELECT GET_LOCK"] = [{"got": 1}]
+    server.responses[f"SELECT 1 FROM {summary.TABLE}"] = lambda: [{"1": 1}] if built else []
+    server.responses[f"INSERT INTO {summary.TABLE} (Dimension, Dim_Key, Row_Count, Quantity_Sum) VALUES"] = \
+        lambda: built.append(True) or ()
+    start = threading.Barrier(8)
+
+    def first_load():
+        conn = server.connect()
+        start.wait()
+        summary.ensure(conn)
+
+    threads = [threading.Thread(target=first_load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    statements = server.statements()
+    assert statements.count(f"DELETE FROM {summary.TABLE}") == 1
+    assert statements.count(f"SELECT GET_LOCK('{summary.LOCK_NAME}', {summary.LOCK_TIMEOUT}) AS got") == 1
+    assert summary._ready
+
+
+def test_rebuild_holds_the_named_lock(server):
+    server.responses["SELECT GET_LOCK"] = [{"got": 1}]
+    conn = server.connect()
+    summary.rebuild(conn)
+    statements = conn.executed
+    assert statements[0].startswith("SELECT GET_LOCK('summary_rebuild'")
+    assert statements[-1] == "SELECT RELEASE_LOCK('summary_rebuild')"
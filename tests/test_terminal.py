@@ -0,0 +1,91 @@
+"""
+terminal.py: statement screening, and a capped stream stopping the query on
+the server instead of draining it. Runs against fake connections (conftest.py).
+"""
+import pytest
+
+import executor
+import terminal
+
+
+class Stream:
+
+    def __init__(self, conn, rows):
+        self.conn = conn
+        self.rows = rows
+        self.description = [("n",)]
+        self.closed_after_kill = None
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self):
+        self.closed_after_kill = bool(self.conn.killed)
+
+
+class StreamingConnection:
+
+    def __init__(self, rows):
+        self.executed = []
+        self.killed = []
+        self.stream = Stream(self, rows)
+
+    def cursor(self, *args):
+        return self.stream
+
+
+@pytest.fixture
+def kills(monkeypatch):
+    conn = StreamingConnection([])
+    monkeypatch.setattr(executor, "kill_query", lambda thread_id, **kwargs: conn.killed.append(thread_id))
+    monkeypatch.setattr(terminal, "get_pool", lambda: type("Pool", (), {"connect_kwargs": {}})())
+    return conn
+
+
+def streamed(conn, rows):
+    conn.stream.rows = [{"n": n} for n in range(rows)]
+    job = terminal.Job("SHOW PROCESSLIST", terminal.check("SHOW PROCESSLIST"))
+    job.thread_id = 77
+    return job, terminal._stream(job, conn)
+
+
+def test_capped_stream_is_killed_before_it_is_freed(kills):
+    job, finished = streamed(kills, terminal.ROW_CAP + 10 * terminal.FETCH_CHUNK)
+    assert not finished
+    assert job.truncated and len(job.rows) == terminal.ROW_CAP
+    assert kills.killed == [77]
+    assert kills.stream.closed_after_kill
+
+
+def test_complete_stream_is_not_killed(kills):
+    job, finished = streamed(kills, terminal.ROW_CAP)
+    assert finished
+    assert not job.truncated and len(job.rows) == terminal.ROW_CAP
+    assert kills.killed == []
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM claims",
+    "WITH c AS (SELECT * FROM claims) SELECT * FROM c",
+    "SHOW TABLES",
+    "EXPLAIN SELECT 1",
+])
+def test_reads_are_allowed(sql):
+    terminal.check(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM claims",
+    "WITH c AS (SELECT 1) DELETE FROM claims",
+    "SELECT * FROM claims FOR UPDATE",
+    "SELECT SLEEP(100)",
+    "SELECT GET_LOCK('matching', 0)",
+    "SELECT 1; DROP TABLE claims",
+])
+def test_writes_and_locks_are_refused(sql):
+    with pytest.raises(terminal.QueryRefused):
+        terminal.check(sql)